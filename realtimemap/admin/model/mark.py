@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Dict, Any, TYPE_CHECKING
 
+from redis import asyncio as asyncredis
 from starlette.requests import Request
 from starlette_admin import HasOne, IntegerField, DateTimeField, TextAreaField
 from starlette_admin.contrib.sqla import ModelView
@@ -8,15 +9,23 @@ from starlette_admin.exceptions import FormValidationError
 
 from admin.fields import GeomField
 from admin.fields.geohash_field import GeoHashField
+from core.config import conf
 from dependencies.notification import get_mark_notification_service
 from modules import Mark
 from modules.geo_service import get_geo_service
+from modules.mark.cache import MarkTileCache, MarkCellCache
 from modules.mark.dependencies import get_pg_mark_repository
+from modules.mark.index import IndexAction, mark_index_sync
 from modules.mark.schemas import ActionType
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
+# Админка смонтирована отдельным приложением и не видит app.state.redis
+redis = asyncredis.from_url(str(conf.redis.url))
+tile_cache = MarkTileCache(redis)
+cell_cache = MarkCellCache(redis)
+
 
 class AdminMark(ModelView):
     fields = [
@@ -84,11 +93,25 @@ class AdminMark(ModelView):
         notify_service = get_mark_notification_service(mark_repo, geo_service)
         await notify_service.notify_mark_action(mark, action_type, request)
 
+    @staticmethod
+    async def invalidate_caches(mark: Mark) -> None:
+        if mark.geom is None:
+            return
+        points = [get_geo_service().get_lat_lon(mark.geom)]
+        await tile_cache.invalidate(points)
+        await cell_cache.invalidate(points)
+
     async def after_create(self, request: Request, obj: Mark) -> None:
+        mark_index_sync.schedule(IndexAction.UPSERT, [obj.id])
+        await self.invalidate_caches(obj)
         await self.send_notify_mark_action(request, obj, ActionType.CREATE.value)
 
     async def after_edit(self, request: Request, obj: Mark) -> None:
+        mark_index_sync.schedule(IndexAction.UPSERT, [obj.id])
+        await self.invalidate_caches(obj)
         await self.send_notify_mark_action(request, obj, ActionType.UPDATE.value)
 
     async def after_delete(self, request: Request, obj: Any) -> None:
+        mark_index_sync.schedule(IndexAction.REMOVE, [obj.id])
+        await self.invalidate_caches(obj)
         await self.send_notify_mark_action(request, obj, ActionType.DELETE.value)
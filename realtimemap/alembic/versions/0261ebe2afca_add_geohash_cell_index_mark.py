@@ -0,0 +1,38 @@
+"""add geohash cell index in Mark
+
+Revision ID: 0261ebe2afca
+Revises: 27a09b6389c3
+Create Date: 2026-10-18 17:25:03.114870
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0261ebe2afca"
+down_revision: Union[str, None] = "27a09b6389c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_marks_active_geohash_cell",
+        "marks",
+        [sa.text("left(geohash, 5)")],
+        unique=False,
+        postgresql_where=sa.text("is_ended = false"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "idx_marks_active_geohash_cell",
+        table_name="marks",
+        postgresql_where=sa.text("is_ended = false"),
+    )
@@ -0,0 +1,116 @@
+"""add mark cell stats
+
+Revision ID: 27a09b6389c3
+Revises: 363d8f37aa72
+Create Date: 2026-10-18 16:40:12.518203
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "27a09b6389c3"
+down_revision: Union[str, None] = "363d8f37aa72"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MARK_CELL_STATS_FUNCTION = """
+CREATE OR REPLACE FUNCTION mark_cell_stats_apply(
+    p_geohash varchar, p_category_id integer, p_geom geometry, p_sign integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO mark_cell_stats (
+        cell, category_id, marks_count, latitude_sum, longitude_sum
+    )
+    SELECT left(p_geohash, prefix_len), p_category_id, p_sign,
+           p_sign * ST_Y(p_geom), p_sign * ST_X(p_geom)
+    FROM generate_series(1, 6) AS prefix_len
+    ON CONFLICT (cell, category_id) DO UPDATE SET
+        marks_count = mark_cell_stats.marks_count + EXCLUDED.marks_count,
+        latitude_sum = mark_cell_stats.latitude_sum + EXCLUDED.latitude_sum,
+        longitude_sum = mark_cell_stats.longitude_sum + EXCLUDED.longitude_sum;
+
+    IF p_sign < 0 THEN
+        DELETE FROM mark_cell_stats
+        WHERE category_id = p_category_id
+          AND cell = ANY (
+              SELECT left(p_geohash, prefix_len)
+              FROM generate_series(1, 6) AS prefix_len
+          )
+          AND marks_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION marks_cell_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF NOT OLD.is_ended THEN
+            PERFORM mark_cell_stats_apply(OLD.geohash, OLD.category_id, OLD.geom, -1);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NOT NEW.is_ended THEN
+            PERFORM mark_cell_stats_apply(NEW.geohash, NEW.category_id, NEW.geom, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_CELL_STATS_TRIGGER = """
+CREATE TRIGGER marks_cell_stats
+AFTER INSERT OR DELETE OR UPDATE OF geom, geohash, category_id, is_ended ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_cell_stats_trigger();
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "mark_cell_stats",
+        sa.Column("cell", sa.String(length=6), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("marks_count", sa.Integer(), nullable=False),
+        sa.Column("latitude_sum", sa.Float(), nullable=False),
+        sa.Column("longitude_sum", sa.Float(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["category_id"],
+            ["categories.id"],
+            name=op.f("fk_mark_cell_stats_category_id_categories"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_mark_cell_stats")),
+        sa.UniqueConstraint("cell", "category_id", name="uq_mark_cell_stat_category"),
+    )
+    op.execute(MARK_CELL_STATS_FUNCTION)
+    op.execute(MARK_CELL_STATS_TRIGGER)
+    # Заполнение статистики по уже существующим активным меткам
+    op.execute(
+        """
+        INSERT INTO mark_cell_stats (
+            cell, category_id, marks_count, latitude_sum, longitude_sum
+        )
+        SELECT left(geohash, prefix_len), category_id, count(*),
+               sum(ST_Y(geom)), sum(ST_X(geom))
+        FROM marks, generate_series(1, 6) AS prefix_len
+        WHERE NOT is_ended
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS marks_cell_stats ON marks")
+    op.execute("DROP FUNCTION IF EXISTS marks_cell_stats_trigger()")
+    op.execute(
+        "DROP FUNCTION IF EXISTS "
+        "mark_cell_stats_apply(varchar, integer, geometry, integer)"
+    )
+    op.drop_table("mark_cell_stats")
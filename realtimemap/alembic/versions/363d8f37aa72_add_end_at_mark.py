@@ -0,0 +1,50 @@
+"""add end_at in Mark
+
+Revision ID: 363d8f37aa72
+Revises: cc6e1eb7afc6
+Create Date: 2026-10-18 15:12:26.904417
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "363d8f37aa72"
+down_revision: Union[str, None] = "cc6e1eb7afc6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "marks",
+        sa.Column(
+            "end_at",
+            sa.DateTime(),
+            sa.Computed("start_at + duration * interval '1 hour'", persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "idx_marks_active_geography_time",
+        "marks",
+        [sa.text("geography(geom)"), sa.text("tsrange(start_at, end_at)")],
+        unique=False,
+        postgresql_using="gist",
+        postgresql_where=sa.text("is_ended = false"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "idx_marks_active_geography_time",
+        table_name="marks",
+        postgresql_using="gist",
+        postgresql_where=sa.text("is_ended = false"),
+    )
+    op.drop_column("marks", "end_at")
@@ -0,0 +1,122 @@
+"""add mark change version and tombstones
+
+Revision ID: 7442ef80ae7e
+Revises: 0261ebe2afca
+Create Date: 2026-10-18 18:02:41.305117
+
+"""
+
+from typing import Sequence, Union
+
+import geoalchemy2
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7442ef80ae7e"
+down_revision: Union[str, None] = "0261ebe2afca"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MARK_TOMBSTONE_FUNCTION = """
+CREATE OR REPLACE FUNCTION marks_tombstone_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR NOT ST_Equals(OLD.geom, NEW.geom) THEN
+        INSERT INTO mark_tombstones (mark_id, geom, geohash)
+        VALUES (OLD.id, OLD.geom, OLD.geohash);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_TOMBSTONE_TRIGGER = """
+CREATE TRIGGER marks_tombstone
+AFTER DELETE OR UPDATE OF geom ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_tombstone_trigger();
+"""
+
+MARK_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION marks_version_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.version := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_VERSION_TRIGGER = """
+CREATE TRIGGER marks_version
+BEFORE UPDATE ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_version_trigger();
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "marks",
+        sa.Column(
+            "version",
+            sa.BigInteger(),
+            server_default=sa.text("(pg_current_xact_id()::text::bigint)"),
+            nullable=False,
+        ),
+    )
+    op.create_index("idx_marks_version", "marks", ["version"], unique=False)
+    op.create_table(
+        "mark_tombstones",
+        sa.Column("mark_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "geom",
+            geoalchemy2.types.Geometry(
+                geometry_type="POINT",
+                srid=4326,
+                spatial_index=False,
+                from_text="ST_GeomFromEWKT",
+                name="geometry",
+                nullable=False,
+            ),
+            nullable=False,
+        ),
+        sa.Column("geohash", sa.String(length=64), nullable=False),
+        sa.Column(
+            "version",
+            sa.BigInteger(),
+            server_default=sa.text("(pg_current_xact_id()::text::bigint)"),
+            nullable=False,
+        ),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_mark_tombstones")),
+    )
+    op.create_index(
+        "idx_mark_tombstones_geom",
+        "mark_tombstones",
+        ["geom"],
+        unique=False,
+        postgresql_using="gist",
+    )
+    op.create_index(
+        "idx_mark_tombstones_version", "mark_tombstones", ["version"], unique=False
+    )
+    op.execute(MARK_TOMBSTONE_FUNCTION)
+    op.execute(MARK_TOMBSTONE_TRIGGER)
+    op.execute(MARK_VERSION_FUNCTION)
+    op.execute(MARK_VERSION_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS marks_version ON marks")
+    op.execute("DROP FUNCTION IF EXISTS marks_version_trigger()")
+    op.execute("DROP TRIGGER IF EXISTS marks_tombstone ON marks")
+    op.execute("DROP FUNCTION IF EXISTS marks_tombstone_trigger()")
+    op.drop_index("idx_mark_tombstones_version", table_name="mark_tombstones")
+    op.drop_index(
+        "idx_mark_tombstones_geom",
+        table_name="mark_tombstones",
+        postgresql_using="gist",
+    )
+    op.drop_table("mark_tombstones")
+    op.drop_index("idx_marks_version", table_name="marks")
+    op.drop_column("marks", "version")
@@ -0,0 +1,28 @@
+"""upd Mark geohash precision
+
+Revision ID: cc6e1eb7afc6
+Revises: e4fac9e6dce1
+Create Date: 2026-10-18 13:41:07.552190
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "cc6e1eb7afc6"
+down_revision: Union[str, None] = "e4fac9e6dce1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Геохэш хранится с точностью 9, покрытие круга выбирает префикс нужной длины
+    op.execute("UPDATE marks SET geohash = ST_GeoHash(geom, 9)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE marks SET geohash = ST_GeoHash(geom, 5)")
@@ -0,0 +1,36 @@
+"""add geography index in Mark
+
+Revision ID: e4fac9e6dce1
+Revises: f1ca736741e8
+Create Date: 2026-10-18 12:04:51.218334
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e4fac9e6dce1"
+down_revision: Union[str, None] = "f1ca736741e8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_marks_geom_geography",
+        "marks",
+        [sa.text("geography(geom)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "idx_marks_geom_geography", table_name="marks", postgresql_using="gist"
+    )
@@ -1,33 +1,54 @@
 import logging
-from typing import List, TYPE_CHECKING
+from typing import List, Optional, TYPE_CHECKING, Union
 
 from fastapi import (
     APIRouter,
     Depends,
     Form,
     BackgroundTasks,
+    Query,
     Request,
     Response,
 )
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi_cache.decorator import cache
 
-from api.v1.auth.fastapi_users import Annotated, get_current_user_without_ban
+from api.v1.auth.fastapi_users import (
+    Annotated,
+    current_active_superuser,
+    get_current_user_without_ban,
+)
 from dependencies.notification import (
     get_mark_notification_service,
 )
+from errors.http2 import ValidationError
 from modules.events.bus import event_bus, DomainEvent, EventType
+from modules.mark.cache import MAX_TILE_ZOOM, MarkTileCache
 from modules.mark.dependencies import get_mark_service
 from modules.mark.schemas import (
     CreateMarkRequest,
     ReadMark,
     MarkRequestParams,
+    MarkBBoxParams,
+    MarkClusterParams,
+    MarkExportParams,
+    ReadMarkCluster,
+    ReadMarkChanges,
     DetailMark,
     UpdateMarkRequest,
     ActionType,
 )
 from modules.mark.schemas import allowed_duration
 from modules.mark.service import MarkService
+from modules.mark.export import (
+    EXPORT_MEDIA_TYPES,
+    GZIP_MEDIA_TYPE,
+    get_export_filename,
+    stream_marks_export,
+)
+from modules.mark.stream import NDJSON_MEDIA_TYPE, stream_marks_ndjson
 from modules.notification import MarkNotificationService
+from utils.url_generator import get_media_url
 
 if TYPE_CHECKING:
     from modules import User
@@ -36,6 +57,8 @@ router = APIRouter(prefix="/marks", tags=["Marks"])
 
 logger = logging.getLogger(__name__)
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 mark_service = Annotated[MarkService, Depends(get_mark_service)]
 
 mark_notification_service = Annotated[
@@ -43,7 +66,17 @@ mark_notification_service = Annotated[
 ]
 
 
-@router.get("/", response_model=List[ReadMark], status_code=200)
+@router.get(
+    "/",
+    response_model=List[ReadMark],
+    status_code=200,
+    responses={
+        200: {
+            "description": "JSON list or NDJSON stream (Accept: application/x-ndjson)",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        }
+    },
+)
 async def get_marks(
     request: Request,
     service: mark_service,
@@ -51,11 +84,175 @@ async def get_marks(
 ):
     """
     Endpoint for getting all marks in radius, filtered by params.
+    Marks are already serialized by ReadMark, so response validation is skipped.
+    Marks are ordered nearest first, page size is capped by the server.
+    Cursor of the next page is returned in X-Next-Cursor header.
+    With Accept: application/x-ndjson marks are streamed one per line
+    through a server-side cursor.
+    """
+    return await get_marks_response(request, service, params)
+
+
+@router.get(
+    "/bbox/",
+    response_model=List[ReadMark],
+    status_code=200,
+    responses={
+        200: {
+            "description": "JSON list or NDJSON stream (Accept: application/x-ndjson)",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        }
+    },
+)
+async def get_marks_in_bbox(
+    request: Request,
+    service: mark_service,
+    params: MarkBBoxParams = Depends(),
+):
+    """
+    Endpoint for getting marks inside map viewport (bounding box).
+    Response is the same as for marks in radius,
+    marks are ordered by distance to the viewport center.
+    """
+    return await get_marks_response(request, service, params)
+
+
+@router.get("/changes/", response_model=ReadMarkChanges, status_code=200)
+async def get_marks_changes(
+    service: mark_service,
+    params: MarkRequestParams = Depends(),
+    since: Annotated[
+        Optional[int], Query(ge=0, description="Version from previous response")
+    ] = None,
+):
     """
-    result = await service.get_marks(params)
-    return [
-        ReadMark.model_validate(mark, context={"request": request}) for mark in result
-    ]
+    Endpoint for delta sync: marks in radius changed since client version.
+    Without since only current version is returned, so client
+    loads the area once and then polls with the version.
+    """
+    return ORJSONResponse(content=await service.get_changes(params, since))
+
+
+@router.get("/bbox/changes/", response_model=ReadMarkChanges, status_code=200)
+async def get_marks_in_bbox_changes(
+    service: mark_service,
+    params: MarkBBoxParams = Depends(),
+    since: Annotated[
+        Optional[int], Query(ge=0, description="Version from previous response")
+    ] = None,
+):
+    """
+    Endpoint for delta sync of marks inside map viewport.
+    """
+    return ORJSONResponse(content=await service.get_changes(params, since))
+
+
+@router.get(
+    "/export/",
+    status_code=200,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                EXPORT_MEDIA_TYPES["geojson"]: {},
+                EXPORT_MEDIA_TYPES["csv"]: {},
+                GZIP_MEDIA_TYPE: {},
+            }
+        }
+    },
+)
+async def export_marks(
+    _: Annotated["User", Depends(current_active_superuser)],
+    params: MarkExportParams = Depends(),
+):
+    """
+    Endpoint for streaming export of marks as GeoJSON or CSV file.
+    Marks are read by server-side cursor and written incrementally.
+    """
+    media_type = GZIP_MEDIA_TYPE if params.gzip else EXPORT_MEDIA_TYPES[params.format]
+    return StreamingResponse(
+        stream_marks_export(params),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{get_export_filename(params)}"'
+            )
+        },
+    )
+
+
+@router.post("/export/", status_code=202)
+async def create_marks_export(
+    _: Annotated["User", Depends(current_active_superuser)],
+    params: MarkExportParams,
+):
+    """
+    Endpoint for export of marks to file in background Celery task.
+    """
+    from tasks import export_marks as export_marks_task
+
+    task = export_marks_task.delay(params.model_dump(mode="json"))
+    return {"task_id": task.id}
+
+
+async def get_marks_response(
+    request: Request,
+    service: MarkService,
+    params: Union[MarkRequestParams, MarkBBoxParams],
+) -> Response:
+    media_url = get_media_url(request)
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(
+            stream_marks_ndjson(params, service.geo_service, media_url),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    result, next_cursor = await service.get_marks_data(params, media_url)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return ORJSONResponse(content=result, headers=headers)
+
+
+@router.get("/clusters/", response_model=List[ReadMarkCluster], status_code=200)
+async def get_mark_clusters(
+    service: mark_service,
+    params: MarkClusterParams = Depends(),
+):
+    """
+    Endpoint for getting clusters of active marks in bounding box for zoomed-out map.
+    """
+    result = await service.get_clusters(params)
+    return [ReadMarkCluster.model_validate(cluster) for cluster in result]
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}.mvt",
+    status_code=200,
+    response_class=Response,
+    responses={
+        200: {"content": {"application/vnd.mapbox-vector-tile": {}}},
+    },
+)
+async def get_marks_tile(z: int, x: int, y: int, service: mark_service):
+    """
+    Endpoint for getting active marks as Mapbox Vector Tile.
+    """
+    if not 0 <= z <= MAX_TILE_ZOOM:
+        raise ValidationError(
+            field="z", user_input=z, input_type="number", detail="Zoom out of range"
+        )
+    if not (0 <= x < 1 << z and 0 <= y < 1 << z):
+        raise ValidationError(
+            field="x,y",
+            user_input=f"{x},{y}",
+            input_type="number",
+            detail="Tile out of range",
+        )
+    tile = await service.get_tile(z, x, y)
+    max_age = MarkTileCache.get_ttl(MarkTileCache.get_bucket())
+    return Response(
+        content=tile,
+        media_type="application/vnd.mapbox-vector-tile",
+        headers={"Cache-Control": f"public, max-age={max_age}"},
+    )
 
 
 @router.post(
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from core.config import conf
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_CHANNEL: str = f"{conf.redis.prefix}:token-cache"
+
+
+class TokenUserCache:
+    """
+    In-process LRU of access token -> user id with expiration.
+    Shared by HTTP auth (CachedDatabaseStrategy) and socket.io handshakes,
+    so a valid token is read from the database once per ttl.
+    An entry never outlives the token itself.
+    Destroyed tokens are evicted on every worker through Redis pub/sub.
+    """
+
+    def __init__(
+        self,
+        ttl: int = conf.api.v1.auth.token_cache_seconds,
+        maxsize: int = conf.api.v1.auth.token_cache_size,
+        channel: str = TOKEN_CACHE_CHANNEL,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.channel = channel
+        self.redis: Optional["Redis"] = None
+        self._listener: Optional[asyncio.Task] = None
+        # токен -> (id пользователя, время истечения)
+        self._items: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+
+    async def start(self, redis: "Redis") -> None:
+        self.redis = redis
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self.redis = None
+        self.clear()
+
+    def get(self, token: str) -> Optional[int]:
+        item = self._items.get(token)
+        if item is None:
+            return None
+        user_id, expires_at = item
+        if expires_at <= time.time():
+            del self._items[token]
+            return None
+        self._items.move_to_end(token)
+        return user_id
+
+    def set(
+        self, token: str, user_id: int, token_expires_at: Optional[datetime] = None
+    ) -> None:
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at.timestamp())
+        self._items[token] = (user_id, expires_at)
+        self._items.move_to_end(token)
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._items.pop(token, None)
+
+    async def invalidate(self, token: str) -> None:
+        """
+        Evict token in this worker and publish it to the others
+        """
+        self.discard(token)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(self.channel, token)
+        except Exception as e:
+            logger.error(f"Error on publish destroyed token: {e}")
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                data = message["data"]
+                self.discard(data.decode() if isinstance(data, bytes) else data)
+        finally:
+            await pubsub.reset()
+
+
+token_user_cache = TokenUserCache()
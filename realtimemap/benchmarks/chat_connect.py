@@ -0,0 +1,120 @@
+"""
+Рукопожатия namespace /chat в секунду при шторме переподключений.
+БД имитируется пулом из POOL_SIZE соединений и задержкой QUERY_MS на запрос.
+
+before: токен и пользователь в одной сессии (2 запроса), id чатов во второй
+сессии (запрос с join), enter_room с await для каждого чата.
+after: токен из TokenUserCache (запрос только при промахе), id чатов одним
+запросом в той же сессии, enter_rooms одним проходом менеджера.
+cold - кэш пуст (первые подключения после деплоя), warm - токены уже в кэше
+после HTTP запросов или прошлого подключения к этому воркеру.
+
+Запуск: python -m benchmarks.chat_connect
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import socketio
+
+from auth.token_cache import TokenUserCache
+from dependencies.auth.strategy import CachedDatabaseStrategy
+from socket_io.utils import enter_rooms
+
+CLIENTS = [100, 1_000, 5_000]
+USERS = 500
+CHATS_PER_USER = 20
+POOL_SIZE = 10
+QUERY_MS = 1.0
+NAMESPACE = "/chat"
+
+
+class Database:
+    """
+    Pool of connections, every query holds a connection for QUERY_MS
+    """
+
+    def __init__(self):
+        self.pool = asyncio.Semaphore(POOL_SIZE)
+        self.queries = 0
+
+    async def query(self, result=None):
+        async with self.pool:
+            self.queries += 1
+            await asyncio.sleep(QUERY_MS / 1000)
+        return result
+
+
+class AccessTokenDatabase:
+    def __init__(self, db: Database):
+        self.db = db
+
+    async def get_by_token(self, token, max_age=None):
+        user_id = int(token.split("-")[1])
+        return await self.db.query(SimpleNamespace(user_id=user_id))
+
+
+def make_manager() -> socketio.AsyncManager:
+    server = socketio.AsyncServer(async_mode="asgi")
+    server.manager.initialize()
+    return server.manager
+
+
+async def connect(manager, index: int) -> str:
+    sid = manager.connect(f"eio-{index}", NAMESPACE)
+    if asyncio.iscoroutine(sid):
+        sid = await sid
+    return sid
+
+
+def chat_ids(user_id: int) -> list:
+    return [user_id * CHATS_PER_USER + i for i in range(CHATS_PER_USER)]
+
+
+async def handshake_before(db, manager, strategy, index: int) -> None:
+    user_id = index % USERS
+    await db.query()  # access token
+    await db.query()  # user
+    chats = await db.query(chat_ids(user_id))
+    sid = await connect(manager, index)
+    for chat_id in chats:
+        await manager.enter_room(sid, NAMESPACE, str(chat_id))
+
+
+async def handshake_after(db, manager, strategy, index: int) -> None:
+    user_id = await strategy.read_token_user_id(f"token-{index % USERS}")
+    chats = await db.query(chat_ids(user_id))
+    sid = await connect(manager, index)
+    enter_rooms(manager, sid, NAMESPACE, [str(chat_id) for chat_id in chats])
+
+
+async def measure(clients: int, handshake, warm: bool = False) -> tuple:
+    db = Database()
+    manager = make_manager()
+    cache = TokenUserCache(ttl=60)
+    if warm:
+        for user_id in range(USERS):
+            cache.set(f"token-{user_id}", user_id)
+    strategy = CachedDatabaseStrategy(AccessTokenDatabase(db), cache=cache)
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(handshake(db, manager, strategy, index) for index in range(clients))
+    )
+    return clients / (time.perf_counter() - start), db.queries
+
+
+async def main() -> None:
+    print(f"{'clients':>8} | {'variant':>7} | {'connects/s':>10} | {'queries':>7}")
+    for clients in CLIENTS:
+        for name, handshake, warm in [
+            ("before", handshake_before, False),
+            ("cold", handshake_after, False),
+            ("warm", handshake_after, True),
+        ]:
+            rate, queries = await measure(clients, handshake, warm)
+            print(f"{clients:>8} | {name:>7} | {rate:>10.0f} | {queries:>7}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Сравнение геохэш-префильтра меток: точность 5 + 8 соседей против покрытия круга.
+
+Запуск: python -m benchmarks.geohash_cover
+
+scanned - сколько меток проходит префильтр (столько строк проверяет ST_DWithin),
+matched - сколько из них действительно в радиусе,
+missed - сколько меток в радиусе префильтр потерял.
+"""
+
+import random
+import time
+from math import cos, radians
+
+from modules.geo_service import GeoService
+from modules.mark.schemas import Coordinates
+
+CENTER = Coordinates(latitude=55.7558, longitude=37.6173)
+MARKS_COUNT = 200_000
+AREA_METERS = 60_000
+RADII = [50, 200, 1000, 5000, 10000, 25000]
+
+
+def generate_marks(geo_service: GeoService, count: int) -> list:
+    lat_delta = AREA_METERS / 111320.0
+    lon_delta = AREA_METERS / (111320.0 * cos(radians(CENTER.latitude)))
+    marks = []
+    for _ in range(count):
+        coords = Coordinates(
+            latitude=CENTER.latitude + random.uniform(-lat_delta, lat_delta),
+            longitude=CENTER.longitude + random.uniform(-lon_delta, lon_delta),
+        )
+        marks.append((coords, geo_service.get_geohash(coords)))
+    return marks
+
+
+def main() -> None:
+    random.seed(42)
+    geo_service = GeoService()
+    marks = generate_marks(geo_service, MARKS_COUNT)
+
+    print(
+        f"{'radius':>8} | {'mode':>6} | {'cells':>5} | {'scanned':>8} | "
+        f"{'matched':>8} | {'missed':>6} | {'ms':>7}"
+    )
+    for radius in RADII:
+        in_radius = {
+            i
+            for i, (coords, _) in enumerate(marks)
+            if geo_service.distance(
+                CENTER.latitude, CENTER.longitude, coords.latitude, coords.longitude
+            )
+            <= radius
+        }
+
+        old_cells = geo_service.get_neighbors(
+            geo_service.get_geohash(CENTER, 5), need_include=True
+        )
+        start = time.perf_counter()
+        new_cells = geo_service.cover_cells(CENTER, radius)
+        cover_ms = (time.perf_counter() - start) * 1000
+
+        for mode, cells, elapsed in (
+            ("before", old_cells, 0.0),
+            ("after", new_cells, cover_ms),
+        ):
+            scanned = {
+                i
+                for i, (_, geohash) in enumerate(marks)
+                if geo_service.is_in_cells(geohash, cells)
+            }
+            print(
+                f"{radius:>8} | {mode:>6} | {len(cells):>5} | {len(scanned):>8} | "
+                f"{len(scanned & in_radius):>8} | {len(in_radius - scanned):>6} | "
+                f"{elapsed:>7.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
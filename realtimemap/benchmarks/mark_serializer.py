@@ -0,0 +1,103 @@
+"""
+Сериализация списка меток: ReadMark (shapely + pydantic на каждую строку)
+против MarkListSerializer (колонки ST_X/ST_Y + один orjson.dumps).
+
+Запуск: python -m benchmarks.mark_serializer
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from modules import Category, Mark
+from modules.mark.schemas import ReadMark
+from modules.mark.serializer import MarkListSerializer, MarkRow
+
+MARKS_COUNT = 5_000
+CATEGORIES_COUNT = 10
+ROUNDS = 5
+
+
+def generate_marks(count: int) -> list:
+    categories = [
+        Category(
+            id=i,
+            category_name=f"Category {i}",
+            color="#ff0000",
+            icon=SimpleNamespace(path=f"category/{i}", upload_storage="category"),
+            is_active=True,
+        )
+        for i in range(CATEGORIES_COUNT)
+    ]
+    result = []
+    for i in range(count):
+        latitude = 55.7558 + random.uniform(-0.5, 0.5)
+        longitude = 37.6173 + random.uniform(-0.5, 0.5)
+        start_at = datetime.now()
+        mark = Mark(
+            id=i,
+            mark_name=f"Mark {i}",
+            geom=from_shape(Point(longitude, latitude), 4326),
+            geohash="ucfv0n6rf",
+            start_at=start_at,
+            duration=12,
+            end_at=start_at + timedelta(hours=12),
+            is_ended=False,
+            owner_id=1,
+            category=random.choice(categories),
+            additional_info="info",
+            photo=[SimpleNamespace(path=f"marks/{i}", upload_storage="marks")],
+        )
+        row = MarkRow(
+            id=mark.id,
+            mark_name=mark.mark_name,
+            owner_id=mark.owner_id,
+            additional_info=mark.additional_info,
+            photo=mark.photo,
+            latitude=latitude,
+            longitude=longitude,
+            start_at=mark.start_at,
+            end_at=mark.end_at,
+            is_ended=mark.is_ended,
+            geohash=mark.geohash,
+            category=mark.category,
+        )
+        result.append((mark, row))
+    return result
+
+
+def measure(func) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    random.seed(42)
+    data = generate_marks(MARKS_COUNT)
+    marks = [mark for mark, _ in data]
+    rows = [row for _, row in data]
+
+    before = measure(
+        lambda: orjson.dumps(
+            [ReadMark.model_validate(mark).model_dump(mode="json") for mark in marks]
+        )
+    )
+    after = measure(lambda: MarkListSerializer().dumps(rows))
+
+    print(f"{'mode':>7} | {'marks':>6} | {'ms':>8}")
+    print(f"{'ReadMark':>7} | {MARKS_COUNT:>6} | {before:>8.2f}")
+    print(f"{'columns':>7} | {MARKS_COUNT:>6} | {after:>8.2f}")
+    print(f"speedup: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
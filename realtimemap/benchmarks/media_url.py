@@ -0,0 +1,110 @@
+"""
+URL фотографий в списке ReadMark с request в контексте:
+request.url_for на каждое фото против префикса, вычисленного один раз
+на запрос (utils.url_generator.get_media_url).
+
+Запуск: python -m benchmarks.media_url
+"""
+
+import random
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from starlette.requests import Request
+
+from benchmarks.mark_serializer import generate_marks, measure
+from modules.mark.schemas import ReadMark
+from utils.url_generator import generate_full_image_url
+
+MARKS_COUNT = 2_000
+PHOTOS_PER_MARK = 3
+
+app = FastAPI()
+
+
+# Маршрут перед get_file: url_for перебирает роутер по порядку
+@app.get("/api/v1/marks/{mark_id}")
+def get_mark(mark_id: int): ...
+
+
+@app.get("/media/{storage}/{file_id}", name="get_file")
+def get_file(storage: str, file_id: str): ...
+
+
+def make_request() -> Request:
+    # Новый scope на каждый прогон: префикс вычисляется заново, как в приложении
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "router": app.router,
+            "method": "GET",
+            "scheme": "http",
+            "server": ("localhost", 8000),
+            "path": "/api/v1/marks/",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"localhost:8000")],
+        }
+    )
+
+
+def url_for_per_photo(photos: list, request: Request) -> list:
+    # Прежняя реализация generate_full_image_url
+    return [
+        str(
+            request.url_for(
+                "get_file", storage=photo.upload_storage, file_id=photo.file_id
+            )
+        )
+        for photo in photos
+        if photo
+    ]
+
+
+def main() -> None:
+    random.seed(42)
+    marks = [mark for mark, _ in generate_marks(MARKS_COUNT)]
+    for mark in marks:
+        mark.photo = [
+            SimpleNamespace(
+                path=f"marks/{mark.id}-{i}",
+                file_id=f"{mark.id}-{i}",
+                upload_storage="marks",
+            )
+            for i in range(PHOTOS_PER_MARK)
+        ]
+    photos = [mark.photo for mark in marks]
+
+    def prefix_once() -> None:
+        info = SimpleNamespace(context={"request": make_request()})
+        for items in photos:
+            generate_full_image_url(items, info)
+
+    def url_for() -> None:
+        request = make_request()
+        for items in photos:
+            url_for_per_photo(items, request)
+
+    def read_marks() -> None:
+        context = {"request": make_request()}
+        for mark in marks:
+            ReadMark.model_validate(mark, context=context).model_dump(mode="json")
+
+    before = measure(url_for)
+    after = measure(prefix_once)
+    total = measure(read_marks)
+
+    count = MARKS_COUNT * PHOTOS_PER_MARK
+    assert url_for_per_photo(photos[0], make_request()) == generate_full_image_url(
+        photos[0], SimpleNamespace(context={"request": make_request()})
+    )
+    print(f"{'mode':>10} | {'photos':>6} | {'ms':>8}")
+    print(f"{'url_for':>10} | {count:>6} | {before:>8.2f}")
+    print(f"{'prefix':>10} | {count:>6} | {after:>8.2f}")
+    print(f"speedup: x{before / after:.1f}")
+    print(f"ReadMark list of {MARKS_COUNT} marks with request: {total:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
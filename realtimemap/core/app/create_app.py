@@ -5,8 +5,6 @@ import sys
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 from fastapi_pagination import add_pagination
-from libcloud.storage.drivers.local import LocalStorageDriver
-from sqlalchemy_file.storage import StorageManager
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.staticfiles import StaticFiles
@@ -15,6 +13,7 @@ from admin import setup_admin
 from api.v1 import router as v1_router
 from core.config import conf
 from middleware import ProcessTimeMiddleware
+from utils.storage import setup_file_storage
 from .exception_handler import register_exception_handler
 from .lifespan import lifespan
 from .socket import sio_app
@@ -69,25 +68,6 @@ def mount_socket_io(app: FastAPI) -> None:
     app.mount("/socket.io", app=sio_app)
 
 
-# Настройка структуры для хранения медиа файлов пользователей (Можно интегрировать удаленное хранилище. См доку по sqlalchemy-file)
-def setup_file_storage():
-    os.makedirs("static", exist_ok=True)
-    os.makedirs("uploads/default", exist_ok=True)
-    os.makedirs("uploads/marks", exist_ok=True)
-    os.makedirs("uploads/users", exist_ok=True)
-    os.makedirs("uploads/category", exist_ok=True)
-
-    default_container = LocalStorageDriver("uploads").get_container("default")
-    category_container = LocalStorageDriver("uploads").get_container("category")
-    mark_container = LocalStorageDriver("uploads").get_container("marks")
-    users_container = LocalStorageDriver("uploads").get_container("users")
-
-    StorageManager.add_storage("default", default_container)
-    StorageManager.add_storage("category", category_container)
-    StorageManager.add_storage("marks", mark_container)
-    StorageManager.add_storage("users", users_container)
-
-
 # Создание настроенного класса приложения
 def create_app() -> FastAPI:
     setup_file_storage()
@@ -110,5 +90,6 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     return app
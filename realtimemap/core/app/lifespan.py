@@ -7,12 +7,16 @@ from fastapi_limiter import FastAPILimiter
 from redis import asyncio as asyncredis
 from yookassa import Configuration
 
+from auth.token_cache import token_user_cache
 from core.config import conf
 from database.helper import db_helper
 from integrations.payment.yookassa import YookassaClient
 from modules.events.bus import EventType, event_bus
 from modules.events.gamefication_handler import GameFicationEventHandler
+from modules.mark.index import mark_index_sync
+from modules.notification.dispatcher import get_notification_dispatcher
 from utils.cache import OrJsonEncoder, custom_key_builder
+from .socket import sio
 from .templating import TemplateManager
 
 
@@ -21,6 +25,7 @@ async def lifespan(app: FastAPI):
     redis = asyncredis.from_url(str(conf.redis.url))
     await FastAPILimiter.init(redis=redis)
     app.state.redis = redis
+    await token_user_cache.start(redis)
     app.state.templates = TemplateManager(conf.template_dir)
     FastAPICache.init(
         RedisBackend(redis),
@@ -37,6 +42,13 @@ async def lifespan(app: FastAPI):
         EventType.MARK_CREATE,
     ]:
         event_bus.subscribe(event_type, gamefication_handler.handle_exp_event)
+    if conf.mark.repository == "memory":
+        await mark_index_sync.start(db_helper.session_factory, redis)
+    dispatcher = get_notification_dispatcher(sio)
+    dispatcher.start_metrics_log(conf.socket.dispatcher_metrics_interval)
     yield
+    dispatcher.stop_metrics_log()
+    await mark_index_sync.stop()
+    await token_user_cache.stop()
     await FastAPILimiter.close()
     await db_helper.dispose()
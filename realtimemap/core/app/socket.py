@@ -1,6 +1,8 @@
 import socketio
 
 from core.config import conf
+from modules.notification.marks_notification import register_mark_event_handler
+from socket_io.manager import get_client_manager
 from socket_io.namespace.chat_namespace import ChatNamespace
 from socket_io.namespace.mark_namespace import MarksNamespace
 from socket_io.namespace.user_count_namespace import UserCountNamespace
@@ -8,8 +10,11 @@ from socket_io.namespace.user_count_namespace import UserCountNamespace
 sio = socketio.AsyncServer(
     async_mode="asgi",
     cors_allowed_origins=[],
-    client_manager=socketio.AsyncManager(),
+    # Redis pub/sub: события доходят до клиентов всех воркеров gunicorn
+    client_manager=get_client_manager(),
 )
+# Каждый воркер выбирает получателей событий меток среди своих клиентов
+register_mark_event_handler(sio)
 sio_app = socketio.ASGIApp(socketio_server=sio)
 sio.instrument(
     auth={
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import Generic, Any, Optional, Union, List, Dict
+from typing import Generic, Any, Optional, Union, List, Dict, Callable, Awaitable
 
 from database.adapter import BaseAdapter
 from my_type import CreateSchema, UpdateSchema, Model
@@ -40,3 +40,7 @@ class BaseRepository(IBaseRepository[Model, CreateSchema, UpdateSchema]):
 
     async def exist(self, record_id: Any) -> bool:
         return await self.adapter.exist(record_id)
+
+    def on_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """Run coroutine after the next commit of the adapter session"""
+        self.adapter.on_commit(callback)
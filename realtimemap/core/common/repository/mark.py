@@ -1,5 +1,6 @@
 from abc import abstractmethod, ABC
-from typing import TYPE_CHECKING, List
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Any, AsyncIterator, Optional
 
 from modules.mark.model import Mark
 from modules.mark.schemas import CreateMark, UpdateMark
@@ -7,6 +8,8 @@ from .base import BaseRepository
 
 if TYPE_CHECKING:
     from modules.mark.filters import MarkFilter
+    from modules.mark.schemas import MarkExportParams
+    from modules.mark.serializer import MarkRow
 
 
 class MarkRepository(BaseRepository[Mark, CreateMark, UpdateMark], ABC):
@@ -36,3 +39,108 @@ class MarkRepository(BaseRepository[Mark, CreateMark, UpdateMark], ABC):
     @abstractmethod
     async def update_mark(self, mark_id: int, update_data: UpdateMark) -> Mark:
         raise NotImplementedError
+
+    @abstractmethod
+    async def get_tile(
+        self, z: int, x: int, y: int, start: datetime, end: datetime
+    ) -> bytes:
+        """
+        Метод получения векторного тайла (MVT) с активными метками
+        :param z: Уровень масштаба
+        :param x: Колонка тайла
+        :param y: Строка тайла
+        :param start: Начало временного окна
+        :param end: Конец временного окна
+        :return: Тайл в формате Mapbox Vector Tile
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_clusters(self, cells: List[str]) -> List[Any]:
+        """
+        Метод получения кластеров активных меток по ячейкам геохэша
+        :param cells: Ячейки одной точности
+        :return: Строки (cell, count, latitude, longitude, category_id)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_marks_rows(self, filters: "MarkFilter") -> List["MarkRow"]:
+        """
+        То же, что get_marks, но возвращает колонки для MarkListSerializer
+        :param filters: Фильтры поиска
+        :return: Строки MarkRow
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_marks_rows(
+        self, filters: "MarkFilter", size: int = 1000, max_rows: Optional[int] = None
+    ) -> AsyncIterator[List["MarkRow"]]:
+        """
+        То же, что get_marks_rows, но отдает строки пачками по мере чтения
+        :param filters: Фильтры поиска
+        :param size: Размер пачки
+        :param max_rows: Наибольшее число строк, None - без ограничения
+        :return: Асинхронный итератор пачек MarkRow
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream_export_rows(
+        self, params: "MarkExportParams", size: int = 1000
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Метод чтения меток для выгрузки пачками через серверный курсор
+        :param params: Область и временное окно выгрузки
+        :param size: Размер пачки
+        :return: Асинхронный итератор пачек строк
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_active_marks_rows_in_cells(
+        self, cells: List[str]
+    ) -> List["MarkRow"]:
+        """
+        Метод получения не завершенных меток, лежащих в ячейках геохэша
+        :param cells: Ячейки одной точности
+        :return: Строки MarkRow
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_change_version(self) -> int:
+        """
+        Метод получения текущей версии изменений меток.
+        Все изменения с меньшей версией уже закоммичены
+        :return: Версия для следующего запроса изменений
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_changed_marks_rows(
+        self, filters: "MarkFilter", since: int, limit: int
+    ) -> List["MarkRow"]:
+        """
+        Метод получения меток в области, измененных начиная с версии since
+        :param filters: Область поиска (радиус или bbox)
+        :param since: Версия, полученная клиентом ранее
+        :param limit: Максимальное число строк
+        :return: Строки MarkRow, в том числе завершенные метки
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_deleted_mark_ids(
+        self, filters: "MarkFilter", since: int, limit: int
+    ) -> List[int]:
+        """
+        Метод получения id меток, удаленных или перемещенных из области
+        начиная с версии since
+        :param filters: Область поиска (радиус или bbox)
+        :param since: Версия, полученная клиентом ранее
+        :param limit: Максимальное число id
+        :return: Список id
+        """
+        raise NotImplementedError
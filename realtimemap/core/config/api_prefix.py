@@ -9,6 +9,9 @@ class AuthPrefix(BaseModel):
     reset_password_token_secret: str = secrets.token_hex()
     verification_token_secret: str = secrets.token_hex()
     token_lifetime_seconds: int = 3600
+    # Кэш токен -> пользователь в памяти воркера (HTTP и socket.io)
+    token_cache_seconds: int = 60
+    token_cache_size: int = 10_000
     google_client_id: Optional[str] = None
     google_client_secret: Optional[str] = None
 
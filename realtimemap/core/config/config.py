@@ -8,6 +8,7 @@ from .celery import CeleryConfig
 from .database import DatabaseConfig
 from .frontend import FrontendConfig
 from .logging import LoggingConfig
+from .mark import MarkConfig
 from .payment import YooKassaPayment
 from .redis import RedisConfig
 from .server import ServerConfig
@@ -25,6 +26,7 @@ class AppConfig(BaseSettings):
     api: ApiPrefix = ApiPrefix()
     smtp: SmtpConfig
     frontend: FrontendConfig = FrontendConfig()
+    mark: MarkConfig = MarkConfig()
 
     static: Path = Path("static")
     root_dir: Path = ROOT_DIR
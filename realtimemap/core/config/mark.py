@@ -0,0 +1,20 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class MarkConfig(BaseModel):
+    # postgres - все запросы идут в БД, memory - радиусные запросы обслуживает
+    # индекс активных меток в памяти процесса
+    repository: Literal["postgres", "memory"] = "postgres"
+    index_precision: int = 5
+    # Кэш сериализованных активных меток по ячейкам геохэша в Redis
+    cell_cache: bool = True
+    cell_cache_ttl: int = 300
+    # Ограничения поиска меток в радиусе
+    max_radius: int = 50000
+    max_page_size: int = 500
+    # Сколько меток отдается потоком NDJSON за один запрос
+    max_stream_rows: int = 10000
+    # Каталог файлов выгрузки меток (Celery задача export_marks)
+    export_dir: str = "exports"
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
@@ -10,3 +12,22 @@ class SocketIOConfig(BaseModel):
     prefix: SocketIOPrefixConfig = SocketIOPrefixConfig()
     username: str
     password: str
+    # redis - события доходят до клиентов всех воркеров через pub/sub,
+    # memory - только для запуска в одном процессе
+    manager: Literal["redis", "memory"] = "redis"
+    channel: str = "socketio"
+    # Сообщения другим воркерам копятся и публикуются в Redis пачкой
+    publish_interval: float = 0.005
+    publish_batch_size: int = 100
+    # Окно объединения событий меток в одно сообщение marks_batch, 0 - без него
+    coalesce_window: float = 0.1
+    # Отправка клиентам воркера: параллельных emit не больше send_concurrency,
+    # у клиента не больше client_queue_size событий в очереди, при переполнении
+    # drop - теряются старые события, disconnect - клиент отключается
+    send_concurrency: int = 100
+    client_queue_size: int = 100
+    slow_client_policy: Literal["drop", "disconnect"] = "drop"
+    # Метрики отправки пишутся в лог раз в интервал, секунды, 0 - не писать
+    dispatcher_metrics_interval: float = 60.0
+    # Число пользователей /count рассылается не чаще раза за интервал, секунды
+    user_count_interval: float = 1.0
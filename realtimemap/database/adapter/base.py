@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Union, Optional, List, Dict, Any, Generic
+from typing import Union, Optional, List, Dict, Any, Generic, Callable, Awaitable
 
 from my_type import Model, CreateSchema, UpdateSchema
 
@@ -91,3 +91,12 @@ class BaseAdapter(ABC, Generic[Model, CreateSchema, UpdateSchema]):
             True if the record exists, False otherwise
         """
         raise NotImplementedError
+
+    def on_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Run coroutine after the next successful commit.
+
+        Args:
+            callback: Function returning coroutine
+        """
+        raise NotImplementedError
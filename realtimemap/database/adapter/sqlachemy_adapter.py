@@ -1,7 +1,21 @@
+import asyncio
 import logging
-from typing import Generic, Type, Optional, Union, List, Dict, Any, TypeVar
-
-from sqlalchemy import delete, select, Select
+from typing import (
+    Generic,
+    Type,
+    Optional,
+    Union,
+    List,
+    Dict,
+    Any,
+    TypeVar,
+    Callable,
+    Awaitable,
+    Set,
+    AsyncIterator,
+)
+
+from sqlalchemy import delete, select, Select, Row, event
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
@@ -15,6 +29,9 @@ logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Ссылки на задачи, запущенные после commit, чтобы их не собрал GC
+_after_commit_tasks: Set[asyncio.Task] = set()
+
 
 class SQLAlchemyAdapter(
     BaseAdapter[Model, CreateSchema, UpdateSchema],
@@ -192,6 +209,24 @@ class SQLAlchemyAdapter(
         result = await self.session.execute(stmt)
         return result.scalar_one()
 
+    def on_commit(self, callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Run coroutine after the next commit of the session.
+
+        Args:
+            callback: Function returning coroutine
+        """
+        loop = asyncio.get_running_loop()
+
+        def _after_commit(_) -> None:
+            task = loop.create_task(callback())
+            _after_commit_tasks.add(task)
+            task.add_done_callback(_after_commit_tasks.discard)
+
+        event.listen(
+            self.session.sync_session, "after_commit", _after_commit, once=True
+        )
+
     async def execute_query(
         self, query: Select[tuple[T]], unique: Optional[bool] = False
     ) -> List[T]:
@@ -206,6 +241,24 @@ class SQLAlchemyAdapter(
 
         return list(scalars.all())
 
+    async def execute_rows(self, query: Select) -> List[Row]:
+        """
+        Выполнить SELECT запрос и вернуть строки целиком.
+        """
+        result = await self.session.execute(query)
+        return list(result.all())
+
+    async def stream_partitions(
+        self, query: Select, size: int = 1000
+    ) -> AsyncIterator[List[Row]]:
+        """
+        Выполнить SELECT запрос через серверный курсор и отдавать строки
+        пачками по size, не загружая весь результат в память.
+        """
+        result = await self.session.stream(query.execution_options(yield_per=size))
+        async for partition in result.partitions():
+            yield list(partition)
+
     async def execute_query_one(self, query: Select[tuple[T]]) -> Optional[T]:
         """
         Выполнить SELECT запрос и вернуть один результат.
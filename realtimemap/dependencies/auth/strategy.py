@@ -1,14 +1,78 @@
-from typing import Annotated, TYPE_CHECKING
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Optional, TYPE_CHECKING
 
 from fastapi import Depends
+from fastapi_users import exceptions
 from fastapi_users.authentication.strategy import DatabaseStrategy
 
+from auth.token_cache import TokenUserCache, token_user_cache
 from core.config import conf
 from .access_token import get_access_token_db
 
 if TYPE_CHECKING:
-    from modules import AccessToken
+    from modules import AccessToken, User
     from fastapi_users.authentication.strategy.db import AccessTokenDatabase
+    from fastapi_users.manager import BaseUserManager
+
+
+class CachedDatabaseStrategy(DatabaseStrategy):
+    """
+    DatabaseStrategy, which reads access token from TokenUserCache first.
+    Only the user is loaded on cache hit.
+    """
+
+    def __init__(
+        self,
+        database: "AccessTokenDatabase[AccessToken]",
+        lifetime_seconds: Optional[int] = None,
+        cache: TokenUserCache = token_user_cache,
+    ):
+        super().__init__(database, lifetime_seconds)
+        self.cache = cache
+
+    async def read_token_user_id(self, token: Optional[str]) -> Optional[int]:
+        """
+        Id of the token owner without loading the user
+        """
+        if token is None:
+            return None
+        user_id = self.cache.get(token)
+        if user_id is not None:
+            return user_id
+
+        max_age = None
+        if self.lifetime_seconds:
+            max_age = datetime.now(timezone.utc) - timedelta(
+                seconds=self.lifetime_seconds
+            )
+        access_token = await self.database.get_by_token(token, max_age)
+        if access_token is None:
+            return None
+
+        expires_at = None
+        if self.lifetime_seconds:
+            expires_at = access_token.created_at + timedelta(
+                seconds=self.lifetime_seconds
+            )
+        self.cache.set(token, access_token.user_id, expires_at)
+        return access_token.user_id
+
+    async def read_token(
+        self, token: Optional[str], user_manager: "BaseUserManager"
+    ) -> Optional["User"]:
+        user_id = await self.read_token_user_id(token)
+        if user_id is None:
+            return None
+        try:
+            parsed_id = user_manager.parse_id(user_id)
+            return await user_manager.get(parsed_id)
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+    async def destroy_token(self, token: str, user: "User") -> None:
+        await super().destroy_token(token, user)
+        # Токен удален из БД, теперь его не должен вернуть кэш ни одного воркера
+        await self.cache.invalidate(token)
 
 
 async def get_database_strategy(
@@ -17,7 +81,7 @@ async def get_database_strategy(
         Depends(get_access_token_db),
     ],
 ) -> DatabaseStrategy:
-    yield DatabaseStrategy(
+    yield CachedDatabaseStrategy(
         database=access_tokens_db,
         lifetime_seconds=conf.api.v1.auth.token_lifetime_seconds,
     )
@@ -2,8 +2,10 @@ import contextlib
 from typing import Annotated, Optional, TYPE_CHECKING
 
 from fastapi import Depends, WebSocket, status, WebSocketException
+from sqlalchemy import select
 
 from database.helper import db_helper
+from modules import User
 from modules.user.schemas import UserRead
 from utils.dependency_resolver import resolve_dependency
 from .access_token import get_access_token_db
@@ -13,8 +15,8 @@ from .users import get_users_db
 
 if TYPE_CHECKING:
     from fastapi_users.authentication.strategy import DatabaseStrategy
+    from sqlalchemy.ext.asyncio import AsyncSession
     from auth.user_manager import UserManager
-    from modules import User
 
 
 async def websocket_auth(
@@ -60,3 +62,29 @@ async def socket_current_user(token: str) -> Optional["User"]:
         user = await strategy.read_token(token, user_manager=user_manager)
         return user
     return None
+
+
+async def socket_current_user_id(
+    token: Optional[str], session: "AsyncSession"
+) -> Optional[int]:
+    """
+    Id of the token owner for socket.io handshake.
+    Token is read from the cache shared with HTTP auth, on miss - by one query
+    in the given session. Only existence of the active user is checked,
+    the user itself is not loaded.
+    """
+    async with contextlib.AsyncExitStack() as stack:
+        access_token_db = await stack.enter_async_context(
+            resolve_dependency(get_access_token_db, session)
+        )
+        strategy = await stack.enter_async_context(
+            resolve_dependency(get_database_strategy, access_token_db)
+        )
+        user_id = await strategy.read_token_user_id(token)
+    if user_id is None:
+        return None
+    # Пользователь мог быть удален или заблокирован после выдачи токена
+    exists = await session.scalar(
+        select(User.id).where(User.id == user_id, User.is_active)
+    )
+    return user_id if exists is not None else None
@@ -4,7 +4,7 @@ from fastapi import Depends
 
 from core.app.socket import sio
 from modules.geo_service import GeoService, get_geo_service
-from modules.mark.dependencies import get_pg_mark_repository
+from modules.mark.dependencies import get_mark_repository
 from modules.notification import MarkNotificationService, ChatNotificationService
 
 if TYPE_CHECKING:
@@ -12,7 +12,7 @@ if TYPE_CHECKING:
 
 
 def get_mark_notification_service(
-    mark_repo: Annotated["MarkRepository", Depends(get_pg_mark_repository)],
+    mark_repo: Annotated["MarkRepository", Depends(get_mark_repository)],
     geo_service: Annotated[GeoService, Depends(get_geo_service)],
 ) -> MarkNotificationService:
     return MarkNotificationService(
@@ -1,14 +1,21 @@
 import logging
 
-from fastapi import Path
+from fastapi import Path, Request
 from fastapi.responses import RedirectResponse, ORJSONResponse
-from libcloud.storage.drivers.local import LocalStorageDriver
 from libcloud.storage.types import ObjectDoesNotExistError
 from sqlalchemy_file.storage import StorageManager
-from starlette.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import FileResponse, Response, StreamingResponse
 
 from core.app import create_app
 from core.config import conf
+from utils.image import get_original_name
+from utils.media import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    is_not_modified,
+    media_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -22,37 +29,54 @@ async def redirect_root():
 
 
 @app.get("/media/{storage}/{file_id}", tags=["Root"], name="get_file")
-def serve_files(
+async def serve_files(
+    request: Request,
     storage: str = Path(...),
     file_id: str = Path(...),
 ):
+    key = f"{storage}/{file_id}"
     try:
-        file = StorageManager.get_file(f"{storage}/{file_id}")
-
-        # Для локального хранилища просто отдаем файл.
-        # FileResponse сам выставит нужные заголовки для отображения в браузере.
-        if isinstance(file.object.driver, LocalStorageDriver):
-            return FileResponse(
-                file.object.get_cdn_url(),  # get_cdn_url для LocalStorageDriver вернет локальный путь
-                media_type=file.content_type,
-                filename=file.filename,
-                headers={"Content-Disposition": "inline"},
-            )
-
-        # Если есть публичный URL (напр. S3), делаем редирект
-        if file.get_cdn_url():
-            return RedirectResponse(file.get_cdn_url())
-
-        # Для других хранилищ (без CDN) отдаем поток, но с правильным заголовком
-        return StreamingResponse(
-            file.object.as_stream(),
+        # Описание файла берется из LRU, libcloud вызывается только при промахе
+        file = await media_cache.get(key)
+        stat_result = await run_in_threadpool(file.stat)
+    except (ObjectDoesNotExistError, RuntimeError, FileNotFoundError):
+        media_cache.discard(key)
+        original = get_original_name(file_id)
+        if original is not None:
+            # Превью еще не сгенерировано в celery, отдаем оригинал без долгого кэша
+            response = await serve_files(request, storage, original)
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+            return response
+        logger.info(f"File does not exist: {key}")
+        return ORJSONResponse({"detail": "Not found"}, status_code=404)
+
+    headers = {"ETag": file.etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if is_not_modified(request.headers, file.etag):
+        return Response(status_code=304, headers=headers)
+
+    # Для локального хранилища просто отдаем файл.
+    # FileResponse сам обработает заголовок Range и отдаст 206.
+    if file.local_path is not None:
+        return FileResponse(
+            file.local_path,
+            stat_result=stat_result,
             media_type=file.content_type,
-            headers={"Content-Disposition": "inline"},
+            filename=file.filename,
+            headers=headers,
+            content_disposition_type="inline",
         )
 
-    except (ObjectDoesNotExistError, RuntimeError):
-        logger.info(f"File does not exist: {storage}/{file_id}")
-        return ORJSONResponse({"detail": "Not found"}, status_code=404)
+    # Если есть публичный URL (напр. S3), делаем редирект
+    if file.cdn_url:
+        return RedirectResponse(file.cdn_url)
+
+    # Для других хранилищ (без CDN) отдаем поток, но с правильным заголовком
+    stored_file = await run_in_threadpool(StorageManager.get_file, key)
+    return StreamingResponse(
+        stored_file.object.as_stream(),
+        media_type=file.content_type,
+        headers={**headers, "Content-Disposition": "inline"},
+    )
 
 
 if __name__ == "__main__":
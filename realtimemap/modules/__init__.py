@@ -3,6 +3,8 @@ __all__ = [
     "AccessToken",
     "User",
     "Mark",
+    "MarkCellStat",
+    "MarkTombstone",
     "Category",
     "RequestLog",
     "Message",
@@ -26,7 +28,7 @@ from .base import BaseSqlModel, Base
 from .category.model import Category
 from .chat.model import Chat
 from .gamefication.model import ExpAction, Level, UserExpHistory
-from .mark.model import Mark
+from .mark.model import Mark, MarkCellStat, MarkTombstone
 from .mark_comment.model import Comment, CommentStat, CommentReaction
 from .message import Message
 from .metrics.model import UserMetric
@@ -7,7 +7,7 @@ from core.common.repository import ChatRepository
 from database.adapter import PgAdapter
 from modules.message.model import Message
 from modules.user.model import User
-from .model import Chat
+from .model import Chat, chat_participants_table
 from .schemas import CreateChat, UpdateChat
 
 
@@ -41,7 +41,10 @@ class PgChatRepository(ChatRepository):
         return result.unique().all()
 
     async def get_user_chats_ids(self, user_id: int) -> List[int]:
-        stmt = select(Chat.id).join(Chat.participants).where(User.id == user_id)
+        # Только таблица участников, без join с chats и users
+        stmt = select(chat_participants_table.c.chat_id).where(
+            chat_participants_table.c.user_id == user_id
+        )
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
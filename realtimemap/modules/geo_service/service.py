@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import List
+from math import asin, cos, floor, log, pi, radians, sin, sqrt, tan
+from typing import List, Tuple
 
 from geoalchemy2 import WKBElement, Geometry
 from geoalchemy2.functions import (
@@ -8,7 +9,7 @@ from geoalchemy2.functions import (
     ST_MakePoint,
     ST_DistanceSphere,
 )
-from geoalchemy2.shape import from_shape
+from geoalchemy2.shape import from_shape, to_shape
 from pydantic import BaseModel
 from pydantic_extra_types.coordinate import Latitude, Longitude
 from pygeohash import encode, get_adjacent, decode
@@ -16,6 +17,21 @@ from shapely.geometry import Point
 
 from modules import Mark
 from modules.mark.schemas import Coordinates
+from utils.geom.geom_sector import GEOHASH_PRECISION
+
+# Радиус сферы, совпадающий с ST_DistanceSphere в PostGIS
+EARTH_RADIUS_METERS: float = 6370986.0
+METERS_PER_DEGREE: float = 111320.0
+
+# Максимальное число ячеек в покрытии круга
+MAX_COVER_CELLS: int = 16
+# Запас на отличие расстояния до края ячейки от кратчайшего на сфере
+COVER_TOLERANCE: float = 1.01
+# Максимальное число ячеек в покрытии прямоугольника (bbox)
+MAX_BBOX_CELLS: int = 1024
+
+# Граница проекции Web Mercator (EPSG:3857)
+MAX_MERCATOR_LATITUDE: float = 85.0511287798
 
 
 class GeoService:
@@ -33,7 +49,7 @@ class GeoService:
         return from_shape(Point(coords.longitude, coords.latitude), srid)
 
     @staticmethod
-    def get_geohash(coords: "Coordinates", precision: int = 5) -> str:
+    def get_geohash(coords: "Coordinates", precision: int = GEOHASH_PRECISION) -> str:
         """Method for get geohash from sql expression"""
         return encode(coords.latitude, coords.longitude, precision=precision)
 
@@ -67,15 +83,217 @@ class GeoService:
     def distance_sphere(geom_1: ST_SetSRID, geom_2: Geometry, radius: int = 500):
         return ST_DistanceSphere(geom_1, geom_2, radius)
 
+    @staticmethod
+    def distance(lat_1: float, lon_1: float, lat_2: float, lon_2: float) -> float:
+        """Haversine distance in meters between two points"""
+        d_lat = radians(lat_2 - lat_1)
+        d_lon = radians(lon_2 - lon_1)
+        a = (
+            sin(d_lat / 2) ** 2
+            + cos(radians(lat_1)) * cos(radians(lat_2)) * sin(d_lon / 2) ** 2
+        )
+        return 2 * EARTH_RADIUS_METERS * asin(min(1.0, sqrt(a)))
+
+    @staticmethod
+    def get_lat_lon(geom: WKBElement) -> Tuple[float, float]:
+        """Method for get (latitude, longitude) from point geometry"""
+        point = to_shape(geom)
+        return point.y, point.x
+
+    @staticmethod
+    def get_tile(latitude: float, longitude: float, zoom: int) -> Tuple[int, int]:
+        """Method for get (x, y) of Web Mercator (XYZ) tile containing the point"""
+        count = 1 << zoom
+        latitude = min(max(latitude, -MAX_MERCATOR_LATITUDE), MAX_MERCATOR_LATITUDE)
+        lat_rad = radians(latitude)
+        x = floor((longitude + 180.0) / 360.0 * count)
+        y = floor((1.0 - log(tan(lat_rad) + 1.0 / cos(lat_rad)) / pi) / 2.0 * count)
+        return min(max(x, 0), count - 1), min(max(y, 0), count - 1)
+
+    @staticmethod
+    def get_cell_size(precision: int) -> Tuple[float, float]:
+        """Size of geohash cell in degrees: (latitude, longitude)"""
+        bits = precision * 5
+        return 180.0 / (1 << (bits // 2)), 360.0 / (1 << ((bits + 1) // 2))
+
+    def _get_cell_range(
+        self, coords: "Coordinates", radius: float, precision: int
+    ) -> Tuple[int, int, int, int]:
+        """
+        Rows and columns of geohash grid, which intersect bounding box of circle.
+        Columns can exceed grid width near the antimeridian, use col % cols.
+        :return: (row_start, row_end, col_start, col_end)
+        """
+        cell_lat, cell_lon = self.get_cell_size(precision)
+        rows = int(round(180.0 / cell_lat))
+        cols = int(round(360.0 / cell_lon))
+
+        lat_delta = radius / METERS_PER_DEGREE
+        lon_delta = radius / (
+            METERS_PER_DEGREE * max(cos(radians(coords.latitude)), 1e-6)
+        )
+
+        south = max(coords.latitude - lat_delta, -90.0)
+        north = min(coords.latitude + lat_delta, 90.0)
+        row_start = min(floor((south + 90.0) / cell_lat), rows - 1)
+        row_end = min(floor((north + 90.0) / cell_lat), rows - 1)
+
+        if lon_delta >= 180.0:
+            return row_start, row_end, 0, cols - 1
+
+        col_start = floor((coords.longitude - lon_delta + 180.0) / cell_lon)
+        col_end = floor((coords.longitude + lon_delta + 180.0) / cell_lon)
+        return row_start, row_end, col_start, min(col_end, col_start + cols - 1)
+
+    def get_cells_in_radius(
+        self, coords: "Coordinates", radius: float, precision: int = 5
+    ) -> List[str]:
+        """
+        Method for get all geohash cells of given precision, which intersect
+        circle with center in coords
+        """
+        cell_lat, cell_lon = self.get_cell_size(precision)
+        cols = int(round(360.0 / cell_lon))
+        row_start, row_end, col_start, col_end = self._get_cell_range(
+            coords, radius, precision
+        )
+
+        result = []
+        for row in range(row_start, row_end + 1):
+            south = -90.0 + row * cell_lat
+            # Ближайшая к центру широта внутри ячейки
+            latitude = min(max(coords.latitude, south), south + cell_lat)
+            for col in range(col_start, col_end + 1):
+                west = -180.0 + (col % cols) * cell_lon
+                offset = (coords.longitude - west) % 360.0
+                if offset <= cell_lon:
+                    longitude = coords.longitude
+                elif offset - cell_lon < 360.0 - offset:
+                    longitude = west + cell_lon
+                else:
+                    longitude = west
+                distance = self.distance(
+                    coords.latitude, coords.longitude, latitude, longitude
+                )
+                if distance > radius * COVER_TOLERANCE:
+                    continue
+                result.append(
+                    encode(
+                        south + cell_lat / 2, west + cell_lon / 2, precision=precision
+                    )
+                )
+        return result
+
+    def get_cover_precision(
+        self,
+        coords: "Coordinates",
+        radius: float,
+        max_precision: int = GEOHASH_PRECISION,
+        max_cells: int = MAX_COVER_CELLS,
+    ) -> int:
+        """
+        Finest geohash precision, where bounding box of circle is covered
+        by no more than max_cells cells. Depends on radius and latitude.
+        """
+        for precision in range(max_precision, 1, -1):
+            row_start, row_end, col_start, col_end = self._get_cell_range(
+                coords, radius, precision
+            )
+            if (row_end - row_start + 1) * (col_end - col_start + 1) <= max_cells:
+                return precision
+        return 1
+
+    def cover_cells(
+        self,
+        coords: "Coordinates",
+        radius: float,
+        max_precision: int = GEOHASH_PRECISION,
+        max_cells: int = MAX_COVER_CELLS,
+    ) -> List[str]:
+        """
+        Method for get minimal set of geohash cells (all with same precision),
+        which covers circle with center in coords.
+        """
+        precision = self.get_cover_precision(coords, radius, max_precision, max_cells)
+        return self.get_cells_in_radius(coords, radius, precision)
+
+    def _get_bbox_range(
+        self, south: float, west: float, north: float, east: float, precision: int
+    ) -> Tuple[int, int, int, int]:
+        """
+        Rows and columns of geohash grid, which intersect bounding box.
+        west > east means box crossing the antimeridian, use col % cols.
+        :return: (row_start, row_end, col_start, col_end)
+        """
+        cell_lat, cell_lon = self.get_cell_size(precision)
+        rows = int(round(180.0 / cell_lat))
+        cols = int(round(360.0 / cell_lon))
+
+        row_start = min(floor((south + 90.0) / cell_lat), rows - 1)
+        row_end = min(floor((north + 90.0) / cell_lat), rows - 1)
+        col_start = min(floor((west + 180.0) / cell_lon), cols - 1)
+        col_end = min(floor((east + 180.0) / cell_lon), cols - 1)
+        if col_end < col_start:
+            col_end += cols
+        return row_start, row_end, col_start, col_end
+
+    def get_bbox_precision(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        max_precision: int = GEOHASH_PRECISION,
+        max_cells: int = MAX_BBOX_CELLS,
+    ) -> int:
+        """
+        Finest geohash precision (not above max_precision), where bounding box
+        is covered by no more than max_cells cells
+        """
+        for precision in range(max_precision, 1, -1):
+            row_start, row_end, col_start, col_end = self._get_bbox_range(
+                south, west, north, east, precision
+            )
+            if (row_end - row_start + 1) * (col_end - col_start + 1) <= max_cells:
+                return precision
+        return 1
+
+    def get_cells_in_bbox(
+        self, south: float, west: float, north: float, east: float, precision: int
+    ) -> List[str]:
+        """
+        Method for get all geohash cells of given precision,
+        which intersect bounding box
+        """
+        cell_lat, cell_lon = self.get_cell_size(precision)
+        cols = int(round(360.0 / cell_lon))
+        row_start, row_end, col_start, col_end = self._get_bbox_range(
+            south, west, north, east, precision
+        )
+
+        result = []
+        for row in range(row_start, row_end + 1):
+            latitude = -90.0 + (row + 0.5) * cell_lat
+            for col in range(col_start, col_end + 1):
+                longitude = -180.0 + (col % cols + 0.5) * cell_lon
+                result.append(encode(latitude, longitude, precision=precision))
+        return result
+
+    @staticmethod
+    def is_in_cells(geohash: str, cells: List[str]) -> bool:
+        """Method for check that geohash lies in one of the cells"""
+        if not cells:
+            return False
+        return geohash[: len(cells[0])] in cells
+
     @staticmethod
     def create_coordinates(data: BaseModel) -> Coordinates:
         if hasattr(data, "latitude") and hasattr(data, "longitude"):
             return Coordinates(latitude=data.latitude, longitude=data.longitude)
         raise ValueError("Data object must have 'latitude' and 'longitude' attributes")
 
-    def check_geohash_proximity(self, coords: "Coordinates", mark: Mark) -> bool:
-        geohash = self.get_geohash(coords)
-        neighbors = self.get_neighbors(geohash, need_include=True)
-        if mark.geohash in neighbors:
-            return True
-        return False
+    def check_geohash_proximity(
+        self, coords: "Coordinates", mark: Mark, radius: float = 5000
+    ) -> bool:
+        cells = self.cover_cells(coords, radius)
+        return self.is_in_cells(mark.geohash, cells)
@@ -0,0 +1,317 @@
+import heapq
+import logging
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+import orjson
+
+from core.config import conf
+from modules.geo_service import GeoService
+from utils.geom.geom_sector import get_geohash
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from .filters import MarkFilter
+    from .serializer import MarkRow, MarkListSerializer
+
+logger = logging.getLogger(__name__)
+
+# Длина временного окна тайла в секундах
+TILE_BUCKET_SECONDS: int = 300
+MAX_TILE_ZOOM: int = 20
+TILE_EXTENT: int = 4096
+TILE_LAYER: str = "marks"
+
+# Точность ячеек кэша меток (~4.9 x 4.9 км)
+CELL_CACHE_PRECISION: int = 5
+# При большем числе ячеек запрос идет мимо кэша
+MAX_CACHED_CELLS: int = 64
+
+# Записывает ячейку, только если поколение не изменилось с момента чтения.
+# KEYS: пары (ячейка, поколение), ARGV: ttl, затем пары (поколение, значение)
+SET_IF_GENERATION_SCRIPT: str = """
+for i = 1, #KEYS, 2 do
+    local generation = redis.call('GET', KEYS[i + 1]) or ''
+    if generation == ARGV[i + 1] then
+        redis.call('SET', KEYS[i], ARGV[i + 2], 'EX', ARGV[1])
+    end
+end
+return 0
+"""
+
+
+class MarkTileCache:
+    """
+    Redis cache of vector tiles with marks.
+    Key contains tile and time bucket, so tile content changes with time
+    without explicit invalidation. Writes delete tiles of all zoom levels
+    which contain changed point.
+    """
+
+    def __init__(
+        self,
+        redis: Optional["Redis"] = None,
+        prefix: str = conf.redis.prefix,
+        geo_service: Optional[GeoService] = None,
+    ):
+        self.redis = redis
+        self.prefix = f"{prefix}:mark-tile"
+        self.geo_service = geo_service if geo_service is not None else GeoService()
+
+    @staticmethod
+    def get_bucket(moment: Optional[datetime] = None) -> int:
+        moment = moment if moment is not None else datetime.now()
+        return int(moment.timestamp()) // TILE_BUCKET_SECONDS
+
+    @staticmethod
+    def get_bucket_range(bucket: int) -> Tuple[datetime, datetime]:
+        """Time window [start, end) of bucket"""
+        start = datetime.fromtimestamp(bucket * TILE_BUCKET_SECONDS)
+        return start, start + timedelta(seconds=TILE_BUCKET_SECONDS)
+
+    @staticmethod
+    def get_ttl(bucket: int) -> int:
+        """Seconds until the end of bucket"""
+        _, end = MarkTileCache.get_bucket_range(bucket)
+        return max(int((end - datetime.now()).total_seconds()), 1)
+
+    def build_key(self, z: int, x: int, y: int, bucket: int) -> str:
+        return f"{self.prefix}:{bucket}:{z}:{x}:{y}"
+
+    def get_point_keys(
+        self, points: Iterable[Tuple[float, float]], bucket: Optional[int] = None
+    ) -> List[str]:
+        """
+        Keys of tiles of all zoom levels, which contain given points
+        :param points: (latitude, longitude) pairs
+        :param bucket: Time bucket, current by default
+        :return: List of unique keys
+        """
+        bucket = bucket if bucket is not None else self.get_bucket()
+        keys = set()
+        for latitude, longitude in points:
+            for zoom in range(MAX_TILE_ZOOM + 1):
+                x, y = self.geo_service.get_tile(latitude, longitude, zoom)
+                keys.add(self.build_key(zoom, x, y, bucket))
+        return list(keys)
+
+    async def get(self, z: int, x: int, y: int, bucket: int) -> Optional[bytes]:
+        try:
+            return await self.redis.get(self.build_key(z, x, y, bucket))
+        except Exception as e:
+            logger.error(f"Error on get mark tile from cache: {e}")
+            return None
+
+    async def set(self, z: int, x: int, y: int, bucket: int, tile: bytes) -> None:
+        try:
+            await self.redis.set(
+                self.build_key(z, x, y, bucket), tile, ex=self.get_ttl(bucket)
+            )
+        except Exception as e:
+            logger.error(f"Error on set mark tile to cache: {e}")
+
+    async def invalidate(self, points: Iterable[Tuple[float, float]]) -> None:
+        """
+        Delete cached tiles, which contain given points
+        :param points: (latitude, longitude) pairs
+        :return: None
+        """
+        keys = self.get_point_keys(points)
+        if not keys:
+            return
+        try:
+            await self.redis.delete(*keys)
+        except Exception as e:
+            logger.error(f"Error on invalidate mark tiles: {e}")
+
+
+class MarkCellCache:
+    """
+    Redis cache of serialized not ended marks per geohash cell.
+    Cells are shared by overlapping viewports of different users,
+    radius queries union cached cells and refine them by exact distance.
+    Invalidation increments generation of cell, so entry loaded before
+    the invalidation is not written back to the cache.
+    """
+
+    def __init__(
+        self,
+        redis: Optional["Redis"] = None,
+        prefix: str = conf.redis.prefix,
+        ttl: int = conf.mark.cell_cache_ttl,
+        precision: int = CELL_CACHE_PRECISION,
+        geo_service: Optional[GeoService] = None,
+    ):
+        self.redis = redis
+        self.prefix = f"{prefix}:mark-cell"
+        self.ttl = ttl
+        self.precision = precision
+        self.geo_service = geo_service if geo_service is not None else GeoService()
+
+    def build_key(self, cell: str) -> str:
+        return f"{self.prefix}:{cell}"
+
+    def build_generation_key(self, cell: str) -> str:
+        return f"{self.prefix}-gen:{cell}"
+
+    def get_cells(self, filters: "MarkFilter") -> List[str]:
+        """
+        Cells of cache precision, which intersect circle or bbox of filters.
+        Empty list for bbox, which needs more than MAX_CACHED_CELLS cells.
+        """
+        if filters.bbox is not None:
+            precision = self.geo_service.get_bbox_precision(
+                *filters.bbox, max_precision=self.precision, max_cells=MAX_CACHED_CELLS
+            )
+            if precision < self.precision:
+                return []
+            return self.geo_service.get_cells_in_bbox(*filters.bbox, self.precision)
+        return self.geo_service.get_cells_in_radius(
+            filters, filters.radius, self.precision
+        )
+
+    def get_point_cells(self, points: Iterable[Tuple[float, float]]) -> List[str]:
+        """
+        Cells, which contain given points
+        :param points: (latitude, longitude) pairs
+        :return: List of unique cells
+        """
+        return list(
+            {
+                get_geohash(latitude, longitude, self.precision)
+                for latitude, longitude in points
+            }
+        )
+
+    def get_point_keys(self, points: Iterable[Tuple[float, float]]) -> List[str]:
+        """
+        Keys of cells, which contain given points
+        :param points: (latitude, longitude) pairs
+        :return: List of unique keys
+        """
+        return [self.build_key(cell) for cell in self.get_point_cells(points)]
+
+    @staticmethod
+    def build_entry(row: "MarkRow", serializer: "MarkListSerializer") -> Dict[str, Any]:
+        """
+        Serialized mark with fields for refine. Cache is shared between
+        requests, so serializer keeps relative media paths (media_url=None),
+        they are prefixed by MarkListSerializer.with_media_url per request.
+        """
+        return {
+            "latitude": row.latitude,
+            "longitude": row.longitude,
+            "start_at": row.start_at.timestamp(),
+            "end_at": row.end_at.timestamp(),
+            "mark": serializer.to_dict(row),
+        }
+
+    def refine(
+        self, entries: Iterable[Dict[str, Any]], filters: "MarkFilter"
+    ) -> List[Tuple[float, int, Dict[str, Any]]]:
+        """
+        (distance, id, mark) of serialized marks in search area and active in
+        time window. Semantic is the same as PgMarkRepository.get_marks_rows
+        with show_ended=False: nearest first, after cursor, limit + 1 marks.
+        """
+        min_start = filters.min_start.timestamp()
+        max_end = filters.max_end.timestamp()
+        result = []
+        for entry in entries:
+            if entry["start_at"] > max_end or entry["end_at"] <= min_start:
+                continue
+            distance = self.geo_service.distance(
+                filters.latitude,
+                filters.longitude,
+                entry["latitude"],
+                entry["longitude"],
+            )
+            mark_id = entry["mark"]["id"]
+            if not filters.contains(entry["latitude"], entry["longitude"], distance):
+                continue
+            if filters.is_after(distance, mark_id):
+                result.append((distance, mark_id, entry["mark"]))
+        if filters.limit is None:
+            return result
+        return heapq.nsmallest(filters.limit + 1, result, key=lambda item: item[:2])
+
+    async def get_many(
+        self, cells: List[str]
+    ) -> Tuple[Dict[str, Optional[List[Dict]]], Dict[str, str]]:
+        """
+        Cached entries by cells, None for missed cells,
+        and generations of cells to pass to set_many
+        """
+        keys = [self.build_key(cell) for cell in cells]
+        keys += [self.build_generation_key(cell) for cell in cells]
+        try:
+            values = await self.redis.mget(keys)
+        except Exception as e:
+            logger.error(f"Error on get mark cells from cache: {e}")
+            # Без известного поколения set_many ячейки не записывает
+            return {cell: None for cell in cells}, {}
+        entries, generations = values[: len(cells)], values[len(cells) :]
+        return {
+            cell: orjson.loads(value) if value is not None else None
+            for cell, value in zip(cells, entries)
+        }, {
+            cell: self._decode_generation(generation)
+            for cell, generation in zip(cells, generations)
+        }
+
+    async def set_many(
+        self, data: Dict[str, List[Dict]], generations: Dict[str, str]
+    ) -> None:
+        """
+        Write cells, which generation is the same as read by get_many.
+        Cells invalidated after the read are skipped.
+        """
+        keys, args = [], [self.ttl]
+        for cell, entries in data.items():
+            if cell not in generations:
+                continue
+            keys += [self.build_key(cell), self.build_generation_key(cell)]
+            args += [generations[cell], orjson.dumps(entries)]
+        if not keys:
+            return
+        try:
+            await self.redis.eval(SET_IF_GENERATION_SCRIPT, len(keys), *keys, *args)
+        except Exception as e:
+            logger.error(f"Error on set mark cells to cache: {e}")
+
+    def add_invalidate(self, pipe: Any, points: Iterable[Tuple[float, float]]) -> None:
+        """
+        Add commands, which invalidate cells with given points, to pipeline.
+        Pipeline may be sync or async, commands are only queued.
+        """
+        for cell in self.get_point_cells(points):
+            generation_key = self.build_generation_key(cell)
+            pipe.incr(generation_key)
+            # Поколение должно пережить чтения, начатые до инвалидации
+            pipe.expire(generation_key, self.ttl)
+            pipe.delete(self.build_key(cell))
+
+    async def invalidate(self, points: Iterable[Tuple[float, float]]) -> None:
+        """
+        Delete cached cells, which contain given points,
+        and increment their generations
+        :param points: (latitude, longitude) pairs
+        :return: None
+        """
+        points = list(points)
+        if not points:
+            return
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                self.add_invalidate(pipe, points)
+                await pipe.execute()
+        except Exception as e:
+            logger.error(f"Error on invalidate mark cells: {e}")
+
+    @staticmethod
+    def _decode_generation(generation: Optional[Any]) -> str:
+        if generation is None:
+            return ""
+        if isinstance(generation, bytes):
+            return generation.decode()
+        return str(generation)
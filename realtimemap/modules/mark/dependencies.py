@@ -1,15 +1,17 @@
 from typing import TYPE_CHECKING, Annotated, Optional
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import conf
 from database import get_session
 from database.adapter import PgAdapter
 from modules.category.dependencies import get_pg_category_repository
 from modules.geo_service import get_geo_service
 from modules.mark_comment.dependencies import get_mark_comment_repository
+from .cache import MarkTileCache, MarkCellCache
 from .model import Mark
-from .repository import PgMarkRepository
+from .repository import PgMarkRepository, MemoryMarkRepository
 from .schemas import CreateMark, UpdateMark
 from .service import MarkService
 
@@ -32,17 +34,50 @@ async def get_pg_mark_repository(
     return PgMarkRepository(adapter=adapter, geo_service=geo_service)
 
 
+async def get_mark_repository(
+    session: DBSession,
+    geo_service: Annotated[Optional["GeoService"], Depends(get_geo_service)],
+) -> "MarkRepository":
+    """
+    Mark repository, selected by conf.mark.repository
+    """
+    if conf.mark.repository == "memory":
+        adapter = PgAdapter[Mark, CreateMark, UpdateMark](session, Mark)
+        return MemoryMarkRepository(adapter=adapter, geo_service=geo_service)
+    return await get_pg_mark_repository(session, geo_service)
+
+
+async def get_mark_tile_cache(
+    request: Request,
+    geo_service: Annotated["GeoService", Depends(get_geo_service)],
+) -> MarkTileCache:
+    return MarkTileCache(redis=request.app.state.redis, geo_service=geo_service)
+
+
+async def get_mark_cell_cache(
+    request: Request,
+    geo_service: Annotated["GeoService", Depends(get_geo_service)],
+) -> Optional[MarkCellCache]:
+    if not conf.mark.cell_cache:
+        return None
+    return MarkCellCache(redis=request.app.state.redis, geo_service=geo_service)
+
+
 async def get_mark_service(
-    mark_repo: Annotated["MarkRepository", Depends(get_pg_mark_repository)],
+    mark_repo: Annotated["MarkRepository", Depends(get_mark_repository)],
     category_repo: Annotated["CategoryRepository", Depends(get_pg_category_repository)],
     mark_comment_repo: Annotated[
         "MarkCommentRepository", Depends(get_mark_comment_repository)
     ],
     geo_service: Annotated["GeoService", Depends(get_geo_service)],
+    tile_cache: Annotated[MarkTileCache, Depends(get_mark_tile_cache)],
+    cell_cache: Annotated[Optional[MarkCellCache], Depends(get_mark_cell_cache)],
 ) -> "MarkService":
     return MarkService(
         mark_repo=mark_repo,
         category_repo=category_repo,
         mark_comment_repo=mark_comment_repo,
         geo_service=geo_service,
+        tile_cache=tile_cache,
+        cell_cache=cell_cache,
     )
@@ -0,0 +1,172 @@
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
+
+import orjson
+
+from database.helper import db_helper
+from modules.geo_service import GeoService
+from .dependencies import get_pg_mark_repository
+from .schemas import MarkExportParams
+
+# Сколько строк читается из серверного курсора за раз
+EXPORT_PARTITION_SIZE: int = 5000
+
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "geojson": "application/geo+json",
+    "csv": "text/csv",
+}
+GZIP_MEDIA_TYPE: str = "application/gzip"
+
+CSV_COLUMNS = [
+    "id",
+    "mark_name",
+    "owner_id",
+    "category_id",
+    "additional_info",
+    "latitude",
+    "longitude",
+    "start_at",
+    "end_at",
+    "is_ended",
+]
+
+
+class GeoJSONExportWriter:
+    """
+    Incremental FeatureCollection: header, features of every partition, footer
+    """
+
+    def __init__(self):
+        self._first = True
+
+    @staticmethod
+    def header() -> bytes:
+        return b'{"type":"FeatureCollection","features":['
+
+    def write(self, rows: Iterable[Any]) -> bytes:
+        chunk = b",".join(orjson.dumps(self.to_feature(row)) for row in rows)
+        if not chunk:
+            return b""
+        if self._first:
+            self._first = False
+            return chunk
+        return b"," + chunk
+
+    @staticmethod
+    def footer() -> bytes:
+        return b"]}"
+
+    @staticmethod
+    def to_feature(row: Any) -> Dict[str, Any]:
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [row.longitude, row.latitude]},
+            "properties": {
+                "id": row.id,
+                "mark_name": row.mark_name,
+                "owner_id": row.owner_id,
+                "category_id": row.category_id,
+                "additional_info": row.additional_info,
+                "start_at": row.start_at,
+                "end_at": row.end_at,
+                "is_ended": row.is_ended,
+            },
+        }
+
+
+class CsvExportWriter:
+    """
+    Incremental CSV with header row
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def header(self) -> bytes:
+        self._writer.writerow(CSV_COLUMNS)
+        return self._flush()
+
+    def write(self, rows: Iterable[Any]) -> bytes:
+        self._writer.writerows(
+            [getattr(row, column) for column in CSV_COLUMNS] for row in rows
+        )
+        return self._flush()
+
+    @staticmethod
+    def footer() -> bytes:
+        return b""
+
+    def _flush(self) -> bytes:
+        result = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return result
+
+
+def get_export_writer(params: MarkExportParams):
+    return CsvExportWriter() if params.format == "csv" else GeoJSONExportWriter()
+
+
+def get_export_filename(params: MarkExportParams) -> str:
+    filename = f"marks.{params.format}"
+    return f"{filename}.gz" if params.gzip else filename
+
+
+class GzipChunks:
+    """
+    On the fly gzip of chunks, output is one valid gzip stream
+    """
+
+    def __init__(self, level: int = 6):
+        # wbits=31: формат gzip (заголовок и crc), а не голый zlib
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def stream_marks_export(
+    params: MarkExportParams, geo_service: Optional[GeoService] = None
+) -> AsyncIterator[bytes]:
+    """
+    Marks as GeoJSON or CSV file, read by server-side cursor.
+    Memory does not depend on number of exported marks.
+    :param params: Export params
+    :param geo_service: GeoService
+    :return: Async iterator of response chunks
+    """
+    geo_service = geo_service if geo_service is not None else GeoService()
+    return _stream_marks_export(params, geo_service)
+
+
+async def _stream_marks_export(
+    params: MarkExportParams, geo_service: GeoService
+) -> AsyncIterator[bytes]:
+    writer = get_export_writer(params)
+    gzip = GzipChunks() if params.gzip else None
+    # Своя сессия: ответ отдается после выхода из зависимостей запроса
+    async with db_helper.session_factory() as session:
+        mark_repo = await get_pg_mark_repository(session, geo_service)
+        chunks = _iter_export_chunks(
+            writer, mark_repo.stream_export_rows(params, EXPORT_PARTITION_SIZE)
+        )
+        async for chunk in chunks:
+            if gzip is not None:
+                chunk = gzip.compress(chunk)
+            if chunk:
+                yield chunk
+    if gzip is not None:
+        yield gzip.flush()
+
+
+async def _iter_export_chunks(writer, partitions) -> AsyncIterator[bytes]:
+    yield writer.header()
+    async for rows in partitions:
+        yield writer.write(rows)
+    yield writer.footer()
@@ -1,21 +1,51 @@
+import base64
+import binascii
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import List
+from math import ceil
+from typing import List, Optional, Tuple, Union
 
+import orjson
 from geoalchemy2.functions import ST_SetSRID
 
-from modules.geo_service.service import GeoService
-from modules.mark.schemas.request import MarkRequestParams
+from core.config import conf
+from errors.http2 import ValidationError
+from modules.geo_service.service import GeoService, MAX_COVER_CELLS
+from modules.mark.schemas.base import Coordinates
+from modules.mark.schemas.params import MarkBBoxParams, MarkRequestParams
 
 DEFAULT_RADIUS_METERS: int = 5000
 
 
+def encode_cursor(distance: float, mark_id: int) -> str:
+    """
+    Opaque cursor of the next page: (distance, id) of the last mark on the page
+    """
+    raw = orjson.dumps([distance, mark_id])
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        distance, mark_id = orjson.loads(raw)
+        return float(distance), int(mark_id)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise ValidationError(
+            field="cursor",
+            user_input=cursor,
+            input_type="string",
+            detail="Invalid cursor",
+        )
+
+
 @dataclass(frozen=True)
 class MarkFilter:
     latitude: float
     longitude: float
 
-    geohash_neighbors: List[str]
+    # Ячейки геохэша (одной точности), покрывающие круг поиска
+    geohash_cells: List[str]
 
     duration: int
     min_start: datetime
@@ -31,13 +61,25 @@ class MarkFilter:
 
     date: datetime = datetime.now()
 
+    # Размер страницы, None - без сортировки и ограничения (потоковая выдача)
+    limit: Optional[int] = None
+    # (distance, id) последней метки предыдущей страницы
+    after: Optional[Tuple[float, int]] = None
+
+    # (south, west, north, east) в режиме viewport, точка и радиус тогда -
+    # центр и описанный вокруг прямоугольника круг
+    bbox: Optional[Tuple[float, float, float, float]] = None
+
     @classmethod
     def from_request(
-        cls, req: "MarkRequestParams", geo_service: "GeoService" = GeoService()
+        cls,
+        req: Union["MarkRequestParams", "MarkBBoxParams"],
+        geo_service: "GeoService" = GeoService(),
     ) -> "MarkFilter":
+        if isinstance(req, MarkBBoxParams):
+            return cls.from_bbox(req, geo_service)
         current_point = geo_service.create_point(req, req.srid)
-        geohash = geo_service.get_geohash(req)
-        geohash_neighbors = geo_service.get_neighbors(geohash, True)
+        geohash_cells = geo_service.cover_cells(req, req.radius)
 
         min_start = req.date - timedelta(req.duration)
         max_end = req.date + timedelta(req.duration)
@@ -45,7 +87,7 @@ class MarkFilter:
         return cls(
             latitude=req.latitude,
             longitude=req.longitude,
-            geohash_neighbors=geohash_neighbors,
+            geohash_cells=geohash_cells,
             duration=req.duration,
             min_start=min_start,
             max_end=max_end,
@@ -54,4 +96,68 @@ class MarkFilter:
             radius=req.radius,
             srid=srid,
             date=req.date,
+            limit=req.limit or conf.mark.max_page_size,
+            after=decode_cursor(req.cursor) if req.cursor else None,
+        )
+
+    @classmethod
+    def from_bbox(
+        cls, req: "MarkBBoxParams", geo_service: "GeoService" = GeoService()
+    ) -> "MarkFilter":
+        bbox = (
+            req.min_latitude,
+            req.min_longitude,
+            req.max_latitude,
+            req.max_longitude,
+        )
+        south, west, north, east = bbox
+        # Прямоугольник через антимеридиан: west > east
+        longitude = (west + east + (360.0 if west > east else 0.0)) / 2
+        if longitude > 180.0:
+            longitude -= 360.0
+        center = Coordinates(latitude=(south + north) / 2, longitude=longitude)
+        radius = max(
+            geo_service.distance(center.latitude, center.longitude, lat, lon)
+            for lat in (south, north)
+            for lon in (west, east)
+        )
+        precision = geo_service.get_bbox_precision(*bbox, max_cells=MAX_COVER_CELLS)
+
+        return cls(
+            latitude=center.latitude,
+            longitude=center.longitude,
+            geohash_cells=geo_service.get_cells_in_bbox(*bbox, precision),
+            duration=req.duration,
+            min_start=req.date - timedelta(req.duration),
+            max_end=req.date + timedelta(req.duration),
+            current_point=geo_service.create_point(center, req.srid),
+            show_ended=req.show_ended,
+            radius=ceil(radius),
+            srid=req.srid,
+            date=req.date,
+            limit=req.limit or conf.mark.max_page_size,
+            after=decode_cursor(req.cursor) if req.cursor else None,
+            bbox=bbox,
         )
+
+    def contains(self, latitude: float, longitude: float, distance: float) -> bool:
+        """
+        Point is in search area: in bounding box or in radius
+        :param latitude: Point latitude
+        :param longitude: Point longitude
+        :param distance: Distance from center to point in meters
+        """
+        if self.bbox is None:
+            return distance <= self.radius
+        south, west, north, east = self.bbox
+        if not south <= latitude <= north:
+            return False
+        if west <= east:
+            return west <= longitude <= east
+        return longitude >= west or longitude <= east
+
+    def is_after(self, distance: float, mark_id: int) -> bool:
+        """
+        Mark is on the page after cursor (keyset by distance, id)
+        """
+        return self.after is None or (distance, mark_id) > self.after
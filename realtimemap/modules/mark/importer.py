@@ -0,0 +1,300 @@
+"""
+Массовый импорт меток из CSV или GeoJSON.
+
+Строки проверяются пачками, пачка загружается через COPY во временную
+таблицу, геометрия и геохэш вычисляются одним INSERT ... SELECT в PostGIS.
+
+Запуск: python -m modules.mark.importer marks.geojson --owner-id 1
+"""
+
+import argparse
+import asyncio
+import csv
+import logging
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select, text
+
+from core.config import conf
+from modules.category.model import Category
+from modules.user.model import User
+from utils.geom.geom_sector import GEOHASH_PRECISION
+from .cache import MarkCellCache, MarkTileCache
+from .index import MARK_INDEX_CHANNEL, IndexAction
+from .schemas import ImportMarkRow
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE: int = 5000
+IMPORT_TABLE: str = "mark_import"
+IMPORT_COLUMNS = [
+    "mark_name",
+    "latitude",
+    "longitude",
+    "owner_id",
+    "category_id",
+    "additional_info",
+    "start_at",
+    "duration",
+]
+
+# Таблица живет до конца транзакции пачки: после commit следующая пачка
+# может получить другое соединение пула
+CREATE_IMPORT_TABLE = f"""
+CREATE TEMP TABLE IF NOT EXISTS {IMPORT_TABLE} (
+    mark_name varchar(128),
+    latitude double precision,
+    longitude double precision,
+    owner_id integer,
+    category_id integer,
+    additional_info varchar(256),
+    start_at timestamp,
+    duration integer
+) ON COMMIT DROP
+"""
+
+INSERT_IMPORTED_MARKS = f"""
+INSERT INTO marks (
+    mark_name, geom, geohash, owner_id, category_id, additional_info,
+    start_at, duration, is_ended, created_at, updated_at
+)
+SELECT mark_name, point, ST_GeoHash(point, {GEOHASH_PRECISION}), owner_id,
+       category_id, additional_info, start_at, duration,
+       start_at + duration * interval '1 hour' <= now(), now(), now()
+FROM (
+    SELECT *, ST_SetSRID(ST_MakePoint(longitude, latitude), 4326) AS point
+    FROM {IMPORT_TABLE}
+) AS rows
+RETURNING id, ST_Y(geom), ST_X(geom)
+"""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    imported: int = 0
+    errors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def skipped(self) -> int:
+        return self.rows - self.imported
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.imported / self.seconds if self.seconds else 0.0
+
+
+def read_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Rows of CSV with header: latitude, longitude, mark_name, category_id,
+    and optional owner_id, start_at, duration, additional_info
+    """
+    with open(path, newline="", encoding="utf-8") as file:
+        for row in csv.DictReader(file):
+            yield {key: value for key, value in row.items() if value != ""}
+
+
+def read_geojson(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Rows from FeatureCollection of points, fields are taken from properties
+    """
+    with open(path, "rb") as file:
+        data = orjson.loads(file.read())
+    for feature in data.get("features", []):
+        geometry = feature.get("geometry") or {}
+        row = dict(feature.get("properties") or {})
+        if geometry.get("type") == "Point":
+            row["longitude"], row["latitude"] = geometry["coordinates"][:2]
+        yield row
+
+
+class MarkImporter:
+    """
+    Bulk importer of marks through asyncpg copy_records_to_table.
+    Every chunk is committed separately, caches and in-memory indexes
+    of the application are updated after commit.
+    """
+
+    def __init__(
+        self,
+        session: "AsyncSession",
+        owner_id: Optional[int] = None,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        redis: Optional["Redis"] = None,
+        commit: bool = True,
+    ):
+        self.session = session
+        self.owner_id = owner_id
+        self.chunk_size = chunk_size
+        self.redis = redis
+        self.commit = commit
+        self._categories: Set[int] = set()
+        self._owners: Set[int] = set()
+
+    async def import_rows(self, rows: Iterable[Dict[str, Any]]) -> ImportResult:
+        result = ImportResult()
+        started = time.perf_counter()
+
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            valid = self.validate_chunk(chunk, result)
+            valid = await self.filter_references(valid, result)
+            points = await self.copy_chunk(valid) if valid else []
+            result.imported += len(points)
+
+            if self.commit:
+                await self.session.commit()
+                await self.after_commit(points)
+            result.seconds = time.perf_counter() - started
+            logger.info(
+                f"Imported {result.imported}/{result.rows} marks, "
+                f"{result.rows_per_second:.0f} rows/s"
+            )
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def validate_chunk(
+        self, chunk: List[Dict[str, Any]], result: ImportResult
+    ) -> List[ImportMarkRow]:
+        valid = []
+        for row in chunk:
+            result.rows += 1
+            try:
+                item = ImportMarkRow.model_validate(row)
+            except ValidationError as e:
+                result.errors.append(f"Row {result.rows}: {e.errors()[0]['msg']}")
+                continue
+            if item.owner_id is None:
+                item.owner_id = self.owner_id
+            if item.owner_id is None:
+                result.errors.append(f"Row {result.rows}: owner_id is required")
+                continue
+            valid.append(item)
+        return valid
+
+    async def filter_references(
+        self, rows: List[ImportMarkRow], result: ImportResult
+    ) -> List[ImportMarkRow]:
+        """
+        Drop rows with unknown category or owner. Ids are checked
+        by one query per chunk and remembered for next chunks.
+        """
+        categories = {row.category_id for row in rows}
+        await self._load_ids(Category, categories, self._categories)
+        await self._load_ids(User, {row.owner_id for row in rows}, self._owners)
+        valid = []
+        for row in rows:
+            if row.category_id not in self._categories:
+                result.errors.append(f"Unknown category: {row.category_id}")
+            elif row.owner_id not in self._owners:
+                result.errors.append(f"Unknown owner: {row.owner_id}")
+            else:
+                valid.append(row)
+        return valid
+
+    async def copy_chunk(self, rows: List[ImportMarkRow]) -> List[Any]:
+        """
+        COPY chunk to temporary table and move it to marks.
+        Table is created in the transaction of the chunk.
+        :return: (id, latitude, longitude) of inserted marks
+        """
+        records = [
+            (
+                row.mark_name,
+                row.latitude,
+                row.longitude,
+                row.owner_id,
+                row.category_id,
+                row.additional_info,
+                self._naive(row.start_at),
+                row.duration,
+            )
+            for row in rows
+        ]
+        await self.session.execute(text(CREATE_IMPORT_TABLE))
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            IMPORT_TABLE, records=records, columns=IMPORT_COLUMNS
+        )
+        inserted = (await self.session.execute(text(INSERT_IMPORTED_MARKS))).all()
+        await self.session.execute(text(f"TRUNCATE {IMPORT_TABLE}"))
+        return inserted
+
+    async def after_commit(self, points: List[Any]) -> None:
+        if self.redis is None or not points:
+            return
+        try:
+            if conf.mark.repository == "memory":
+                ids = [row[0] for row in points]
+                await self.redis.publish(
+                    MARK_INDEX_CHANNEL,
+                    orjson.dumps({"action": IndexAction.UPSERT, "ids": ids}),
+                )
+            coords = [(latitude, longitude) for _, latitude, longitude in points]
+            await MarkTileCache(self.redis).invalidate(coords)
+            await MarkCellCache(self.redis).invalidate(coords)
+        except Exception as e:
+            logger.error(f"Error on sync imported marks: {e}")
+
+    async def _load_ids(self, model, ids: Set[int], known: Set[int]) -> None:
+        ids = ids - known
+        if ids:
+            known.update(
+                await self.session.scalars(select(model.id).where(model.id.in_(ids)))
+            )
+
+    @staticmethod
+    def _naive(value):
+        # start_at хранится без часового пояса, как datetime.now()
+        if value.tzinfo is None:
+            return value
+        return value.astimezone().replace(tzinfo=None)
+
+
+async def main(args: argparse.Namespace) -> None:
+    from redis import asyncio as asyncredis
+
+    from database.helper import db_helper
+
+    reader = read_csv if args.format == "csv" else read_geojson
+    redis = asyncredis.from_url(str(conf.redis.url))
+    try:
+        async with db_helper.session_factory() as session:
+            importer = MarkImporter(
+                session, owner_id=args.owner_id, chunk_size=args.chunk_size, redis=redis
+            )
+            result = await importer.import_rows(reader(args.path))
+    finally:
+        await redis.close()
+        await db_helper.dispose()
+
+    for error in result.errors[:20]:
+        print(error)
+    print(
+        f"Rows: {result.rows}, imported: {result.imported}, "
+        f"skipped: {result.skipped}, {result.seconds:.2f} s, "
+        f"{result.rows_per_second:.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import of marks")
+    parser.add_argument("path", help="CSV or GeoJSON file")
+    parser.add_argument("--format", choices=["csv", "geojson"])
+    parser.add_argument("--owner-id", type=int, help="Owner of rows without owner_id")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    arguments = parser.parse_args()
+    if arguments.format is None:
+        arguments.format = "csv" if arguments.path.endswith(".csv") else "geojson"
+    asyncio.run(main(arguments))
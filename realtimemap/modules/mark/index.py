@@ -0,0 +1,262 @@
+import asyncio
+import heapq
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from core.config import conf
+from modules.geo_service import GeoService
+from .filters import MarkFilter
+from .model import Mark
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+MARK_INDEX_CHANNEL: str = f"{conf.redis.prefix}:mark-index"
+
+
+class IndexAction:
+    UPSERT = "upsert"
+    REMOVE = "remove"
+
+
+@dataclass(slots=True)
+class IndexedMark:
+    mark: Mark
+    latitude: float
+    longitude: float
+    start_at: datetime
+    end_at: datetime
+    cell: str
+
+
+class MarkIndex:
+    """
+    In-process spatial index of not ended marks.
+    Marks are bucketed by geohash cell, radius queries are refined by
+    exact haversine distance.
+    """
+
+    def __init__(self, precision: int = 5, geo_service: Optional[GeoService] = None):
+        self.precision = precision
+        self.geo_service = geo_service if geo_service is not None else GeoService()
+        self.ready: bool = False
+        self._cells: Dict[str, Dict[int, IndexedMark]] = {}
+        self._marks: Dict[int, IndexedMark] = {}
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+    def upsert(self, mark: Mark) -> None:
+        """
+        Add mark to index or replace existing one. Ended marks are removed.
+        :param mark: Mark with loaded category
+        :return: None
+        """
+        self.remove(mark.id)
+        if mark.is_ended:
+            return
+
+        latitude, longitude = self.geo_service.get_lat_lon(mark.geom)
+        item = IndexedMark(
+            mark=mark,
+            latitude=latitude,
+            longitude=longitude,
+            start_at=mark.start_at,
+            end_at=mark.end_at,
+            cell="",
+        )
+        item.cell = self.geo_service.get_geohash(item, self.precision)
+        self._marks[mark.id] = item
+        self._cells.setdefault(item.cell, {})[mark.id] = item
+
+    def remove(self, mark_id: int) -> None:
+        item = self._marks.pop(mark_id, None)
+        if item is None:
+            return
+        bucket = self._cells.get(item.cell)
+        if bucket is not None:
+            bucket.pop(mark_id, None)
+            if not bucket:
+                del self._cells[item.cell]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._marks.clear()
+        self.ready = False
+
+    def query(self, filters: "MarkFilter") -> List[Mark]:
+        """
+        Method for get marks in radius or bbox. Semantic is the same as
+        PgMarkRepository.get_marks with show_ended=False
+        """
+        return [item.mark for _, item in self.query_items(filters)]
+
+    def query_items(self, filters: "MarkFilter") -> List[Tuple[float, IndexedMark]]:
+        """
+        Same as query, but returns (distance, item) pairs with decoded coordinates
+        """
+        result = []
+        for bucket in self._get_buckets(filters):
+            for item in bucket.values():
+                if item.start_at > filters.max_end:
+                    continue
+                if item.end_at <= filters.min_start:
+                    continue
+                distance = self.geo_service.distance(
+                    filters.latitude, filters.longitude, item.latitude, item.longitude
+                )
+                if not filters.contains(item.latitude, item.longitude, distance):
+                    continue
+                if filters.is_after(distance, item.mark.id):
+                    result.append((distance, item))
+        if filters.limit is None:
+            return result
+        # Ближайшие первыми, лишняя метка - признак следующей страницы
+        return heapq.nsmallest(
+            filters.limit + 1, result, key=lambda pair: (pair[0], pair[1].mark.id)
+        )
+
+    def _get_buckets(self, filters: "MarkFilter") -> List[Dict[int, IndexedMark]]:
+        """
+        Buckets of cells, which intersect search area.
+        Big bbox is not split into cells, all buckets are checked.
+        """
+        if filters.bbox is None:
+            cells = self.geo_service.get_cells_in_radius(
+                filters, filters.radius, self.precision
+            )
+        else:
+            precision = self.geo_service.get_bbox_precision(
+                *filters.bbox, max_precision=self.precision
+            )
+            if precision < self.precision:
+                return list(self._cells.values())
+            cells = self.geo_service.get_cells_in_bbox(*filters.bbox, self.precision)
+        return [self._cells[cell] for cell in cells if cell in self._cells]
+
+    async def load(self, session: "AsyncSession", ids: Iterable[int]) -> None:
+        """
+        Reload marks from database by ids
+        :param session: Database session
+        :param ids: Marks ids
+        :return: None
+        """
+        ids = list(ids)
+        stmt = select(Mark).where(Mark.id.in_(ids)).options(joinedload(Mark.category))
+        marks = {mark.id: mark for mark in await session.scalars(stmt)}
+        for mark_id in ids:
+            mark = marks.get(mark_id)
+            if mark is None:
+                self.remove(mark_id)
+            else:
+                self.upsert(mark)
+
+    async def warm(self, session: "AsyncSession") -> int:
+        """
+        Fill index with all not ended marks
+        :param session: Database session
+        :return: Count of indexed marks
+        """
+        self.clear()
+        stmt = (
+            select(Mark)
+            .where(Mark.is_ended.is_(False))
+            .options(joinedload(Mark.category))
+            .execution_options(yield_per=1000)
+        )
+        result = await session.stream_scalars(stmt)
+        async for mark in result:
+            self.upsert(mark)
+        self.ready = True
+        return len(self)
+
+
+class MarkIndexSync:
+    """
+    Keeps MarkIndex of every worker up to date through Redis pub/sub.
+    Without Redis changes are applied only to the local index.
+    """
+
+    def __init__(self, index: MarkIndex, channel: str = MARK_INDEX_CHANNEL):
+        self.index = index
+        self.channel = channel
+        self.redis: Optional["Redis"] = None
+        self.session_factory: Optional["async_sessionmaker"] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(
+        self, session_factory: "async_sessionmaker", redis: Optional["Redis"] = None
+    ) -> None:
+        self.session_factory = session_factory
+        self.redis = redis
+        if redis is not None:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(self.channel)
+            self._listener = asyncio.create_task(self._listen(pubsub))
+
+        async with session_factory() as session:
+            count = await self.index.warm(session)
+        logger.info(f"Mark index warmed: {count} marks")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self.index.clear()
+
+    def schedule(self, action: str, ids: List[int]) -> None:
+        """
+        Publish changes without waiting for the result.
+        """
+        if not self.index.ready:
+            return
+        task = asyncio.get_running_loop().create_task(self.publish(action, ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def publish(self, action: str, ids: List[int]) -> None:
+        try:
+            if self.redis is None:
+                await self.apply(action, ids)
+                return
+            await self.redis.publish(
+                self.channel, orjson.dumps({"action": action, "ids": ids})
+            )
+        except Exception as e:
+            logger.error(f"Error on publish mark index changes: {e}")
+
+    async def apply(self, action: str, ids: List[int]) -> None:
+        if action == IndexAction.REMOVE:
+            for mark_id in ids:
+                self.index.remove(mark_id)
+            return
+
+        async with self.session_factory() as session:
+            await self.index.load(session, ids)
+
+    async def _listen(self, pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    data = orjson.loads(message["data"])
+                    await self.apply(data["action"], data["ids"])
+                except Exception as e:
+                    logger.error(f"Error on apply mark index changes: {e}")
+        finally:
+            await pubsub.reset()
+
+
+mark_index = MarkIndex(precision=conf.mark.index_precision)
+mark_index_sync = MarkIndexSync(mark_index)
@@ -1,8 +1,23 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import TYPE_CHECKING, List
 
 from geoalchemy2 import Geometry
-from sqlalchemy import ForeignKey, String, Index, DateTime, Integer, Boolean
+from sqlalchemy import (
+    ForeignKey,
+    String,
+    Index,
+    DateTime,
+    Integer,
+    Boolean,
+    BigInteger,
+    Computed,
+    text,
+    FetchedValue,
+    Float,
+    UniqueConstraint,
+    DDL,
+    event,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy_file import ImageField
 
@@ -15,6 +30,9 @@ if TYPE_CHECKING:
     from modules.mark_comment.model import Comment
     from fastapi import Request
 
+# Максимальная длина префикса геохэша, для которой хранится статистика кластеров
+CLUSTER_MAX_PRECISION: int = 6
+
 
 class Mark(BaseSqlModel, IntIdMixin, TimeMarkMixin):
     mark_name: Mapped[str] = mapped_column(String(128), nullable=False)
@@ -42,15 +60,55 @@ class Mark(BaseSqlModel, IntIdMixin, TimeMarkMixin):
 
     start_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     duration: Mapped[int] = mapped_column(Integer, nullable=False, default=12)
+    # start_at + duration часов, вычисляется на стороне БД
+    end_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        Computed("start_at + duration * interval '1 hour'", persisted=True),
+    )
 
     is_ended: Mapped[bool] = mapped_column(
         Boolean, default=False, server_default="false", nullable=False
     )
     geohash: Mapped[str] = mapped_column(String(64), nullable=False)
+    # Версия изменения - id транзакции (xid8), которая записала строку.
+    # В отличие от updated_at (время начала транзакции) вместе с
+    # pg_snapshot_xmin позволяет не пропускать поздно закоммиченные изменения.
+    # При UPDATE выставляется триггером marks_version, в том числе для сырого SQL
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("(pg_current_xact_id()::text::bigint)"),
+        server_onupdate=FetchedValue(),
+        nullable=False,
+    )
 
     # RS
     comments: Mapped[List["Comment"]] = relationship(back_populates="mark")
-    __table_args__ = (Index("idx_locations_geom", geom, postgresql_using="gist"),)
+    __table_args__ = (
+        Index("idx_locations_geom", geom, postgresql_using="gist"),
+        # Индекс для метрических радиусных запросов (ST_DWithin по geography)
+        Index(
+            "idx_marks_geom_geography",
+            text("geography(geom)"),
+            postgresql_using="gist",
+        ),
+        # Составной индекс "рядом" + "активна в интервале" для не завершенных меток
+        Index(
+            "idx_marks_active_geography_time",
+            text("geography(geom)"),
+            text("tsrange(start_at, end_at)"),
+            postgresql_using="gist",
+            postgresql_where=text("is_ended = false"),
+        ),
+        # Ячейка кэша меток (CELL_CACHE_PRECISION) для не завершенных меток
+        Index(
+            "idx_marks_active_geohash_cell",
+            text("left(geohash, 5)"),
+            postgresql_where=text("is_ended = false"),
+        ),
+        Index("idx_marks_version", "version"),
+    )
+    # end_at возвращается из INSERT ... RETURNING
+    __mapper_args__ = {"eager_defaults": True}
 
     @property
     def check_ended(self) -> bool:
@@ -58,19 +116,172 @@ class Mark(BaseSqlModel, IntIdMixin, TimeMarkMixin):
             return True
         return False
 
-    @property
-    def end_at(self) -> datetime:
-        """
-        Calculates the end datetime by adding the duration to the start datetime.
-
-        Returns:
-            datetime: The calculated end datetime, which is the start_at datetime plus
-                     the duration in hours.
-        """
-        return self.start_at + timedelta(hours=self.duration)
-
     def __str__(self):
         return f"{self.mark_name}: {self.id}"
 
     def __admin_repr__(self, _: "Request") -> str:
         return f"Mark #{self.id}: {self.mark_name}"
+
+
+class MarkCellStat(BaseSqlModel, IntIdMixin):
+    """
+    Pre-aggregated not ended marks per geohash cell and category.
+    Rows for prefixes 1..CLUSTER_MAX_PRECISION of mark geohash are kept
+    up to date by marks_cell_stats trigger, so every write path
+    (ORM, bulk update of ended marks, admin) is counted.
+    """
+
+    cell: Mapped[str] = mapped_column(String(CLUSTER_MAX_PRECISION), nullable=False)
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("categories.id", ondelete="CASCADE"), nullable=False
+    )
+    marks_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Суммы координат для вычисления центроида: sum / marks_count
+    latitude_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    longitude_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("cell", "category_id", name="uq_mark_cell_stat_category"),
+    )
+
+
+class MarkTombstone(BaseSqlModel, IntIdMixin):
+    """
+    Former position of deleted or moved mark for delta sync.
+    Rows are written by marks_tombstone trigger, so cascade deletes
+    and admin actions are recorded too.
+    """
+
+    mark_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    geom: Mapped[Geometry] = mapped_column(
+        Geometry(geometry_type="POINT", srid=4326, spatial_index=False),
+        nullable=False,
+    )
+    geohash: Mapped[str] = mapped_column(String(64), nullable=False)
+    version: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text("(pg_current_xact_id()::text::bigint)"),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        Index("idx_mark_tombstones_geom", geom, postgresql_using="gist"),
+        Index("idx_mark_tombstones_version", "version"),
+    )
+
+
+MARK_CELL_STATS_FUNCTION = f"""
+CREATE OR REPLACE FUNCTION mark_cell_stats_apply(
+    p_geohash varchar, p_category_id integer, p_geom geometry, p_sign integer
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO mark_cell_stats (
+        cell, category_id, marks_count, latitude_sum, longitude_sum
+    )
+    SELECT left(p_geohash, prefix_len), p_category_id, p_sign,
+           p_sign * ST_Y(p_geom), p_sign * ST_X(p_geom)
+    FROM generate_series(1, {CLUSTER_MAX_PRECISION}) AS prefix_len
+    ON CONFLICT (cell, category_id) DO UPDATE SET
+        marks_count = mark_cell_stats.marks_count + EXCLUDED.marks_count,
+        latitude_sum = mark_cell_stats.latitude_sum + EXCLUDED.latitude_sum,
+        longitude_sum = mark_cell_stats.longitude_sum + EXCLUDED.longitude_sum;
+
+    IF p_sign < 0 THEN
+        DELETE FROM mark_cell_stats
+        WHERE category_id = p_category_id
+          AND cell = ANY (
+              SELECT left(p_geohash, prefix_len)
+              FROM generate_series(1, {CLUSTER_MAX_PRECISION}) AS prefix_len
+          )
+          AND marks_count <= 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION marks_cell_stats_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF NOT OLD.is_ended THEN
+            PERFORM mark_cell_stats_apply(OLD.geohash, OLD.category_id, OLD.geom, -1);
+        END IF;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF NOT NEW.is_ended THEN
+            PERFORM mark_cell_stats_apply(NEW.geohash, NEW.category_id, NEW.geom, 1);
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_CELL_STATS_TRIGGER = """
+CREATE TRIGGER marks_cell_stats
+AFTER INSERT OR DELETE OR UPDATE OF geom, geohash, category_id, is_ended ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_cell_stats_trigger();
+"""
+
+MARK_TOMBSTONE_FUNCTION = """
+CREATE OR REPLACE FUNCTION marks_tombstone_trigger() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR NOT ST_Equals(OLD.geom, NEW.geom) THEN
+        INSERT INTO mark_tombstones (mark_id, geom, geohash)
+        VALUES (OLD.id, OLD.geom, OLD.geohash);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_TOMBSTONE_TRIGGER = """
+CREATE TRIGGER marks_tombstone
+AFTER DELETE OR UPDATE OF geom ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_tombstone_trigger();
+"""
+
+MARK_VERSION_FUNCTION = """
+CREATE OR REPLACE FUNCTION marks_version_trigger() RETURNS trigger AS $$
+BEGIN
+    NEW.version := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MARK_VERSION_TRIGGER = """
+CREATE TRIGGER marks_version
+BEFORE UPDATE ON marks
+FOR EACH ROW EXECUTE FUNCTION marks_version_trigger();
+"""
+
+# Для create_all (тесты), в БД триггер создается миграцией
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_CELL_STATS_FUNCTION).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_CELL_STATS_TRIGGER).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_TOMBSTONE_FUNCTION).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_TOMBSTONE_TRIGGER).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_VERSION_FUNCTION).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Mark.__table__,
+    "after_create",
+    DDL(MARK_VERSION_TRIGGER).execute_if(dialect="postgresql"),
+)
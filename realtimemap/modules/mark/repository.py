@@ -1,16 +1,31 @@
-from datetime import timedelta
-from typing import TYPE_CHECKING, Optional, List
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional, List, Any, AsyncIterator
 
-from geoalchemy2.functions import ST_DWithin, ST_Transform, ST_AsGeoJSON
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from geoalchemy2.functions import ST_DWithin, ST_AsGeoJSON
+from sqlalchemy import (
+    select,
+    func,
+    not_,
+    or_,
+    tuple_,
+    BigInteger,
+    Float,
+    Integer,
+    String,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.orm import joinedload, aliased
 
 from core.common.repository import MarkRepository
 from database.adapter import PgAdapter
+from modules.category.model import Category
 from modules.geo_service import GeoService
+from .cache import TILE_EXTENT, TILE_LAYER
 from .filters import MarkFilter
-from .model import Mark
-from .schemas import CreateMark, UpdateMark
+from .index import MarkIndex, MarkIndexSync, IndexAction, mark_index, mark_index_sync
+from .model import Mark, MarkCellStat, MarkTombstone
+from .schemas import CreateMark, UpdateMark, MarkExportParams
+from .serializer import MarkRow
 
 if TYPE_CHECKING:
     pass
@@ -30,26 +45,116 @@ class PgMarkRepository(MarkRepository):
         self.geo_service = geo_service if geo_service is not None else GeoService()
         self.adapter = adapter
 
-    async def get_marks(self, filters: "MarkFilter") -> List[Mark]:
+    @staticmethod
+    def get_radius_condition(filters: "MarkFilter", model=Mark):
+        """
+        Radius predicate in meters. geography(geom) matches expression
+        of idx_marks_geom_geography index, so the planner can use it.
+        """
+        return ST_DWithin(
+            func.geography(model.geom),
+            func.geography(filters.current_point),
+            filters.radius,
+        )
+
+    @staticmethod
+    def get_cells_condition(filters: "MarkFilter", model=Mark):
+        """
+        Geohash prefilter: prefix of stored geohash is one of the cover cells
+        """
+        precision = len(filters.geohash_cells[0])
+        return func.left(model.geohash, precision).in_(filters.geohash_cells)
+
+    @classmethod
+    def get_bbox_condition(cls, filters: "MarkFilter", model=Mark):
+        """
+        Viewport predicate: && by geom uses idx_locations_geom.
+        """
+        return cls.get_envelope_condition(filters.bbox, filters.srid, model)
+
+    @staticmethod
+    def get_envelope_condition(bbox: tuple, srid: int = 4326, model=Mark):
+        """
+        (south, west, north, east) box predicate by geom.
+        Box crossing the antimeridian is split in two envelopes.
+        """
+        south, west, north, east = bbox
+        if west <= east:
+            envelopes = [(west, east)]
+        else:
+            envelopes = [(west, 180.0), (-180.0, east)]
+        return or_(
+            *(
+                model.geom.op("&&")(
+                    func.ST_MakeEnvelope(left, south, right, north, srid)
+                )
+                for left, right in envelopes
+            )
+        )
+
+    @staticmethod
+    def get_time_condition(filters: "MarkFilter"):
+        """
+        Mark activity range [start_at, end_at) overlaps the search window.
+        tsrange(start_at, end_at) matches idx_marks_active_geography_time.
+        """
+        return func.tsrange(Mark.start_at, Mark.end_at).op("&&")(
+            func.tsrange(filters.min_start, filters.max_end, "[]")
+        )
+
+    @staticmethod
+    def get_distance(filters: "MarkFilter"):
+        """
+        KNN distance in meters. <-> by geography(geom) is served by
+        idx_marks_geom_geography in ORDER BY, nearest marks first.
+        """
+        return func.geography(Mark.geom).op("<->", return_type=Float)(
+            func.geography(filters.current_point)
+        )
+
+    def paginate(self, query, filters: "MarkFilter"):
+        """
+        Nearest first ordering, keyset by (distance, id) and page limit.
+        One extra row is selected to know if there is a next page.
+        """
+        if filters.limit is None:
+            return query
+        distance = self.get_distance(filters)
+        if filters.after is not None:
+            query = query.where(tuple_(distance, Mark.id) > tuple_(*filters.after))
+        return query.order_by(distance, Mark.id).limit(filters.limit + 1)
+
+    def get_area_conditions(self, filters: "MarkFilter", model=Mark) -> list:
+        """
+        Search area: bounding box or geohash prefilter with radius.
+        model is Mark or MarkTombstone, both have geom and geohash.
+        """
+        if filters.bbox is not None:
+            return [self.get_bbox_condition(filters, model)]
+        return [
+            self.get_cells_condition(filters, model),
+            self.get_radius_condition(filters, model),
+        ]
+
+    def get_conditions(self, filters: "MarkFilter") -> list:
         # Условия фильтрации
         conditions = [
-            Mark.geohash.in_(filters.geohash_neighbors),
-            ST_DWithin(
-                ST_Transform(Mark.geom, 3857),
-                ST_Transform(filters.current_point, 3857),
-                filters.radius,
-            ),
-            Mark.start_at <= filters.max_end,
-            Mark.start_at + timedelta(hours=filters.duration) >= filters.min_start,
+            *self.get_area_conditions(filters),
+            self.get_time_condition(filters),
         ]
         if not filters.show_ended:
-            conditions.append(Mark.is_ended == filters.show_ended)
+            # NOT is_ended совпадает с предикатом частичного индекса
+            conditions.append(not_(Mark.is_ended))
+        return conditions
 
+    async def get_marks(self, filters: "MarkFilter") -> List[Mark]:
+        conditions = self.get_conditions(filters)
         query = (
             select(Mark, ST_AsGeoJSON(Mark.geom).label("geom"))
             .where(*conditions)
             .options(joinedload(Mark.category))
         )
+        query = self.paginate(query, filters)
 
         return await self.adapter.execute_query(query)
 
@@ -78,6 +183,8 @@ class PgMarkRepository(MarkRepository):
         return mark
 
     async def check_distance(self, filters: "MarkFilter", mark: Mark) -> bool:
+        if filters.bbox is not None:
+            return filters.contains(*self.geo_service.get_lat_lon(mark.geom), 0)
         # Проверка вложена ли метка в радиус пользователя
         exp = self.geo_service.distance_sphere(
             filters.current_point, mark.geom, filters.radius
@@ -90,3 +197,266 @@ class PgMarkRepository(MarkRepository):
 
     async def update_mark(self, mark_id: int, update_data: UpdateMark) -> Mark:
         return await self.adapter.update(mark_id, update_data)
+
+    async def get_tile(
+        self, z: int, x: int, y: int, start: datetime, end: datetime
+    ) -> bytes:
+        envelope = func.ST_TileEnvelope(z, x, y)
+        tile_rows = (
+            select(
+                func.ST_AsMVTGeom(
+                    func.ST_Transform(Mark.geom, 3857), envelope, TILE_EXTENT
+                ).label("geom"),
+                Mark.id,
+                Mark.mark_name,
+                Mark.category_id,
+                func.extract("epoch", Mark.end_at).label("end_at"),
+            )
+            .where(
+                # && по geom использует idx_locations_geom
+                Mark.geom.op("&&")(func.ST_Transform(envelope, 4326)),
+                not_(Mark.is_ended),
+                func.tsrange(Mark.start_at, Mark.end_at).op("&&")(
+                    func.tsrange(start, end)
+                ),
+            )
+            .subquery("tile_rows")
+        )
+        stmt = select(
+            func.ST_AsMVT(tile_rows.table_valued(), TILE_LAYER, TILE_EXTENT, "geom")
+        )
+        result = await self.adapter.execute_scalar(stmt)
+        return bytes(result) if result is not None else b""
+
+    @staticmethod
+    def select_rows():
+        """
+        Query of columns for MarkListSerializer. Coordinates are taken
+        by ST_Y/ST_X, so geometry is not decoded in Python.
+        """
+        category = aliased(Category, name="category")
+        return select(
+            Mark.id,
+            Mark.mark_name,
+            Mark.owner_id,
+            Mark.additional_info,
+            Mark.photo,
+            func.ST_Y(Mark.geom).label("latitude"),
+            func.ST_X(Mark.geom).label("longitude"),
+            Mark.start_at,
+            Mark.end_at,
+            Mark.is_ended,
+            Mark.geohash,
+            category,
+        ).join(Mark.category.of_type(category))
+
+    async def get_marks_rows(self, filters: "MarkFilter") -> List[MarkRow]:
+        query = self.select_rows().where(*self.get_conditions(filters))
+        if filters.limit is not None:
+            query = self.paginate(
+                query.add_columns(self.get_distance(filters).label("distance")),
+                filters,
+            )
+        return await self.adapter.execute_rows(query)
+
+    async def stream_marks_rows(
+        self, filters: "MarkFilter", size: int = 1000, max_rows: Optional[int] = None
+    ) -> AsyncIterator[List[MarkRow]]:
+        query = self.select_rows().where(*self.get_conditions(filters))
+        if max_rows is not None:
+            query = query.limit(max_rows)
+        async for partition in self.adapter.stream_partitions(query, size):
+            yield partition
+
+    @classmethod
+    def select_export_rows(cls, params: "MarkExportParams"):
+        """
+        Flat columns for export, without joins, ordered by id
+        """
+        query = select(
+            Mark.id,
+            Mark.mark_name,
+            Mark.owner_id,
+            Mark.category_id,
+            Mark.additional_info,
+            func.ST_Y(Mark.geom).label("latitude"),
+            func.ST_X(Mark.geom).label("longitude"),
+            Mark.start_at,
+            Mark.end_at,
+            Mark.is_ended,
+        ).order_by(Mark.id)
+        if params.bbox is not None:
+            query = query.where(cls.get_envelope_condition(params.bbox))
+        if params.start is not None:
+            query = query.where(Mark.end_at > params.start)
+        if params.end is not None:
+            query = query.where(Mark.start_at <= params.end)
+        if not params.show_ended:
+            query = query.where(not_(Mark.is_ended))
+        return query
+
+    async def stream_export_rows(
+        self, params: "MarkExportParams", size: int = 1000
+    ) -> AsyncIterator[List[Any]]:
+        query = self.select_export_rows(params)
+        async for partition in self.adapter.stream_partitions(query, size):
+            yield partition
+
+    async def get_active_marks_rows_in_cells(self, cells: List[str]) -> List[MarkRow]:
+        if not cells:
+            return []
+        # left(geohash, 5) совпадает с idx_marks_active_geohash_cell
+        query = self.select_rows().where(
+            func.left(Mark.geohash, len(cells[0])).in_(cells),
+            not_(Mark.is_ended),
+        )
+        return await self.adapter.execute_rows(query)
+
+    async def get_change_version(self) -> int:
+        # Транзакции с id меньше xmin уже завершены: их изменения видны
+        stmt = select(
+            func.pg_snapshot_xmin(func.pg_current_snapshot())
+            .cast(String)
+            .cast(BigInteger)
+        )
+        return await self.adapter.execute_scalar(stmt)
+
+    async def get_changed_marks_rows(
+        self, filters: "MarkFilter", since: int, limit: int
+    ) -> List[MarkRow]:
+        query = (
+            self.select_rows()
+            .where(*self.get_area_conditions(filters), Mark.version >= since)
+            .order_by(Mark.version, Mark.id)
+            .limit(limit)
+        )
+        return await self.adapter.execute_rows(query)
+
+    async def get_deleted_mark_ids(
+        self, filters: "MarkFilter", since: int, limit: int
+    ) -> List[int]:
+        query = (
+            select(MarkTombstone.mark_id)
+            .where(
+                *self.get_area_conditions(filters, MarkTombstone),
+                MarkTombstone.version >= since,
+            )
+            .distinct()
+            .limit(limit)
+        )
+        return await self.adapter.execute_query(query)
+
+    async def get_clusters(self, cells: List[str]) -> List[Any]:
+        if not cells:
+            return []
+        count = func.sum(MarkCellStat.marks_count)
+        # Категория с наибольшим числом меток в ячейке
+        dominant_category = func.array_agg(
+            aggregate_order_by(
+                MarkCellStat.category_id, MarkCellStat.marks_count.desc()
+            ),
+            type_=ARRAY(Integer),
+        )[1]
+        stmt = (
+            select(
+                MarkCellStat.cell,
+                count.label("count"),
+                (func.sum(MarkCellStat.latitude_sum) / count).label("latitude"),
+                (func.sum(MarkCellStat.longitude_sum) / count).label("longitude"),
+                dominant_category.label("category_id"),
+            )
+            .where(MarkCellStat.cell.in_(cells), MarkCellStat.marks_count > 0)
+            .group_by(MarkCellStat.cell)
+        )
+        return await self.adapter.execute_rows(stmt)
+
+
+class MemoryMarkRepository(PgMarkRepository):
+    """
+    Repository for the Mark model, which serves radius queries from the
+    in-process MarkIndex. Writes go to PostgreSQL, index is updated after commit.
+    """
+
+    def __init__(
+        self,
+        adapter: PgAdapter[Mark, CreateMark, UpdateMark],
+        geo_service: Optional[GeoService] = None,
+        index: MarkIndex = mark_index,
+        index_sync: MarkIndexSync = mark_index_sync,
+    ):
+        super().__init__(adapter, geo_service)
+        self.index = index
+        self.index_sync = index_sync
+
+    async def get_marks(self, filters: "MarkFilter") -> List[Mark]:
+        # Индекс хранит только не завершенные метки
+        if filters.show_ended or not self.index.ready:
+            return await super().get_marks(filters)
+        return self.index.query(filters)
+
+    async def stream_marks_rows(
+        self, filters: "MarkFilter", size: int = 1000, max_rows: Optional[int] = None
+    ) -> AsyncIterator[List[MarkRow]]:
+        if filters.show_ended or not self.index.ready:
+            async for partition in super().stream_marks_rows(filters, size, max_rows):
+                yield partition
+            return
+        # Метки индекса уже в памяти, отдаем их теми же пачками
+        rows = (await self.get_marks_rows(filters))[:max_rows]
+        for i in range(0, len(rows), size):
+            yield rows[i : i + size]
+
+    async def get_marks_rows(self, filters: "MarkFilter") -> List[MarkRow]:
+        if filters.show_ended or not self.index.ready:
+            return await super().get_marks_rows(filters)
+        return [
+            MarkRow(
+                id=item.mark.id,
+                mark_name=item.mark.mark_name,
+                owner_id=item.mark.owner_id,
+                additional_info=item.mark.additional_info,
+                photo=item.mark.photo,
+                latitude=item.latitude,
+                longitude=item.longitude,
+                start_at=item.start_at,
+                end_at=item.end_at,
+                is_ended=item.mark.is_ended,
+                geohash=item.mark.geohash,
+                category=item.mark.category,
+                distance=distance,
+            )
+            for distance, item in self.index.query_items(filters)
+        ]
+
+    async def create_mark(self, mark: CreateMark) -> Mark:
+        result = await super().create_mark(mark)
+        self._sync_after_commit(IndexAction.UPSERT, result.id)
+        return result
+
+    async def delete_mark(self, mark_id: int) -> Mark:
+        result = await super().delete_mark(mark_id)
+        self._sync_after_commit(IndexAction.REMOVE, mark_id)
+        return result
+
+    async def update_mark(self, mark_id: int, update_data: UpdateMark) -> Mark:
+        result = await super().update_mark(mark_id, update_data)
+        self._sync_after_commit(IndexAction.UPSERT, mark_id)
+        return result
+
+    async def check_distance(self, filters: "MarkFilter", mark: Mark) -> bool:
+        latitude, longitude = self.geo_service.get_lat_lon(mark.geom)
+        distance = self.geo_service.distance(
+            filters.latitude, filters.longitude, latitude, longitude
+        )
+        return filters.contains(latitude, longitude, distance)
+
+    def _sync_after_commit(self, action: str, mark_id: int) -> None:
+        """
+        Method for update index of all workers after current transaction commit.
+        :param action: IndexAction
+        :param mark_id: id of the changed mark
+        :return: None
+        """
+        if not self.index.ready:
+            return
+        self.adapter.on_commit(lambda: self.index_sync.publish(action, [mark_id]))
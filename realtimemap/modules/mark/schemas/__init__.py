@@ -1,5 +1,7 @@
 __all__ = [
     "MarkRequestParams",
+    "MarkBBoxParams",
+    "BoundingBox",
     "CreateMarkRequest",
     "UpdateMarkRequest",
     "CreateMark",
@@ -9,11 +11,18 @@ __all__ = [
     "DetailMark",
     "ActionType",
     "CreateTestMarkRequest",
+    "ImportMarkRow",
+    "MarkExportParams",
     "allowed_duration",
+    "MarkClusterParams",
+    "ReadMarkCluster",
+    "ReadMarkChanges",
 ]
 
 
-from .base import Coordinates, allowed_duration
+from .base import BoundingBox, Coordinates, allowed_duration
+from .changes import ReadMarkChanges
+from .cluster import MarkClusterParams, ReadMarkCluster
 from .crud import (
     CreateMark,
     UpdateMark,
@@ -21,5 +30,11 @@ from .crud import (
     DetailMark,
     ActionType,
 )
-from .params import MarkRequestParams
-from .request import CreateMarkRequest, UpdateMarkRequest, CreateTestMarkRequest
+from .export import MarkExportParams
+from .params import MarkBBoxParams, MarkRequestParams
+from .request import (
+    CreateMarkRequest,
+    UpdateMarkRequest,
+    CreateTestMarkRequest,
+    ImportMarkRow,
+)
@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Annotated, Optional, List
 
 from fastapi import UploadFile
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 from pydantic_extra_types.coordinate import Latitude, Longitude
 
 allowed_duration = [12, 24, 36, 48]
@@ -18,6 +18,24 @@ class Coordinates(BaseModel):
     longitude: Longitude
 
 
+class BoundingBox(BaseModel):
+    """
+    Class for bounding box of map viewport.
+    min_longitude > max_longitude means box crossing the antimeridian.
+    """
+
+    min_latitude: Annotated[Latitude, Field(..., description="South border")]
+    min_longitude: Annotated[Longitude, Field(..., description="West border")]
+    max_latitude: Annotated[Latitude, Field(..., description="North border")]
+    max_longitude: Annotated[Longitude, Field(..., description="East border")]
+
+    @model_validator(mode="after")
+    def check_latitude_order(self) -> "BoundingBox":
+        if self.min_latitude > self.max_latitude:
+            raise ValueError("min_latitude must be less than max_latitude")
+        return self
+
+
 class CoordinatesOptional(BaseModel):
     """
     Class for add lon/lat coordinates.
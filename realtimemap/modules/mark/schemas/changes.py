@@ -0,0 +1,22 @@
+from typing import Annotated, List
+
+from pydantic import BaseModel, Field
+
+from .crud import ReadMark
+
+
+class ReadMarkChanges(BaseModel):
+    """
+    Class for read changes of marks in area since client version.
+    reset=True means client has to reload the area and poll with new version.
+    """
+
+    version: Annotated[int, Field(..., description="Version for the next poll")]
+    reset: Annotated[bool, Field(False, description="Area must be reloaded")]
+    changed: Annotated[
+        List[ReadMark], Field(default_factory=list, description="Changed marks")
+    ]
+    deleted: Annotated[
+        List[int],
+        Field(default_factory=list, description="Deleted or moved out marks ids"),
+    ]
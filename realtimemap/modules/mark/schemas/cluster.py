@@ -0,0 +1,27 @@
+from typing import Annotated
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from .base import BoundingBox
+
+
+class MarkClusterParams(BoundingBox):
+    """
+    Class for clusters request: bounding box and zoom.
+    """
+
+    zoom: Annotated[int, Field(..., ge=0, le=20, description="Map zoom level")]
+
+
+class ReadMarkCluster(BaseModel):
+    """
+    Class for read cluster of marks.
+    """
+
+    cell: Annotated[str, Field(..., description="Geohash cell of cluster")]
+    count: Annotated[int, Field(..., description="Count of marks")]
+    latitude: Annotated[float, Field(..., description="Centroid latitude")]
+    longitude: Annotated[float, Field(..., description="Centroid longitude")]
+    category_id: Annotated[int, Field(..., description="Dominant category id")]
+
+    model_config = ConfigDict(from_attributes=True)
@@ -14,7 +14,7 @@ from pydantic import (
 from modules.category.schemas import ReadCategory
 from modules.user.schemas import UserRead
 from utils.geom.geom_serializator import serialization_geom
-from utils.url_generator import generate_full_image_url
+from utils.url_generator import generate_full_image_url, image_variant_url_validator
 from .base import BaseMark, CommonMarkFields
 
 
@@ -74,11 +74,33 @@ class ReadMark(CommonMarkFields):
     photo: Annotated[
         Optional[List[str]], Field(default_factory=list, description="Photos for mark")
     ]
+    photo_thumbnail: Annotated[
+        Optional[List[str]],
+        Field(
+            default_factory=list,
+            validation_alias="photo",
+            description="WebP thumbnails of photos",
+        ),
+    ]
+    photo_preview: Annotated[
+        Optional[List[str]],
+        Field(
+            default_factory=list,
+            validation_alias="photo",
+            description="WebP previews of photos",
+        ),
+    ]
     end_at: Annotated[datetime, Field(..., description="End datetime")]
     is_ended: Annotated[bool, Field(..., description="Is ended?")]
     category: ReadCategory
 
     _validate_photo = field_validator("photo", mode="before")(generate_full_image_url)
+    _validate_photo_thumbnail = field_validator("photo_thumbnail", mode="before")(
+        image_variant_url_validator("thumb")
+    )
+    _validate_photo_preview = field_validator("photo_preview", mode="before")(
+        image_variant_url_validator("preview")
+    )
 
     @field_validator("geom", mode="before")
     def validate_geom(cls, v):
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Annotated, Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+from pydantic_extra_types.coordinate import Latitude, Longitude
+
+
+class MarkExportParams(BaseModel):
+    """
+    Class for export request: optional bounding box and time window.
+    min_longitude > max_longitude means box crossing the antimeridian.
+    """
+
+    format: Annotated[
+        Literal["geojson", "csv"], Field("geojson", description="File format")
+    ]
+    gzip: Annotated[bool, Field(False, description="Compress file with gzip")]
+    min_latitude: Annotated[Optional[Latitude], Field(None, description="South")]
+    min_longitude: Annotated[Optional[Longitude], Field(None, description="West")]
+    max_latitude: Annotated[Optional[Latitude], Field(None, description="North")]
+    max_longitude: Annotated[Optional[Longitude], Field(None, description="East")]
+    start: Annotated[
+        Optional[datetime], Field(None, description="Marks active after this time")
+    ]
+    end: Annotated[
+        Optional[datetime], Field(None, description="Marks active before this time")
+    ]
+    show_ended: Annotated[bool, Field(True, description="Export ended marks")]
+
+    @model_validator(mode="after")
+    def check_bbox(self) -> "MarkExportParams":
+        borders = [
+            self.min_latitude,
+            self.min_longitude,
+            self.max_latitude,
+            self.max_longitude,
+        ]
+        if any(border is None for border in borders) and any(
+            border is not None for border in borders
+        ):
+            raise ValueError("All borders of bounding box must be provided")
+        if self.min_latitude is not None and self.min_latitude > self.max_latitude:
+            raise ValueError("min_latitude must be less than max_latitude")
+        return self
+
+    @property
+    def bbox(self) -> Optional[tuple]:
+        if self.min_latitude is None:
+            return None
+        return (
+            self.min_latitude,
+            self.min_longitude,
+            self.max_latitude,
+            self.max_longitude,
+        )
@@ -1,13 +1,17 @@
 from datetime import datetime
 from typing import Annotated, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 
-from .base import Coordinates
+from core.config import conf
+from .base import BoundingBox, Coordinates
 
 
-class MarkRequestParams(Coordinates):
-    radius: Annotated[int, Field(5000, description="Search radius in meters.")]
+class MarkSearchParams(BaseModel):
+    """
+    Common params of mark search: time window and page.
+    """
+
     srid: Annotated[int, Field(4326, description="SRID")]
     date: Annotated[
         datetime,
@@ -21,3 +25,31 @@ class MarkRequestParams(Coordinates):
         Optional[int], Field(24, description="Search duration in hours.")
     ]
     show_ended: Annotated[Optional[bool], Field(False, description="Show ended.")]
+    limit: Annotated[
+        Optional[int],
+        Field(
+            None,
+            ge=1,
+            le=conf.mark.max_page_size,
+            description="Page size, nearest marks first.",
+        ),
+    ]
+    cursor: Annotated[
+        Optional[str], Field(None, description="Cursor of the next page.")
+    ]
+
+
+class MarkRequestParams(Coordinates, MarkSearchParams):
+    radius: Annotated[
+        int,
+        Field(
+            5000, gt=0, le=conf.mark.max_radius, description="Search radius in meters."
+        ),
+    ]
+
+
+class MarkBBoxParams(BoundingBox, MarkSearchParams):
+    """
+    Class for viewport request: marks inside bounding box,
+    nearest to its center first.
+    """
@@ -4,23 +4,7 @@ from typing import Annotated, Optional
 from pydantic import Field, model_validator
 
 from .base import Coordinates, BaseMark, CoordinatesOptional, CommonMarkFields
-
-
-class MarkRequestParams(Coordinates):
-    radius: Annotated[int, Field(5000, description="Search radius in meters.")]
-    srid: Annotated[int, Field(4326, description="SRID")]
-    date: Annotated[
-        datetime,
-        Field(
-            default=datetime.now(),
-            description="Date for start filtering. Format YYYY-MM-DD HH:MM:SS",
-            examples=["2025-10-30"],
-        ),
-    ]
-    duration: Annotated[
-        Optional[int], Field(24, description="Search duration in hours.")
-    ]
-    show_ended: Annotated[Optional[bool], Field(False, description="Show ended.")]
+from .params import MarkRequestParams  # noqa: F401
 
 
 class CreateMarkRequest(BaseMark, Coordinates, CommonMarkFields):
@@ -57,3 +41,18 @@ class CreateTestMarkRequest(Coordinates):
     radius: Annotated[
         int, Field(500, description="Search radius in meters.", gt=0, lt=5000)
     ]
+
+
+class ImportMarkRow(BaseMark, Coordinates):
+    """
+    Class for one row of bulk mark import (CSV or GeoJSON feature).
+    """
+
+    category_id: Annotated[int, Field(..., description="Category id")]
+    owner_id: Annotated[
+        Optional[int], Field(None, description="Owner id, default from importer")
+    ]
+    additional_info: Annotated[
+        Optional[str],
+        Field(None, max_length=256, description="Additional information"),
+    ]
@@ -1,10 +1,11 @@
 import logging
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
 
 from fastapi import HTTPException
 from sqlalchemy.orm import joinedload
 
+from core.config import conf
 from errors.http2 import (
     NotFoundError,
     TimeOutError,
@@ -13,10 +14,20 @@ from errors.http2 import (
 )
 from modules import User
 from modules.geo_service import GeoService
-from .filters import MarkFilter
-from .model import Mark
+from utils.image import (
+    MARK_PHOTO_VARIANTS,
+    schedule_image_variants,
+    schedule_image_variants_removal,
+)
+from utils.url_generator import DEFAULT_MEDIA_URL
+from .cache import MarkTileCache, MarkCellCache, MAX_CACHED_CELLS
+from .filters import MarkFilter, encode_cursor
+from .model import Mark, CLUSTER_MAX_PRECISION
+from .serializer import MarkListSerializer
 from .schemas import (
     CreateMarkRequest,
+    MarkBBoxParams,
+    MarkClusterParams,
     MarkRequestParams,
     UpdateMarkRequest,
     CreateMark,
@@ -38,6 +49,8 @@ class MarkService:
         "category_repo",
         "mark_comment_repo",
         "geo_service",
+        "tile_cache",
+        "cell_cache",
     )
 
     def __init__(
@@ -46,11 +59,15 @@ class MarkService:
         category_repo: "CategoryRepository",
         mark_comment_repo: "MarkCommentRepository",
         geo_service: "GeoService",
+        tile_cache: Optional["MarkTileCache"] = None,
+        cell_cache: Optional["MarkCellCache"] = None,
     ):
         self.mark_repo = mark_repo
         self.category_repo = category_repo
         self.mark_comment_repo = mark_comment_repo
         self.geo_service = geo_service
+        self.tile_cache = tile_cache
+        self.cell_cache = cell_cache
 
     def _validate_create_data(
         self, data: CreateMarkRequest, user: "User"
@@ -75,6 +92,8 @@ class MarkService:
             raise NotFoundError()
         create_data = self._validate_create_data(mark_data, user)
         mark = await self.mark_repo.create_mark(create_data)
+        self._invalidate_caches([self._get_point(mark)])
+        self._process_photos(mark)
         return mark
 
     async def get_mark_by_id(self, mark_id: int) -> Mark:
@@ -88,14 +107,204 @@ class MarkService:
     async def get_marks(self, params: MarkRequestParams):
         filters = MarkFilter.from_request(params, self.geo_service)
         result = await self.mark_repo.get_marks(filters)
-        return result
+        return result[: filters.limit]
+
+    async def get_marks_data(
+        self,
+        params: Union[MarkRequestParams, MarkBBoxParams],
+        media_url: str = DEFAULT_MEDIA_URL,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Метод получения страницы сериализованных (в формате ReadMark) меток
+        в радиусе или в прямоугольнике viewport, ближайшие первыми.
+        Не завершенные метки берутся из кэша ячеек геохэша,
+        отсутствующие в кэше ячейки загружаются одним запросом.
+        :param params: Параметры поиска
+        :param media_url: Префикс ссылок на фото (get_media_url запроса)
+        :return: Список меток в JSON-совместимом виде и курсор следующей страницы
+        """
+        filters = MarkFilter.from_request(params, self.geo_service)
+        serializer = MarkListSerializer(media_url)
+        cells = self.cell_cache.get_cells(filters) if self.cell_cache else []
+        if filters.show_ended or not cells or len(cells) > MAX_CACHED_CELLS:
+            rows = await self.mark_repo.get_marks_rows(filters)
+            page, next_cursor = self._get_page(
+                [(row.distance, row.id, row) for row in rows], filters
+            )
+            return serializer.to_list(page), next_cursor
+
+        cached, generations = await self.cell_cache.get_many(cells)
+        missed = [cell for cell, entries in cached.items() if entries is None]
+        if missed:
+            # В кэше относительные пути фото: он общий для всех запросов
+            cache_serializer = MarkListSerializer(media_url=None)
+            loaded: Dict[str, List[Dict[str, Any]]] = {cell: [] for cell in missed}
+            for row in await self.mark_repo.get_active_marks_rows_in_cells(missed):
+                cell = row.geohash[: self.cell_cache.precision]
+                loaded[cell].append(self.cell_cache.build_entry(row, cache_serializer))
+            await self.cell_cache.set_many(loaded, generations)
+            cached.update(loaded)
+
+        entries = (entry for cell_entries in cached.values() for entry in cell_entries)
+        page, next_cursor = self._get_page(
+            self.cell_cache.refine(entries, filters), filters
+        )
+        return [
+            MarkListSerializer.with_media_url(mark, media_url) for mark in page
+        ], next_cursor
+
+    @staticmethod
+    def _get_page(
+        items: List[Tuple[float, int, Any]], filters: MarkFilter
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Отрезает лишнюю метку страницы и строит по последней курсор следующей
+        :param items: (distance, id, mark), отсортированные, не больше limit + 1
+        :param filters: Фильтр с размером страницы
+        :return: Метки страницы и курсор или None, если страница последняя
+        """
+        next_cursor = None
+        if len(items) > filters.limit:
+            items = items[: filters.limit]
+            next_cursor = encode_cursor(*items[-1][:2])
+        return [mark for _, _, mark in items], next_cursor
+
+    async def get_changes(
+        self, params: Union[MarkRequestParams, MarkBBoxParams], since: Optional[int]
+    ) -> Dict[str, Any]:
+        """
+        Метод получения изменений меток в области начиная с версии клиента:
+        измененные (в том числе завершенные) метки и id удаленных.
+        Без since или при слишком большом числе изменений возвращает reset,
+        тогда клиент перезагружает область и опрашивает с новой версией.
+        :param params: Область поиска
+        :param since: Версия из предыдущего ответа
+        :return: Данные в формате ReadMarkChanges
+        """
+        filters = MarkFilter.from_request(params, self.geo_service)
+        # Версия берется до чтения изменений, чтобы не пропустить параллельные
+        version = await self.mark_repo.get_change_version()
+        reset = {"version": version, "reset": True, "changed": [], "deleted": []}
+        if since is None:
+            return reset
+
+        limit = conf.mark.max_page_size
+        rows = await self.mark_repo.get_changed_marks_rows(filters, since, limit + 1)
+        deleted = await self.mark_repo.get_deleted_mark_ids(filters, since, limit + 1)
+        if len(rows) > limit or len(deleted) > limit:
+            return reset
+        # Метка, перемещенная внутри области, есть и в измененных, и в tombstone
+        changed_ids = {row.id for row in rows}
+        return {
+            "version": version,
+            "reset": False,
+            "changed": MarkListSerializer().to_list(rows),
+            "deleted": [mark_id for mark_id in deleted if mark_id not in changed_ids],
+        }
 
     async def delete_mark(self, mark_id: int, user: User):
         mark = await self.mark_repo.get_by_id(mark_id)
         await self._check_mark_ownership(mark, user)
+        point = self._get_point(mark)
+        photo = list(mark.photo or [])
         result = await self.mark_repo.delete_mark(mark.id)  # noqa: ignore
+        self._invalidate_caches([point])
+        self._remove_photo_variants(photo)
         return result
 
+    async def get_tile(self, z: int, x: int, y: int) -> bytes:
+        """
+        Метод получения векторного тайла с метками, активными в текущем
+        временном окне. Тайл кэшируется в Redis до конца окна.
+        :param z: Уровень масштаба
+        :param x: Колонка тайла
+        :param y: Строка тайла
+        :return: Тайл в формате Mapbox Vector Tile
+        """
+        bucket = MarkTileCache.get_bucket()
+        if self.tile_cache is not None:
+            tile = await self.tile_cache.get(z, x, y, bucket)
+            if tile is not None:
+                return tile
+
+        start, end = MarkTileCache.get_bucket_range(bucket)
+        tile = await self.mark_repo.get_tile(z, x, y, start, end)
+        if self.tile_cache is not None:
+            await self.tile_cache.set(z, x, y, bucket, tile)
+        return tile
+
+    async def get_clusters(self, params: MarkClusterParams) -> List:
+        """
+        Метод получения кластеров меток в прямоугольнике.
+        Точность геохэша выбирается по zoom, но не мельче той,
+        при которой bbox покрывается MAX_BBOX_CELLS ячейками.
+        :param params: bbox и zoom
+        :return: Кластеры (cell, count, latitude, longitude, category_id)
+        """
+        bbox = (
+            params.min_latitude,
+            params.min_longitude,
+            params.max_latitude,
+            params.max_longitude,
+        )
+        precision = min(
+            self.get_cluster_precision(params.zoom),
+            self.geo_service.get_bbox_precision(
+                *bbox, max_precision=CLUSTER_MAX_PRECISION
+            ),
+        )
+        cells = self.geo_service.get_cells_in_bbox(*bbox, precision)
+        return await self.mark_repo.get_clusters(cells)
+
+    @staticmethod
+    def get_cluster_precision(zoom: int) -> int:
+        """
+        Точность геохэша для zoom: ячейка примерно в 4 раза уже тайла
+        """
+        return min(max(round((zoom + 2) * 2 / 5), 1), CLUSTER_MAX_PRECISION)
+
+    def _get_point(self, mark: Mark) -> Optional[Tuple[float, float]]:
+        if mark is None or mark.geom is None:
+            return None
+        return self.geo_service.get_lat_lon(mark.geom)
+
+    def _invalidate_caches(self, points: List[Optional[Tuple[float, float]]]) -> None:
+        """
+        Удаляет тайлы и ячейки с указанными точками из кэша после commit транзакции
+        :param points: Пары (latitude, longitude)
+        :return: None
+        """
+        points = [point for point in points if point is not None]
+        if not points:
+            return
+        if self.tile_cache is not None:
+            self.mark_repo.on_commit(lambda: self.tile_cache.invalidate(points))
+        if self.cell_cache is not None:
+            self.mark_repo.on_commit(lambda: self.cell_cache.invalidate(points))
+
+    def _process_photos(self, mark: Mark) -> None:
+        """
+        Генерирует превью фотографий метки в celery после commit транзакции
+        :param mark: Созданная или обновленная метка
+        :return: None
+        """
+        if mark is None or not mark.photo:
+            return
+        photo = list(mark.photo)
+        self.mark_repo.on_commit(
+            lambda: schedule_image_variants(photo, MARK_PHOTO_VARIANTS)
+        )
+
+    def _remove_photo_variants(self, photo: List[Any]) -> None:
+        """
+        Удаляет превью удаленных или замененных фотографий после commit транзакции
+        :param photo: Фотографии метки до изменения
+        :return: None
+        """
+        if not photo:
+            return
+        self.mark_repo.on_commit(lambda: schedule_image_variants_removal(photo))
+
     def _validate_update_data(self, update_data: UpdateMarkRequest) -> UpdateMark:
         """
         метод для преоброзования сырых данных в валидные для обновления метки.
@@ -143,7 +352,14 @@ class MarkService:
 
             await self._before_update_mark(mark, user, update_data)
             valid_data = self._validate_update_data(update_data)
-            return await self.mark_repo.update_mark(mark_id, valid_data)
+            old_point = self._get_point(mark)
+            old_photo = list(mark.photo or [])
+            result = await self.mark_repo.update_mark(mark_id, valid_data)
+            self._invalidate_caches([old_point, self._get_point(result)])
+            if update_data.photo:
+                self._remove_photo_variants(old_photo)
+                self._process_photos(result)
+            return result
         except NotFoundError:
             logger.info("Record not found: %d", mark_id)
             raise
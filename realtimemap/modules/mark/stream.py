@@ -0,0 +1,55 @@
+from dataclasses import replace
+from typing import AsyncIterator, Optional, Union
+
+import orjson
+
+from core.config import conf
+from database.helper import db_helper
+from modules.geo_service import GeoService
+from utils.url_generator import DEFAULT_MEDIA_URL
+from .dependencies import get_mark_repository
+from .filters import MarkFilter
+from .schemas import MarkBBoxParams, MarkRequestParams
+from .serializer import MarkListSerializer
+
+NDJSON_MEDIA_TYPE: str = "application/x-ndjson"
+# Сколько строк читается из курсора и пишется в ответ за раз
+STREAM_PARTITION_SIZE: int = 500
+
+
+def stream_marks_ndjson(
+    params: Union[MarkRequestParams, MarkBBoxParams],
+    geo_service: Optional[GeoService] = None,
+    media_url: str = DEFAULT_MEDIA_URL,
+) -> AsyncIterator[bytes]:
+    """
+    Marks in radius or bbox as NDJSON: one serialized ReadMark per line.
+    Stream is not paginated: found marks are sent in index order,
+    at most conf.mark.max_stream_rows of them.
+    Params are validated here, before response is started.
+    :param params: Search params
+    :param geo_service: GeoService
+    :param media_url: Prefix of photo URLs (get_media_url of the request)
+    :return: Async iterator of response chunks
+    """
+    geo_service = geo_service if geo_service is not None else GeoService()
+    filters = replace(
+        MarkFilter.from_request(params, geo_service), limit=None, after=None
+    )
+    return _stream_marks_ndjson(filters, geo_service, media_url)
+
+
+async def _stream_marks_ndjson(
+    filters: MarkFilter, geo_service: GeoService, media_url: str
+) -> AsyncIterator[bytes]:
+    # Своя сессия: ответ отдается после выхода из зависимостей запроса
+    serializer = MarkListSerializer(media_url)
+    async with db_helper.session_factory() as session:
+        mark_repo = await get_mark_repository(session, geo_service)
+        async for rows in mark_repo.stream_marks_rows(
+            filters, STREAM_PARTITION_SIZE, conf.mark.max_stream_rows
+        ):
+            yield b"".join(
+                orjson.dumps(serializer.to_dict(row), option=orjson.OPT_APPEND_NEWLINE)
+                for row in rows
+            )
@@ -1,8 +1,10 @@
 import logging
-from typing import List, Optional, Set
+from typing import Iterable, List, Optional
 
 from socketio import AsyncServer
 
+from .dispatcher import get_notification_dispatcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -10,6 +12,7 @@ class BaseNotificationSocketIO:
     def __init__(self, sio: AsyncServer, namespace: str):
         self.sio = sio
         self.namespace = namespace
+        self.dispatcher = get_notification_dispatcher(sio)
 
     def get_sids(self, namespace: str = "/") -> List[Optional[str]]:
         try:
@@ -26,12 +29,15 @@ class BaseNotificationSocketIO:
             return []
 
     async def _send_notifications(
-        self, targets: Set[str], event: str, data: dict, *, room: Optional[str] = None
+        self, targets: Iterable[str], event: str, data: dict
     ) -> None:
-        for sid in targets:
-            try:
-                await self.sio.emit(
-                    event, to=sid, namespace=self.namespace, data=data, room=room
-                )
-            except Exception as e:
-                logger.error(e)
+        """
+        Send event to sids and rooms through the dispatcher of the worker:
+        local clients get it from own queues, slow ones do not delay others
+        """
+        try:
+            await self.dispatcher.emit(
+                event, data, to=list(targets), namespace=self.namespace
+            )
+        except Exception as e:
+            logger.error(e)
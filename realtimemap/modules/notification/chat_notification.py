@@ -25,11 +25,8 @@ class ChatNotificationService(BaseNotificationSocketIO):
                 mode="json"
             )
 
-            await self.sio.emit(
-                event=event,
-                data=serialized_data,
-                room=str(message.chat_id),
-                namespace=self.namespace,
+            await self._send_notifications(
+                [str(message.chat_id)], event, serialized_data
             )
         except Exception as e:
             logger.error("Chat notification failed", exc_info=e)
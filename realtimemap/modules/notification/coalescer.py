@@ -0,0 +1,119 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.config import conf
+from modules.mark.schemas import ActionType
+from .dispatcher import NotificationDispatcher
+
+logger = logging.getLogger(__name__)
+
+MARK_BATCH_EVENT: str = "marks_batch"
+
+CREATE = ActionType.CREATE.value
+UPDATE = ActionType.UPDATE.value
+DELETE = ActionType.DELETE.value
+
+
+def merge_events(previous: str, event: str) -> Optional[str]:
+    """
+    Event of the mark after two events in one window, None - nothing to send
+    """
+    if previous == CREATE and event == UPDATE:
+        # Клиент еще не получил создание, отправляем его с новыми данными
+        return CREATE
+    if previous == CREATE and event == DELETE:
+        return None
+    return event
+
+
+class MarkEventCoalescer:
+    """
+    Buffer of mark events of one namespace for a short window.
+    Repeated events of the same mark are merged, then every target (sid or room)
+    gets one marks_batch message: {"marks_created": [...], "marks_updated": [...],
+    "marks_deleted": [...]}. Targets with the same set of marks share one emit.
+    """
+
+    def __init__(
+        self, dispatcher: NotificationDispatcher, namespace: str, window: float
+    ):
+        self.dispatcher = dispatcher
+        self.namespace = namespace
+        self.window = window
+        # id метки -> (событие, данные, получатели)
+        self._events: Dict[int, Tuple[str, Dict[str, Any], Set[str]]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, event: str, data: Dict[str, Any], targets: List[str]) -> None:
+        mark_id = data["id"]
+        targets = set(targets)
+        previous = self._events.pop(mark_id, None)
+        if previous is not None:
+            event = merge_events(previous[0], event)
+            targets |= previous[2]
+        if event is not None:
+            self._events[mark_id] = (event, data, targets)
+
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Send all buffered events now
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        events, self._events = self._events, {}
+        marks_by_target: Dict[str, List[int]] = defaultdict(list)
+        for mark_id, (_, _, targets) in events.items():
+            for target in targets:
+                marks_by_target[target].append(mark_id)
+
+        # Получатели с одинаковым набором меток - один emit, пакет кодируется раз
+        targets_by_marks: Dict[Tuple[int, ...], List[str]] = defaultdict(list)
+        for target, mark_ids in marks_by_target.items():
+            targets_by_marks[tuple(mark_ids)].append(target)
+
+        for mark_ids, targets in targets_by_marks.items():
+            payload = {CREATE: [], UPDATE: [], DELETE: []}
+            for mark_id in mark_ids:
+                event, data, _ = events[mark_id]
+                payload[event].append(data)
+            try:
+                await self.dispatcher.emit(
+                    MARK_BATCH_EVENT, payload, to=targets, namespace=self.namespace
+                )
+            except Exception as e:
+                logger.error(f"Error on send marks batch: {e}")
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error on flush marks batch: {e}")
+
+
+_coalescers: Dict[str, MarkEventCoalescer] = {}
+
+
+def get_mark_event_coalescer(
+    dispatcher: NotificationDispatcher, namespace: str
+) -> Optional[MarkEventCoalescer]:
+    """
+    Coalescer of the namespace, shared by all requests of the worker.
+    None if conf.socket.coalesce_window is 0 (events are sent one by one).
+    """
+    if conf.socket.coalesce_window <= 0:
+        return None
+    coalescer = _coalescers.get(namespace)
+    if coalescer is None:
+        coalescer = MarkEventCoalescer(
+            dispatcher, namespace, conf.socket.coalesce_window
+        )
+        _coalescers[namespace] = coalescer
+    return coalescer
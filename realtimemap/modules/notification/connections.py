@@ -0,0 +1,140 @@
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from modules.geo_service.service import EARTH_RADIUS_METERS
+from modules.mark.filters import MarkFilter
+
+# Начальная емкость массивов, дальше растет вдвое
+INITIAL_CAPACITY: int = 1024
+
+
+class MarkConnectionIndex:
+    """
+    Search areas of connected clients of the marks namespace in NumPy arrays.
+    Clients, which must receive a mark, are found by one vectorized
+    haversine pass over members of the mark cell rooms, without database queries.
+    Same semantics as MarkFilter.contains.
+    """
+
+    _ARRAYS = ("_lat", "_lon", "_cos_lat", "_radius", "_bbox", "_has_bbox", "_active")
+
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self._slots: Dict[str, int] = {}
+        self._sids: List[Optional[str]] = []
+        self._free: List[int] = []
+        # Центр в радианах, cos широты считается один раз при обновлении
+        self._lat = np.zeros(capacity)
+        self._lon = np.zeros(capacity)
+        self._cos_lat = np.zeros(capacity)
+        self._radius = np.zeros(capacity)
+        # (south, west, north, east) в градусах, если _has_bbox
+        self._bbox = np.zeros((capacity, 4))
+        self._has_bbox = np.zeros(capacity, dtype=np.bool_)
+        self._active = np.zeros(capacity, dtype=np.bool_)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def update(self, sid: str, filters: Optional[MarkFilter]) -> None:
+        """
+        Set search area of the client, None removes it
+        """
+        if filters is None:
+            self.remove(sid)
+            return
+        slot = self._slots.get(sid)
+        if slot is None:
+            slot = self._take_slot(sid)
+
+        self._lat[slot] = np.radians(filters.latitude)
+        self._lon[slot] = np.radians(filters.longitude)
+        self._cos_lat[slot] = np.cos(self._lat[slot])
+        self._radius[slot] = filters.radius
+        if filters.bbox is None:
+            self._has_bbox[slot] = False
+        else:
+            self._has_bbox[slot] = True
+            self._bbox[slot] = filters.bbox
+        self._active[slot] = True
+
+    def remove(self, sid: str) -> None:
+        slot = self._slots.pop(sid, None)
+        if slot is None:
+            return
+        self._active[slot] = False
+        self._sids[slot] = None
+        self._free.append(slot)
+
+    def match(
+        self, latitude: float, longitude: float, sids: Optional[Iterable[str]] = None
+    ) -> List[str]:
+        """
+        Clients, whose search area contains the point
+        :param latitude: Mark latitude
+        :param longitude: Mark longitude
+        :param sids: Check only these clients (members of cell rooms), all by default
+        :return: List of sid
+        """
+        if not self._slots:
+            return []
+        if sids is None:
+            slots = slice(0, len(self._sids))
+        else:
+            slots = np.fromiter(
+                (self._slots[sid] for sid in sids if sid in self._slots),
+                dtype=np.intp,
+            )
+            if not len(slots):
+                return []
+        lat = np.radians(latitude)
+        lon = np.radians(longitude)
+
+        d_lat = lat - self._lat[slots]
+        d_lon = lon - self._lon[slots]
+        a = (
+            np.sin(d_lat / 2) ** 2
+            + self._cos_lat[slots] * np.cos(lat) * np.sin(d_lon / 2) ** 2
+        )
+        distance = 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+        in_radius = distance <= self._radius[slots]
+
+        south, west, north, east = self._bbox[slots].T
+        in_lat = (south <= latitude) & (latitude <= north)
+        # west > east - прямоугольник через антимеридиан
+        in_lon = np.where(
+            west <= east,
+            (west <= longitude) & (longitude <= east),
+            (longitude >= west) | (longitude <= east),
+        )
+        in_bbox = in_lat & in_lon
+
+        in_area = np.where(self._has_bbox[slots], in_bbox, in_radius)
+        found = np.flatnonzero(self._active[slots] & in_area)
+        if sids is not None:
+            found = slots[found]
+        return [self._sids[slot] for slot in found]
+
+    def _take_slot(self, sid: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._sids[slot] = sid
+        else:
+            slot = len(self._sids)
+            if slot == len(self._active):
+                self._grow()
+            self._sids.append(sid)
+        self._slots[sid] = slot
+        return slot
+
+    def _grow(self) -> None:
+        capacity = max(len(self._active) * 2, 1)
+        for name in self._ARRAYS:
+            array = getattr(self, name)
+            result = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            result[: len(array)] = array
+            setattr(self, name, result)
+
+
+# Подключения воркера; полны, только если все клиенты в этом процессе
+mark_connections = MarkConnectionIndex()
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Literal, Optional, Set, Tuple
+
+from socketio import AsyncServer
+
+from core.config import conf
+
+logger = logging.getLogger(__name__)
+
+SlowClientPolicy = Literal["drop", "disconnect"]
+
+
+@dataclass
+class DispatcherMetrics:
+    sent: int = 0
+    dropped: int = 0
+    disconnected: int = 0
+    failed: int = 0
+    # Наибольшая глубина очереди клиента с запуска воркера
+    max_queue_depth: int = 0
+
+
+class NotificationDispatcher:
+    """
+    Sends events of the worker with bounded concurrency.
+    Every local client has own queue of at most max_queue_size events,
+    drained by own task, so a slow client does not delay others.
+    Client, whose queue (with engine.io outgoing queue) is full, loses
+    the oldest events ("drop") or is disconnected ("disconnect").
+    Rooms and clients of other workers get one emit of the manager.
+    Metrics are written to the log once per metrics interval.
+    """
+
+    def __init__(
+        self,
+        sio: AsyncServer,
+        max_concurrency: int = 100,
+        max_queue_size: int = 100,
+        policy: SlowClientPolicy = "drop",
+    ):
+        self.sio = sio
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.metrics = DispatcherMetrics()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # (namespace, sid) -> неотправленные (событие, данные)
+        self._queues: Dict[Tuple[str, str], Deque[Tuple[str, Any]]] = {}
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._disconnects: Set[asyncio.Task] = set()
+        self._metrics_task: Optional[asyncio.Task] = None
+
+    async def emit(self, event: str, data: Any, to: List[str], namespace: str) -> None:
+        """
+        Send event to sids and rooms without waiting for slow clients
+        """
+        others = []
+        for target in to:
+            if self.sio.manager.is_connected(target, namespace):
+                self.send(target, event, data, namespace)
+            else:
+                others.append(target)
+        if others:
+            async with self._semaphore:
+                await self.sio.emit(event, data=data, to=others, namespace=namespace)
+
+    def send(self, sid: str, event: str, data: Any, namespace: str) -> None:
+        """
+        Put event to the queue of the client
+        """
+        key = (namespace, sid)
+        queue = self._queues.setdefault(key, deque())
+        if len(queue) + self._get_backlog(sid, namespace) >= self.max_queue_size:
+            if self.policy == "disconnect":
+                self._disconnect(key)
+                return
+            self.metrics.dropped += 1
+            if not queue:
+                # Заполнена очередь engine.io, новое событие некуда ставить
+                return
+            queue.popleft()
+
+        queue.append((event, data))
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, len(queue))
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._drain(key, queue))
+
+    def discard(self, sid: str, namespace: str) -> None:
+        """
+        Forget queue of the disconnected client
+        """
+        key = (namespace, sid)
+        self._queues.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def get_metrics(self) -> Dict[str, int]:
+        return {
+            **asdict(self.metrics),
+            "queue_depth": self.queue_depth(),
+            "queued_clients": len(self._queues),
+        }
+
+    def start_metrics_log(self, interval: float) -> None:
+        """
+        Log metrics every interval seconds, 0 - do not log
+        """
+        if self._metrics_task is None and interval > 0:
+            self._metrics_task = asyncio.create_task(self._log_metrics(interval))
+
+    def stop_metrics_log(self) -> None:
+        if self._metrics_task is not None:
+            self._metrics_task.cancel()
+            self._metrics_task = None
+
+    async def join(self) -> None:
+        """
+        Wait until queued events are sent
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _drain(self, key: Tuple[str, str], queue: Deque[Tuple[str, Any]]):
+        namespace, sid = key
+        try:
+            while queue:
+                event, data = queue.popleft()
+                async with self._semaphore:
+                    try:
+                        # Клиент этого воркера: мимо очереди Redis менеджера
+                        await self.sio.emit(
+                            event,
+                            data=data,
+                            to=sid,
+                            namespace=namespace,
+                            ignore_queue=True,
+                        )
+                        self.metrics.sent += 1
+                    except Exception as e:
+                        self.metrics.failed += 1
+                        logger.error(f"Error on send {event} to {sid}: {e}")
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+            if not queue and self._queues.get(key) is queue:
+                del self._queues[key]
+
+    async def _log_metrics(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(f"Notification dispatcher metrics: {self.get_metrics()}")
+
+    def _disconnect(self, key: Tuple[str, str]) -> None:
+        namespace, sid = key
+        self.discard(sid, namespace)
+        self.metrics.disconnected += 1
+        logger.warning(f"Disconnect slow client {sid} of {namespace}")
+        task = asyncio.create_task(self.sio.disconnect(sid, namespace=namespace))
+        self._disconnects.add(task)
+        task.add_done_callback(self._disconnects.discard)
+
+    def _get_backlog(self, sid: str, namespace: str) -> int:
+        # Пакеты, которые engine.io еще не записал в транспорт клиента
+        try:
+            eio_sid = self.sio.manager.eio_sid_from_sid(sid, namespace)
+            socket = self.sio.eio.sockets.get(eio_sid)
+            return socket.queue.qsize() if socket is not None else 0
+        except Exception:
+            return 0
+
+
+_dispatchers: Dict[AsyncServer, NotificationDispatcher] = {}
+
+
+def get_notification_dispatcher(sio: AsyncServer) -> NotificationDispatcher:
+    """
+    Dispatcher of the server, shared by all namespaces and requests of the worker
+    """
+    dispatcher = _dispatchers.get(sio)
+    if dispatcher is None:
+        dispatcher = NotificationDispatcher(
+            sio,
+            max_concurrency=conf.socket.send_concurrency,
+            max_queue_size=conf.socket.client_queue_size,
+            policy=conf.socket.slow_client_policy,
+        )
+        _dispatchers[sio] = dispatcher
+    return dispatcher
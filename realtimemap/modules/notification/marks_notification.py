@@ -1,5 +1,6 @@
 import logging
-from typing import List, Optional, Dict, Set, TYPE_CHECKING
+from functools import partial
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
 
 from fastapi import Request
 from socketio import AsyncServer
@@ -7,9 +8,14 @@ from socketio import AsyncServer
 from core.config import conf
 from modules import Mark
 from modules.geo_service import GeoService, get_geo_service
-from modules.mark.filters import MarkFilter
-from modules.mark.schemas import MarkRequestParams, ReadMark
+from modules.mark.schemas import ReadMark
+from socket_io.manager import BatchingRedisManager
+from socket_io.utils import get_mark_rooms, get_room_members
+from utils.geom.geom_sector import get_geohash
 from .base import BaseNotificationSocketIO
+from .coalescer import get_mark_event_coalescer
+from .connections import MarkConnectionIndex, mark_connections
+from .dispatcher import get_notification_dispatcher
 
 if TYPE_CHECKING:
     from core.common.repository import MarkRepository
@@ -17,6 +23,76 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Сообщение pub/sub менеджера: событие метки для клиентов каждого воркера
+MARK_EVENT_METHOD: str = "mark_event"
+
+
+async def send_mark_event(
+    sio: AsyncServer, namespace: str, event: str, data: dict, targets: List[str]
+) -> None:
+    """
+    Send mark to clients of this worker, events of conf.socket.coalesce_window
+    are sent as one marks_batch
+    """
+    dispatcher = get_notification_dispatcher(sio)
+    coalescer = get_mark_event_coalescer(dispatcher, namespace)
+    if coalescer is not None:
+        coalescer.add(event, data, targets)
+        return
+    await dispatcher.emit(event, data, to=targets, namespace=namespace)
+
+
+def match_mark_clients(
+    sio: AsyncServer,
+    namespace: str,
+    latitude: float,
+    longitude: float,
+    rooms: List[str],
+    connections: MarkConnectionIndex = mark_connections,
+) -> List[str]:
+    """
+    Clients of this worker, whose search area contains the mark.
+    Only members of the mark cell rooms are checked exactly,
+    so the work does not grow with the number of all connections.
+    """
+    candidates = get_room_members(sio.manager, namespace, rooms)
+    if not candidates:
+        return []
+    return connections.match(latitude, longitude, candidates)
+
+
+async def deliver_mark_event(
+    sio: AsyncServer,
+    namespace: str,
+    message: Dict[str, Any],
+    connections: MarkConnectionIndex = mark_connections,
+) -> None:
+    """
+    Handler of MARK_EVENT_METHOD: exact match among clients of this worker,
+    which are in rooms of the mark cells
+    """
+    targets = match_mark_clients(
+        sio,
+        namespace,
+        message["latitude"],
+        message["longitude"],
+        message["rooms"],
+        connections,
+    )
+    if targets:
+        await send_mark_event(
+            sio, namespace, message["event"], message["data"], targets
+        )
+
+
+def register_mark_event_handler(
+    sio: AsyncServer, namespace: str = conf.socket.prefix.marks
+) -> None:
+    if isinstance(sio.manager, BatchingRedisManager):
+        sio.manager.on_message(
+            MARK_EVENT_METHOD, partial(deliver_mark_event, sio, namespace)
+        )
+
 
 class MarkNotificationService(BaseNotificationSocketIO):
     def __init__(
@@ -25,64 +101,57 @@ class MarkNotificationService(BaseNotificationSocketIO):
         sio: AsyncServer,
         geo_service: GeoService = get_geo_service(),
         namespace: str = conf.socket.prefix.marks,
+        connections: MarkConnectionIndex = mark_connections,
     ):
         super().__init__(sio, namespace)
         self.mark_repo = mark_repo
         self.geo_service = geo_service
+        self.connections = connections
 
     async def notify_mark_action(
         self, mark: Mark, event: str, request: Optional[Request] = None
     ):
+        """
+        Send mark to clients, whose search area contains the mark.
+        Members of rooms of the mark cells are matched exactly by
+        MarkConnectionIndex. With Redis manager the mark is published
+        to all workers and each of them matches its own room members.
+        """
         try:
-            room_sids = self.get_sids(self.namespace)
-            if not room_sids:
-                return
-
-            sessions = await self._get_sessions(room_sids)
-
-            targets = await self._filter_connection_in_range(sessions, mark)
-            if not targets:
+            if mark.geom is None:
                 return
+            latitude, longitude = self.geo_service.get_lat_lon(mark.geom)
+            rooms = get_mark_rooms(get_geohash(latitude, longitude))
+            manager = self.sio.manager
+            targets = []
+            if not isinstance(manager, BatchingRedisManager):
+                targets = match_mark_clients(
+                    self.sio,
+                    self.namespace,
+                    latitude,
+                    longitude,
+                    rooms,
+                    self.connections,
+                )
+                if not targets:
+                    return
 
             mark_data = ReadMark.model_validate(
                 mark, context={"request": request}
             ).model_dump(mode="json")
 
-            await self._send_notifications(targets, event, mark_data)
+            if isinstance(manager, BatchingRedisManager):
+                message = {
+                    "event": event,
+                    "data": mark_data,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "rooms": rooms,
+                }
+                await manager.publish_message(MARK_EVENT_METHOD, message)
+                return
+
+            await send_mark_event(self.sio, self.namespace, event, mark_data, targets)
 
         except Exception as e:
             logger.error(e)
-
-    async def _get_sessions(
-        self, room_sids: List[str]
-    ) -> Dict[str, Optional[MarkRequestParams]]:
-        sessions = {}
-        for sid in room_sids:
-            try:
-                params = await self.sio.get_session(sid, self.namespace)
-                sessions[sid] = params
-            except Exception as e:
-                logger.error(e)
-                sessions[sid] = None
-
-        return sessions
-
-    async def _filter_connection_in_range(
-        self, sessions: Dict[str, Optional[MarkRequestParams]], mark: Mark
-    ) -> Set[str]:
-        targets = set()
-
-        for sid, params in sessions.items():
-            if not params:
-                continue
-
-            if not self.geo_service.check_geohash_proximity(coords=params, mark=mark):
-                continue
-
-            in_range = await self.mark_repo.check_distance(
-                MarkFilter.from_request(params), mark
-            )
-            if in_range:
-                targets.add(sid)
-
-        return targets
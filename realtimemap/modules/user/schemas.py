@@ -8,7 +8,7 @@ from pydantic import BaseModel, field_validator, Field, ConfigDict, computed_fie
 from modules.gamefication.schemas.level.crud import LevelRead
 from modules.user_ban.schemas import ReadUsersBan
 from modules.user_subscription.schemas import ReadUserSubscription
-from utils.url_generator import generate_full_image_url
+from utils.url_generator import generate_full_image_url, image_variant_url_validator
 
 
 class UserGamefication(BaseModel):
@@ -46,10 +46,14 @@ class UserRead(schemas.BaseUser[int]):
     phone: Optional[str] = None
     username: str
     avatar: Optional[str] = None
+    avatar_thumbnail: Optional[str] = Field(None, validation_alias="avatar")
     subscription: Optional["ReadUserSubscription"] = None
     ban: Optional["ReadUsersBan"] = None
     gamefication: Optional[UserGamefication] = None
     _validate_avatar = field_validator("avatar", mode="before")(generate_full_image_url)
+    _validate_avatar_thumbnail = field_validator("avatar_thumbnail", mode="before")(
+        image_variant_url_validator("thumb")
+    )
 
     model_config = ConfigDict(from_attributes=True)
 
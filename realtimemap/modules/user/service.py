@@ -3,6 +3,11 @@ from typing import TYPE_CHECKING, Optional, List
 
 from errors.http2 import AuthenticationError
 from modules.user_ban.schemas import ReadUsersBan
+from utils.image import (
+    AVATAR_VARIANTS,
+    schedule_image_variants,
+    schedule_image_variants_removal,
+)
 from .schemas import (
     UserRead,
     UserRequestParams,
@@ -110,8 +115,29 @@ class UserService:
         return users
 
     async def update_user(self, user_id: int, update_data: UserUpdate) -> "User":
+        old_avatar = None
+        if update_data.avatar:
+            old_avatar = await self._get_avatar(user_id)
         user = await self.user_repo.update(user_id, update_data)
+        if update_data.avatar and user is not None and user.avatar:
+            # Превью аватара генерируется в celery после commit транзакции
+            avatar = user.avatar
+            self.user_repo.on_commit(
+                lambda: schedule_image_variants([avatar], AVATAR_VARIANTS)
+            )
+        self._remove_avatar_variants(old_avatar)
         return user
 
     async def delete_user(self, user_id: int) -> None:
+        avatar = await self._get_avatar(user_id)
         await self.user_repo.delete(user_id)
+        self._remove_avatar_variants(avatar)
+
+    async def _get_avatar(self, user_id: int):
+        user = await self.user_repo.get_by_id(user_id)
+        return user.avatar if user is not None else None
+
+    def _remove_avatar_variants(self, avatar) -> None:
+        # Превью старого аватара удаляются вместе с ним после commit транзакции
+        if avatar:
+            self.user_repo.on_commit(lambda: schedule_image_variants_removal([avatar]))
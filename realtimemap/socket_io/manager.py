@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import pickle
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import orjson
+import socketio
+
+from core.config import conf
+
+logger = logging.getLogger(__name__)
+
+BATCH_METHOD: str = "batch"
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class BatchingRedisManager(socketio.AsyncRedisManager):
+    """
+    AsyncRedisManager, which publishes messages for other workers in batches.
+    Messages of one event loop tick (or of publish_interval) are sent
+    as one Redis message and unpacked by every worker in the same order.
+    Local clients still receive events immediately.
+    Handlers registered by on_message run on every worker for messages
+    of publish_message, so each worker can select recipients among
+    its own clients.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        channel: str = "socketio",
+        publish_interval: float = 0.005,
+        publish_batch_size: int = 100,
+        write_only: bool = False,
+        **kwargs,
+    ):
+        super().__init__(url, channel=channel, write_only=write_only, **kwargs)
+        self.publish_interval = publish_interval
+        self.publish_batch_size = publish_batch_size
+        self._batch: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.handlers: Dict[str, MessageHandler] = {}
+
+    def on_message(self, method: str, handler: MessageHandler) -> None:
+        self.handlers[method] = handler
+
+    async def publish_message(self, method: str, data: Dict[str, Any]) -> None:
+        """
+        Run handler of the method on this worker and publish data to the others
+        """
+        await self.handlers[method](data)
+        await self._publish({"method": method, "data": data, "host_id": self.host_id})
+
+    async def _publish(self, data: Dict[str, Any]):
+        self._batch.append(data)
+        if len(self._batch) >= self.publish_batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """
+        Publish all collected messages now
+        """
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        if len(batch) == 1:
+            await super()._publish(batch[0])
+        else:
+            await super()._publish({"method": BATCH_METHOD, "messages": batch})
+
+    async def _flush_later(self) -> None:
+        try:
+            await asyncio.sleep(self.publish_interval)
+            self._flush_task = None
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Error on publish socket.io messages: {e}")
+
+    async def _listen(self):
+        async for message in super()._listen():
+            data = self._decode(message)
+            if isinstance(data, dict) and data.get("method") == BATCH_METHOD:
+                items = data["messages"]
+            else:
+                items = [message if data is None else data]
+            for item in items:
+                if not await self._handle_message(item):
+                    yield item
+
+    async def _handle_message(self, item: Any) -> bool:
+        """
+        Run registered handler, True - message is consumed
+        """
+        if not isinstance(item, dict) or item.get("method") not in self.handlers:
+            return False
+        # Свой воркер уже обработал сообщение в publish_message
+        if item.get("host_id") != self.host_id:
+            try:
+                await self.handlers[item["method"]](item["data"])
+            except Exception as e:
+                logger.error(f"Error on handle {item['method']} message: {e}")
+        return True
+
+    @staticmethod
+    def _decode(message: Any) -> Any:
+        # Тот же порядок, что и в AsyncPubSubManager._thread
+        if isinstance(message, dict):
+            return message
+        try:
+            return pickle.loads(message)
+        except Exception:
+            pass
+        try:
+            return orjson.loads(message)
+        except Exception:
+            return None
+
+
+def get_client_manager() -> socketio.AsyncManager:
+    """
+    Client manager of socket.io server from conf.socket.manager
+    """
+    if conf.socket.manager == "redis":
+        return BatchingRedisManager(
+            str(conf.redis.url),
+            channel=conf.socket.channel,
+            publish_interval=conf.socket.publish_interval,
+            publish_batch_size=conf.socket.publish_batch_size,
+        )
+    return socketio.AsyncManager()
@@ -1,21 +1,11 @@
-from contextlib import asynccontextmanager
 from typing import Any, Optional
 
 from socketio import AsyncNamespace
 
 from database.helper import db_helper
-from dependencies.auth.web_socket import socket_current_user
-from modules.chat.repository import PgChatRepository
-from modules.chat.service import ChatService
-from modules.message.repository import PgMessageRepository
-
-
-@asynccontextmanager
-async def get_chat_service():
-    async with db_helper.session_factory() as session:
-        message_repo = PgMessageRepository(session)
-        chat_repo = PgChatRepository(session)
-        yield ChatService(chat_repo, message_repo)
+from dependencies.auth.web_socket import socket_current_user_id
+from modules.chat.dependencies import get_chat_repository
+from socket_io.utils import enter_rooms
 
 
 class ChatNamespace(AsyncNamespace):
@@ -23,14 +13,21 @@ class ChatNamespace(AsyncNamespace):
         super().__init__(*args, **kwargs)
 
     async def on_connect(self, sid, _, auth):
-        user = await socket_current_user(self.get_token(auth))
-        if not user:
-            raise ConnectionRefusedError("Authentication required")
-
-        async with get_chat_service() as chat_service:
-            chats_ids = await chat_service.get_user_chats_ids(user.id)
-            for chat_id in chats_ids:
-                await self.enter_room(sid, room=str(chat_id))
+        token = self.get_token(auth)
+        # Одна сессия: токен (если его нет в кэше) и id чатов
+        async with db_helper.session_factory() as session:
+            user_id = await socket_current_user_id(token, session)
+            if not user_id:
+                raise ConnectionRefusedError("Authentication required")
+            chat_repo = await get_chat_repository(session)
+            chats_ids = await chat_repo.get_user_chats_ids(user_id)
+
+        enter_rooms(
+            self.server.manager,
+            sid,
+            self.namespace,
+            [str(chat_id) for chat_id in chats_ids],
+        )
 
     async def on_message(self, sid, data):
         pass
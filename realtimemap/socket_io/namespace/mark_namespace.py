@@ -1,23 +1,28 @@
 import logging
-from contextlib import asynccontextmanager
 from typing import Any, Optional
 
 from socketio import AsyncNamespace
 
 from database.helper import db_helper
 from modules.geo_service.service import GeoService
-from modules.mark.dependencies import get_pg_mark_repository
+from modules.mark.dependencies import get_mark_repository
 from modules.mark.filters import MarkFilter
-from modules.mark.schemas import MarkRequestParams, ReadMark
+from modules.mark.schemas import MarkBBoxParams, MarkRequestParams
+from modules.mark.serializer import MarkListSerializer
+from modules.notification.connections import mark_connections
+from modules.notification.dispatcher import get_notification_dispatcher
+from socket_io.utils import get_cell_rooms, get_room_changes
 
 logger = logging.getLogger(__name__)
 
 
-mark_repository_context = asynccontextmanager(get_pg_mark_repository)
-
-
-# TODO СДЕЛАТЬ РУМЫ ПО ГЕОХЭШУ ДЛЯ СОКРАЩЕНИЯ ЧИСЛА ЗАПРОСОВ
 class MarksNamespace(AsyncNamespace):
+    """
+    Search area of every client is kept in MarkConnectionIndex of the worker
+    and clients are in rooms of geohash cells covering their viewport,
+    so changes of a mark are matched only against clients of its cells.
+    """
+
     def __init__(self, namespace=None):
         super().__init__(namespace)
         self.geo_service = GeoService()
@@ -26,31 +31,47 @@ class MarksNamespace(AsyncNamespace):
     async def on_connect(sid, environ, auth):
         pass
 
-    @staticmethod
-    async def on_disconnect(sid):
-        pass
+    async def on_disconnect(self, sid):
+        mark_connections.remove(sid)
+        get_notification_dispatcher(self.server).discard(sid, self.namespace)
 
     async def on_marks_message(self, sid, data):
         params = self._validate_params(data)
-        await self.save_session(sid, params)
+        # Область поиска клиента хранится только в MarkConnectionIndex
+        mark_connections.update(sid, params)
+        await self._update_rooms(sid, params)
         if params:
-            async with db_helper.session_factory() as session:
-                mark_repository = await get_pg_mark_repository(
-                    session, self.geo_service
+            async with db_helper.session_factory() as db_session:
+                mark_repository = await get_mark_repository(
+                    db_session, self.geo_service
                 )
-                result = await mark_repository.get_marks(params)
-                result = [
-                    ReadMark.model_validate(mark).model_dump(mode="json")
-                    for mark in result
-                ]
+                # Первая страница ближайших меток
+                rows = await mark_repository.get_marks_rows(params)
+                rows = rows[: params.limit]
+                result = MarkListSerializer().to_list(rows)
                 await self.emit("marks_get", data=result, to=sid)
 
     async def on_message(self, sid, data):
         pass
 
+    async def _update_rooms(self, sid: str, params: Optional[MarkFilter]) -> None:
+        """
+        Move client to rooms of cells of the new viewport
+        """
+        rooms = get_cell_rooms(params.geohash_cells) if params else set()
+        enter, leave = get_room_changes(self.rooms(sid), rooms)
+        for room in leave:
+            await self.leave_room(sid, room)
+        for room in enter:
+            await self.enter_room(sid, room)
+
     def _validate_params(self, data: Any) -> Optional[MarkFilter]:
         try:
-            req = MarkRequestParams(**data)
+            # Viewport клиента, если переданы границы, иначе центр и радиус
+            if "min_latitude" in data:
+                req = MarkBBoxParams(**data)
+            else:
+                req = MarkRequestParams(**data)
             filters = MarkFilter.from_request(req, self.geo_service)
             return filters
         except Exception as e:
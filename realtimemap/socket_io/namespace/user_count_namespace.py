@@ -1,18 +1,33 @@
-from typing import Dict
+from typing import Optional
 
 from socketio import AsyncNamespace
 
+from socket_io.user_count import UserCounter, get_user_counter
+
+USER_COUNT_EVENT: str = "user_count"
+USER_COUNT_ROOM: str = "user_count"
+
 
 class UserCountNamespace(AsyncNamespace):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.count: int = 0
-        self.active_connections: Dict[str, str] = dict()
+    """
+    Number of online users of all workers. Clients are in one room, which gets
+    the number at most once per conf.socket.user_count_interval if it changed.
+    """
+
+    def __init__(self, namespace=None, counter: Optional[UserCounter] = None):
+        super().__init__(namespace)
+        self.counter = counter if counter is not None else get_user_counter()
 
     async def on_connect(self, sid, environ):
-        self.count += 1
-        await self.emit("user_count", {"count": self.count})
+        self.counter.connect()
+        self.counter.start(self._broadcast)
+        await self.enter_room(sid, USER_COUNT_ROOM)
+        # Новому клиенту - последнее известное число, остальным - по таймеру
+        count = max(self.counter.total, self.counter.local)
+        await self.emit(USER_COUNT_EVENT, {"count": count}, to=sid)
 
     async def on_disconnect(self, sid):
-        self.count -= 1
-        await self.emit("user_count", {"count": self.count})
+        self.counter.disconnect()
+
+    async def _broadcast(self, count: int) -> None:
+        await self.emit(USER_COUNT_EVENT, {"count": count}, room=USER_COUNT_ROOM)
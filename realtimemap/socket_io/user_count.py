@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple, Union
+
+from redis import asyncio as asyncredis
+
+from core.config import conf
+
+logger = logging.getLogger(__name__)
+
+# Число воркера считается устаревшим, если не обновлялось столько интервалов
+STALE_INTERVALS: int = 3
+
+
+class LocalUserCountStore:
+    """
+    In-process store of numbers of workers, for one process and tests
+    """
+
+    def __init__(self):
+        # воркер -> (число подключений, время обновления)
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        self._lock: Optional[Tuple[str, float]] = None
+        self._last: Optional[int] = None
+
+    async def update(self, worker_id: str, count: int, stale_after: float) -> int:
+        now = time.time()
+        self._counts[worker_id] = (count, now)
+        self._counts = {
+            worker: value
+            for worker, value in self._counts.items()
+            if now - value[1] <= stale_after
+        }
+        return sum(count for count, _ in self._counts.values())
+
+    async def acquire(self, worker_id: str, ttl: float) -> bool:
+        now = time.time()
+        if self._lock is not None and self._lock[1] > now:
+            return False
+        self._lock = (worker_id, now + ttl)
+        return True
+
+    async def swap_last(self, total: int) -> Optional[int]:
+        previous, self._last = self._last, total
+        return previous
+
+
+class RedisUserCountStore:
+    """
+    Numbers of workers in Redis hashes, total is their sum
+    """
+
+    def __init__(self, redis: asyncredis.Redis, prefix: str = conf.redis.prefix):
+        self.redis = redis
+        self.counts_key = f"{prefix}:user-count"
+        self.seen_key = f"{prefix}:user-count:seen"
+        self.lock_key = f"{prefix}:user-count:lock"
+        self.last_key = f"{prefix}:user-count:last"
+
+    async def update(self, worker_id: str, count: int, stale_after: float) -> int:
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(self.counts_key, worker_id, count)
+            pipe.hset(self.seen_key, worker_id, now)
+            pipe.hgetall(self.counts_key)
+            pipe.hgetall(self.seen_key)
+            *_, counts, seen = await pipe.execute()
+
+        # Воркер упал и не удалил свое число
+        stale = {worker for worker, ts in seen.items() if now - float(ts) > stale_after}
+        stale |= counts.keys() - seen.keys()
+        if stale:
+            await self.redis.hdel(self.counts_key, *stale)
+            await self.redis.hdel(self.seen_key, *stale)
+        return sum(
+            int(value) for worker, value in counts.items() if worker not in stale
+        )
+
+    async def acquire(self, worker_id: str, ttl: float) -> bool:
+        acquired = await self.redis.set(
+            self.lock_key, worker_id, nx=True, px=int(ttl * 1000)
+        )
+        return bool(acquired)
+
+    async def swap_last(self, total: int) -> Optional[int]:
+        previous = await self.redis.set(self.last_key, total, get=True)
+        return int(previous) if previous is not None else None
+
+
+class UserCounter:
+    """
+    Number of connections of the namespace in all workers.
+    Every worker keeps own number in the store and reads the total once
+    per interval. Only the worker, which took the lock of the interval,
+    broadcasts the total and only if it has changed.
+    """
+
+    def __init__(
+        self,
+        store: Union[LocalUserCountStore, RedisUserCountStore],
+        interval: float = 1.0,
+        worker_id: Optional[str] = None,
+    ):
+        self.store = store
+        self.interval = interval
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.local: int = 0
+        self.total: int = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def connect(self) -> None:
+        self.local += 1
+
+    def disconnect(self) -> None:
+        self.local = max(self.local - 1, 0)
+
+    def start(self, broadcast: Callable[[int], Awaitable[None]]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(broadcast))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def tick(self, broadcast: Callable[[int], Awaitable[None]]) -> None:
+        """
+        Save own number, read the total and broadcast it if needed
+        """
+        self.total = await self.store.update(
+            self.worker_id, self.local, self.interval * STALE_INTERVALS
+        )
+        # Блокировка на интервал: рассылка не чаще раза за интервал на кластер
+        if not await self.store.acquire(self.worker_id, self.interval):
+            return
+        if await self.store.swap_last(self.total) != self.total:
+            await broadcast(self.total)
+
+    async def _run(self, broadcast: Callable[[int], Awaitable[None]]) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick(broadcast)
+            except Exception as e:
+                logger.error(f"Error on update user count: {e}")
+
+
+def get_user_counter() -> UserCounter:
+    """
+    Counter of the worker: Redis store with redis manager of socket.io,
+    in-process store otherwise
+    """
+    if conf.socket.manager == "redis":
+        store = RedisUserCountStore(asyncredis.from_url(str(conf.redis.url)))
+    else:
+        store = LocalUserCountStore()
+    return UserCounter(store, interval=conf.socket.user_count_interval)
@@ -0,0 +1,17 @@
+__all__ = [
+    "get_cell_room",
+    "get_cell_rooms",
+    "get_mark_rooms",
+    "get_room_changes",
+    "get_room_members",
+    "enter_rooms",
+]
+
+from .rooms import (
+    enter_rooms,
+    get_cell_room,
+    get_cell_rooms,
+    get_mark_rooms,
+    get_room_changes,
+    get_room_members,
+)
@@ -0,0 +1,71 @@
+from typing import TYPE_CHECKING, Iterable, List, Optional, Set, Tuple
+
+from utils.geom.geom_sector import GEOHASH_PRECISION
+
+if TYPE_CHECKING:
+    from socketio import AsyncManager
+
+CELL_ROOM_PREFIX: str = "geohash:"
+
+
+def get_cell_room(cell: str) -> str:
+    return f"{CELL_ROOM_PREFIX}{cell}"
+
+
+def get_cell_rooms(cells: Iterable[str]) -> Set[str]:
+    """
+    Rooms of geohash cells, which cover viewport of client
+    """
+    return {get_cell_room(cell) for cell in cells}
+
+
+def get_mark_rooms(geohash: Optional[str]) -> List[str]:
+    """
+    Rooms of every cell containing the mark: one per geohash prefix.
+    Clients join cells of different precision, depending on viewport size.
+    """
+    if not geohash:
+        return []
+    return [
+        get_cell_room(geohash[:precision])
+        for precision in range(1, min(len(geohash), GEOHASH_PRECISION) + 1)
+    ]
+
+
+def get_room_changes(
+    current: Iterable[str], rooms: Set[str]
+) -> Tuple[Set[str], Set[str]]:
+    """
+    :param current: All rooms of client (with its own sid room)
+    :param rooms: Cell rooms of the new viewport
+    :return: (rooms to enter, cell rooms to leave)
+    """
+    current = {room for room in current if room.startswith(CELL_ROOM_PREFIX)}
+    return rooms - current, current - rooms
+
+
+def get_room_members(
+    manager: "AsyncManager", namespace: str, rooms: Iterable[str]
+) -> Set[str]:
+    """
+    Clients of this worker in any of the rooms.
+    Rooms are local in every manager, so only own clients are returned.
+    """
+    namespace_rooms = manager.rooms.get(namespace, {})
+    members = set()
+    for room in rooms:
+        members.update(namespace_rooms.get(room, ()))
+    return members
+
+
+def enter_rooms(
+    manager: "AsyncManager", sid: str, namespace: str, rooms: Iterable[str]
+) -> None:
+    """
+    Add client to all rooms in one synchronous pass of the manager.
+    Rooms are local to the worker in every manager, so it is the same
+    as awaiting enter_room for each of them.
+    """
+    eio_sid = manager.eio_sid_from_sid(sid, namespace)
+    for room in rooms:
+        manager.basic_enter_room(sid, namespace, room, eio_sid=eio_sid)
@@ -1,5 +1,8 @@
 __all__ = [
     "check_ended",
+    "export_marks",
+    "delete_image_variants",
+    "generate_image_variants",
     "welcome_email",
     "verify_email",
     "forgot_password_email",
@@ -8,8 +11,9 @@ __all__ = [
 ]
 
 
-from .database import check_ended
+from .database import check_ended, export_marks
 from .email.login_email import login_email
 from .email.password_email import forgot_password_email, change_password_email
 from .email.verify_email import verify_email
 from .email.welcome_email import welcome_email
+from .media import delete_image_variants, generate_image_variants
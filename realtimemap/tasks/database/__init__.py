@@ -1,4 +1,10 @@
-__all__ = ["check_mark_ended", "sync_user_metrics", "sync_active_user_metrics"]
+__all__ = [
+    "check_mark_ended",
+    "export_marks",
+    "sync_user_metrics",
+    "sync_active_user_metrics",
+]
 
 from .check_ended import check_mark_ended
+from .export_marks import export_marks
 from .sync_metrics import sync_user_metrics, sync_active_user_metrics
@@ -1,11 +1,17 @@
 import logging
 from contextlib import contextmanager
+from typing import List, Tuple
 
-from sqlalchemy import update, text
+import orjson
+from redis import Redis
+from sqlalchemy import update, func
 
 from core.celery import app
+from core.config import conf
 from database import get_sync_session
 from modules import Mark
+from modules.mark.cache import MarkTileCache, MarkCellCache
+from modules.mark.index import MARK_INDEX_CHANNEL, IndexAction
 
 session_context = contextmanager(get_sync_session)
 
@@ -18,7 +24,7 @@ def check_mark_ended():
     Проверяет и помечает истекшие метки.
 
     Использует массовое обновление (bulk update) вместо цикла для максимальной производительности.
-    Вычисление end_at происходит на уровне БД через SQL выражение (start_at + duration часов).
+    end_at - генерируемая колонка (start_at + duration часов).
 
     Преимущества перед старым подходом:
     - Один SQL запрос вместо N+1
@@ -37,19 +43,57 @@ def check_mark_ended():
             update(Mark)
             .where(
                 Mark.is_ended.is_(False),
-                text("start_at + (duration * interval '1 hour') <= NOW()"),
+                Mark.end_at <= func.now(),
             )
+            # Версию изменения для delta-sync выставляет триггер marks_version
             .values(is_ended=True)
+            .returning(Mark.id, func.ST_Y(Mark.geom), func.ST_X(Mark.geom))
             .execution_options(synchronize_session=False)
         )
 
-        result = session.execute(stmt)
-        count_updated = result.rowcount
+        rows = session.execute(stmt).all()
+        ended_ids = [row[0] for row in rows]
+        count_updated = len(ended_ids)
         session.commit()
 
         if count_updated > 0:
             logger.info(f"Marked as ended: {count_updated} marks")
+            publish_ended_marks(ended_ids)
+            invalidate_ended_caches([(row[1], row[2]) for row in rows])
         else:
             logger.info("No expired marks found")
 
         return count_updated
+
+
+def publish_ended_marks(ended_ids: List[int]) -> None:
+    """
+    Удаляет завершенные метки из индексов в памяти всех воркеров приложения.
+    """
+    if conf.mark.repository != "memory":
+        return
+    try:
+        with Redis.from_url(str(conf.redis.url)) as redis:
+            redis.publish(
+                MARK_INDEX_CHANNEL,
+                orjson.dumps({"action": IndexAction.REMOVE, "ids": ended_ids}),
+            )
+    except Exception as e:
+        logger.error(f"Error on publish ended marks: {e}")
+
+
+def invalidate_ended_caches(points: List[Tuple[float, float]]) -> None:
+    """
+    Удаляет из кэша векторные тайлы и ячейки с завершенными метками.
+    """
+    keys = MarkTileCache().get_point_keys(points)
+    try:
+        with Redis.from_url(str(conf.redis.url)) as redis:
+            # Удаляем пачками, чтобы не собирать огромную команду
+            for i in range(0, len(keys), 1000):
+                redis.delete(*keys[i : i + 1000])
+            with redis.pipeline(transaction=False) as pipe:
+                MarkCellCache().add_invalidate(pipe, points)
+                pipe.execute()
+    except Exception as e:
+        logger.error(f"Error on invalidate ended marks cache: {e}")
@@ -0,0 +1,59 @@
+import gzip
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+from uuid import uuid4
+
+from core.celery import app
+from core.config import conf
+from database import get_sync_session
+from modules.mark.export import (
+    EXPORT_PARTITION_SIZE,
+    get_export_filename,
+    get_export_writer,
+)
+from modules.mark.repository import PgMarkRepository
+from modules.mark.schemas import MarkExportParams
+
+session_context = contextmanager(get_sync_session)
+
+logger = logging.getLogger(__name__)
+
+
+@app.task
+def export_marks(params: Dict[str, Any]) -> str:
+    """
+    Выгружает метки в файл GeoJSON или CSV (при gzip - сжатый).
+
+    Строки читаются серверным курсором (yield_per) пачками и сразу
+    пишутся в файл, поэтому память не зависит от числа меток.
+
+    Returns:
+        str: Путь к файлу выгрузки
+    """
+    params = MarkExportParams.model_validate(params)
+    os.makedirs(conf.mark.export_dir, exist_ok=True)
+    path = os.path.join(
+        conf.mark.export_dir, f"{uuid4().hex}-{get_export_filename(params)}"
+    )
+    writer = get_export_writer(params)
+    opener = gzip.open if params.gzip else open
+    started = time.perf_counter()
+    count = 0
+
+    with session_context() as session, opener(path, "wb") as file:
+        query = PgMarkRepository.select_export_rows(params).execution_options(
+            yield_per=EXPORT_PARTITION_SIZE
+        )
+        file.write(writer.header())
+        for rows in session.execute(query).partitions():
+            file.write(writer.write(rows))
+            count += len(rows)
+        file.write(writer.footer())
+
+    logger.info(
+        f"Exported {count} marks to {path} in {time.perf_counter() - started:.1f} s"
+    )
+    return path
@@ -0,0 +1,3 @@
+__all__ = ["delete_image_variants", "generate_image_variants"]
+
+from .image_variants import delete_image_variants, generate_image_variants
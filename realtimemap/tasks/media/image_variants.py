@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import List, Optional
+
+from celery.signals import worker_init
+from libcloud.storage.types import ObjectDoesNotExistError
+from sqlalchemy_file.storage import StorageManager
+
+from core.celery import app
+from utils.image import (
+    IMAGE_VARIANT_CONTENT_TYPE,
+    IMAGE_VARIANTS,
+    get_variant_name,
+    make_image_variants,
+)
+from utils.storage import setup_file_storage
+
+logger = logging.getLogger(__name__)
+
+
+@worker_init.connect
+def init_file_storage(**kwargs) -> None:
+    # Хранилища sqlalchemy-file настраиваются только в create_app
+    setup_file_storage()
+
+
+@app.task
+def generate_image_variants(
+    paths: List[str], variants: Optional[List[str]] = None
+) -> int:
+    """
+    Создает уменьшенные WebP варианты загруженных изображений.
+
+    Декодирование и ресайз выполняются в воркере celery, а не в event loop
+    приложения. Варианты сохраняются рядом с оригиналом под именем
+    <file_id>.<variant>.webp, поэтому их URL вычисляется без запроса к БД.
+
+    Returns:
+        int: Количество сохраненных вариантов
+    """
+    started = time.perf_counter()
+    count = 0
+    for path in paths:
+        storage, file_id = path.split("/", 1)
+        try:
+            data = StorageManager.get_file(path).read()
+            images = make_image_variants(data, variants)
+        except ObjectDoesNotExistError:
+            logger.info(f"File does not exist: {path}")
+            continue
+        except Exception as e:
+            logger.error(f"Error on make image variants of {path}: {e}")
+            continue
+
+        for variant, content in images.items():
+            name = get_variant_name(file_id, variant)
+            StorageManager.save_file(
+                name,
+                content=iter([content]),
+                upload_storage=storage,
+                extra={
+                    "meta_data": {"filename": name},
+                    "content_type": IMAGE_VARIANT_CONTENT_TYPE,
+                },
+            )
+            count += 1
+
+    logger.info(
+        f"Saved {count} image variants in {time.perf_counter() - started:.2f} s"
+    )
+    return count
+
+
+@app.task
+def delete_image_variants(
+    paths: List[str], variants: Optional[List[str]] = None
+) -> int:
+    """
+    Удаляет WebP варианты удаленных или замененных изображений.
+
+    Оригинал удаляет sqlalchemy-file после commit транзакции, варианты
+    рядом с ним не связаны с моделью и удаляются по своим именам.
+
+    Returns:
+        int: Количество удаленных вариантов
+    """
+    count = 0
+    for path in paths:
+        storage, file_id = path.split("/", 1)
+        for variant in variants or IMAGE_VARIANTS:
+            name = get_variant_name(file_id, variant)
+            try:
+                StorageManager.delete_file(f"{storage}/{name}")
+                count += 1
+            except ObjectDoesNotExistError:
+                # Вариант еще не создан или уже удален
+                continue
+            except Exception as e:
+                logger.error(f"Error on delete image variant {storage}/{name}: {e}")
+    return count
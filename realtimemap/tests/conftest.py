@@ -13,6 +13,9 @@ from database.helper import db_helper
 from main import app
 from modules import BaseSqlModel
 
+# Общие фикстуры данных (test_user и др.) доступны всем тестам без импорта
+pytest_plugins = ["tests.repository.fixtures"]
+
 
 @pytest.fixture(scope="session")
 def event_loop_policy():
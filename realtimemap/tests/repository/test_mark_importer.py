@@ -0,0 +1,97 @@
+import pytest
+from pygeohash import encode
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from modules import Mark, User
+from modules.mark.importer import MarkImporter
+from utils.geom.geom_sector import GEOHASH_PRECISION
+
+
+class TestMarkImporter:
+    """Тесты для MarkImporter"""
+
+    @pytest.mark.asyncio
+    async def test_import_rows(self, db_session: AsyncSession, test_user):
+        """Тест импорта пачками с пропуском невалидных строк"""
+        category_id = (
+            await db_session.execute(
+                text(
+                    "INSERT INTO categories (category_name, color, icon, is_active) "
+                    "VALUES ('import', '#ffffff', '{}', true) RETURNING id"
+                )
+            )
+        ).scalar_one()
+        rows = [
+            {
+                "mark_name": f"Import {i}",
+                "latitude": 55.7558 + i * 0.001,
+                "longitude": 37.6173,
+                "category_id": category_id,
+            }
+            for i in range(5)
+        ]
+        rows.append({"mark_name": "No coordinates", "category_id": category_id})
+        rows.append({**rows[0], "category_id": category_id + 1000})
+        importer = MarkImporter(
+            db_session, owner_id=test_user.id, chunk_size=2, commit=False
+        )
+
+        result = await importer.import_rows(rows)
+
+        assert (result.rows, result.imported, result.skipped) == (7, 5, 2)
+        marks = (await db_session.scalars(select(Mark).order_by(Mark.id))).all()
+        assert [mark.geohash for mark in marks] == [
+            encode(row["latitude"], row["longitude"], GEOHASH_PRECISION)
+            for row in rows[:5]
+        ]
+
+    @pytest.mark.asyncio
+    async def test_import_commits_every_chunk(self, test_session_factory):
+        """Тест импорта с commit каждой пачки: временная таблица в ее транзакции"""
+        async with test_session_factory() as session:
+            user = User(
+                email="import@example.com",
+                username="import",
+                hashed_password="import",
+                is_active=True,
+                is_superuser=False,
+                is_verified=True,
+            )
+            session.add(user)
+            category_id = (
+                await session.execute(
+                    text(
+                        "INSERT INTO categories "
+                        "(category_name, color, icon, is_active) "
+                        "VALUES ('import', '#ffffff', '{}', true) RETURNING id"
+                    )
+                )
+            ).scalar_one()
+            await session.commit()
+            rows = [
+                {
+                    "mark_name": f"Import {i}",
+                    "latitude": 55.7558,
+                    "longitude": 37.6173,
+                    "category_id": category_id,
+                }
+                for i in range(5)
+            ]
+            try:
+                result = await MarkImporter(
+                    session, owner_id=user.id, chunk_size=2
+                ).import_rows(rows)
+
+                assert result.imported == 5
+                table = await session.scalar(
+                    text("SELECT to_regclass('pg_temp.mark_import')")
+                )
+                assert table is None
+            finally:
+                await session.execute(delete(Mark).where(Mark.owner_id == user.id))
+                await session.execute(delete(User).where(User.id == user.id))
+                await session.execute(
+                    text("DELETE FROM categories WHERE id = :id"), {"id": category_id}
+                )
+                await session.commit()
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from modules import Mark
+from modules.geo_service import GeoService
+from modules.mark.filters import MarkFilter
+from modules.mark.index import MarkIndex
+from modules.mark.schemas import MarkBBoxParams, MarkRequestParams
+
+CENTER = (55.7558, 37.6173)
+
+
+def make_mark(mark_id: int, latitude: float, longitude: float, **kwargs) -> Mark:
+    geo_service = GeoService()
+    params = MarkRequestParams(latitude=latitude, longitude=longitude)
+    start_at = kwargs.get("start_at", datetime.now())
+    duration = kwargs.get("duration", 12)
+    return Mark(
+        id=mark_id,
+        mark_name=f"Mark {mark_id}",
+        geom=from_shape(Point(longitude, latitude), 4326),
+        geohash=geo_service.get_geohash(params),
+        start_at=start_at,
+        duration=duration,
+        end_at=start_at + timedelta(hours=duration),
+        is_ended=kwargs.get("is_ended", False),
+        owner_id=1,
+        category_id=1,
+    )
+
+
+def make_filter(radius: int = 1000, **kwargs) -> MarkFilter:
+    params = MarkRequestParams(
+        latitude=CENTER[0],
+        longitude=CENTER[1],
+        radius=radius,
+        date=datetime.now(),
+        **kwargs,
+    )
+    return MarkFilter.from_request(params)
+
+
+class TestMarkIndex:
+    """Тесты для MarkIndex"""
+
+    def test_query_in_radius(self):
+        """Тест поиска меток в радиусе"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0] + 0.001, CENTER[1]))  # ~111 м
+        index.upsert(make_mark(2, CENTER[0] + 0.05, CENTER[1]))  # ~5.5 км
+
+        result = index.query(make_filter(radius=1000))
+
+        assert [mark.id for mark in result] == [1]
+
+    def test_query_across_cells(self):
+        """Тест поиска меток, попавших в соседнюю ячейку геохэша"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0], CENTER[1] + 0.06))  # ~3.7 км
+
+        result = index.query(make_filter(radius=5000))
+
+        assert [mark.id for mark in result] == [1]
+
+    def test_ended_mark_not_indexed(self):
+        """Тест того, что завершенные метки не попадают в индекс"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0], CENTER[1], is_ended=True))
+
+        assert len(index) == 0
+
+    def test_upsert_moves_mark(self):
+        """Тест перемещения метки при обновлении"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0], CENTER[1]))
+        index.upsert(make_mark(1, CENTER[0] + 1, CENTER[1]))
+
+        assert len(index) == 1
+        assert index.query(make_filter()) == []
+
+    def test_query_time_window(self):
+        """Тест фильтрации меток, закончившихся до начала окна поиска"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0], CENTER[1]))
+        index.upsert(
+            make_mark(2, CENTER[0], CENTER[1], start_at=datetime.now() - timedelta(60))
+        )
+
+        result = index.query(make_filter())
+
+        assert [mark.id for mark in result] == [1]
+
+    def test_remove(self):
+        """Тест удаления метки из индекса"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0], CENTER[1]))
+        index.remove(1)
+        index.remove(2)
+
+        assert len(index) == 0
+        assert index.query(make_filter()) == []
+
+    def test_query_nearest_first(self):
+        """Тест сортировки по расстоянию и лишней метки следующей страницы"""
+        index = MarkIndex()
+        for mark_id in range(1, 5):
+            index.upsert(make_mark(mark_id, CENTER[0] + 0.001 * mark_id, CENTER[1]))
+
+        result = index.query(make_filter(limit=2))
+
+        assert [mark.id for mark in result] == [1, 2, 3]
+
+    def test_query_bbox(self):
+        """Тест поиска меток в прямоугольнике viewport"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, CENTER[0] + 0.001, CENTER[1]))
+        index.upsert(make_mark(2, CENTER[0] + 0.02, CENTER[1]))  # выше bbox
+        index.upsert(make_mark(3, CENTER[0], CENTER[1] + 0.015))
+        params = MarkBBoxParams(
+            min_latitude=CENTER[0] - 0.01,
+            min_longitude=CENTER[1] - 0.02,
+            max_latitude=CENTER[0] + 0.01,
+            max_longitude=CENTER[1] + 0.02,
+            date=datetime.now(),
+        )
+
+        result = index.query(MarkFilter.from_request(params))
+
+        assert [mark.id for mark in result] == [1, 3]
+
+    def test_query_bbox_across_antimeridian(self):
+        """Тест прямоугольника, пересекающего антимеридиан"""
+        index = MarkIndex()
+        index.upsert(make_mark(1, 0.0, 179.99))
+        index.upsert(make_mark(2, 0.0, -179.99))
+        index.upsert(make_mark(3, 0.0, 0.0))
+        params = MarkBBoxParams(
+            min_latitude=-1,
+            min_longitude=179.5,
+            max_latitude=1,
+            max_longitude=-179.5,
+            date=datetime.now(),
+        )
+
+        filters = MarkFilter.from_request(params)
+        result = index.query(filters)
+
+        assert abs(filters.longitude) == 180
+        assert sorted(mark.id for mark in result) == [1, 2]
@@ -0,0 +1,353 @@
+import math
+from datetime import datetime, timedelta
+from typing import Any, Iterator
+
+import pytest
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.adapter import PgAdapter
+from modules import Mark, User
+from modules.mark.filters import MarkFilter, encode_cursor
+from modules.mark.model import MarkTombstone
+from modules.mark.repository import PgMarkRepository
+from modules.mark.schemas import MarkBBoxParams, MarkRequestParams
+from modules.mark.service import MarkService
+from utils.geom.geom_sector import GEOHASH_PRECISION
+
+SEED_MARKS_COUNT = 1_000_000
+# Ячейки геохэша точности 1
+GEOHASH_CELLS = list("0123456789bcdefghjkmnpqrstuvwxyz")
+
+
+def iter_plan_nodes(plan: Any) -> Iterator[dict]:
+    if isinstance(plan, dict):
+        yield plan
+        for value in plan.values():
+            yield from iter_plan_nodes(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from iter_plan_nodes(item)
+
+
+async def explain(session: AsyncSession, query) -> Any:
+    compiled = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    return result.scalar_one()
+
+
+async def seed_marks(
+    session: AsyncSession, count: int, with_stats: bool = False
+) -> None:
+    user = User(
+        email="seed@example.com",
+        hashed_password="seed",
+        username="seed",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+    )
+    session.add(user)
+    await session.flush()
+    category_id = (
+        await session.execute(
+            text(
+                "INSERT INTO categories (category_name, color, icon, is_active) "
+                "VALUES ('seed', '#ffffff', '{}', true) RETURNING id"
+            )
+        )
+    ).scalar_one()
+
+    if not with_stats:
+        # Триггер статистики кластеров сильно замедляет массовую вставку
+        await session.execute(
+            text("ALTER TABLE marks DISABLE TRIGGER marks_cell_stats")
+        )
+    await session.execute(
+        text(
+            """
+            INSERT INTO marks (mark_name, geom, owner_id, category_id, start_at,
+                               duration, is_ended, geohash, created_at, updated_at)
+            SELECT 'seed ' || s.n, s.point, :owner_id, :category_id, now(),
+                   12, false, ST_GeoHash(s.point, :precision), now(), now()
+            FROM (
+                SELECT n, ST_SetSRID(
+                    ST_MakePoint(random() * 360 - 180, random() * 170 - 85), 4326
+                ) AS point
+                FROM generate_series(1, :count) AS n
+            ) AS s
+            """
+        ),
+        {
+            "owner_id": user.id,
+            "category_id": category_id,
+            "count": count,
+            "precision": GEOHASH_PRECISION,
+        },
+    )
+    if not with_stats:
+        await session.execute(text("ALTER TABLE marks ENABLE TRIGGER marks_cell_stats"))
+    await session.execute(text("ANALYZE marks"))
+
+
+class TestMarkRepository:
+    """Тесты для PgMarkRepository"""
+
+    @pytest.mark.asyncio
+    async def test_radius_condition_uses_geography_index(
+        self, db_session: AsyncSession
+    ):
+        """Тест того, что радиусный фильтр использует индекс по geography(geom)"""
+        await seed_marks(db_session, SEED_MARKS_COUNT)
+        filters = MarkFilter.from_request(
+            MarkRequestParams(
+                latitude=55.7558, longitude=37.6173, radius=5000, date=datetime.now()
+            )
+        )
+        query = select(Mark.id).where(PgMarkRepository.get_radius_condition(filters))
+
+        plan = await explain(db_session, query)
+
+        index_names = {node.get("Index Name") for node in iter_plan_nodes(plan) if node}
+        assert "idx_marks_geom_geography" in index_names
+
+    @pytest.mark.asyncio
+    async def test_active_marks_query_uses_composite_index(
+        self, db_session: AsyncSession
+    ):
+        """Тест того, что запрос активных меток использует составной индекс"""
+        await seed_marks(db_session, SEED_MARKS_COUNT)
+        filters = MarkFilter.from_request(
+            MarkRequestParams(
+                latitude=55.7558, longitude=37.6173, radius=5000, date=datetime.now()
+            )
+        )
+        repo = PgMarkRepository(adapter=PgAdapter(session=db_session, model=Mark))
+        query = select(Mark.id).where(*repo.get_conditions(filters))
+
+        plan = await explain(db_session, query)
+
+        index_names = {node.get("Index Name") for node in iter_plan_nodes(plan) if node}
+        assert "idx_marks_active_geography_time" in index_names
+
+    @pytest.mark.asyncio
+    async def test_cell_stats_follow_marks(self, db_session: AsyncSession):
+        """Тест того, что статистика кластеров обновляется триггером"""
+        await seed_marks(db_session, 100, with_stats=True)
+        repo = PgMarkRepository(adapter=PgAdapter(session=db_session, model=Mark))
+
+        clusters = await repo.get_clusters(GEOHASH_CELLS)
+        assert sum(cluster.count for cluster in clusters) == 100
+        for cluster in clusters:
+            assert -90 <= cluster.latitude <= 90
+            assert -180 <= cluster.longitude <= 180
+
+        await db_session.execute(text("UPDATE marks SET is_ended = true"))
+
+        assert await repo.get_clusters(GEOHASH_CELLS) == []
+
+    @pytest.mark.asyncio
+    async def test_stream_partitions(self, db_session: AsyncSession):
+        """Тест чтения меток пачками через серверный курсор"""
+        await seed_marks(db_session, 100)
+        adapter = PgAdapter(session=db_session, model=Mark)
+
+        sizes = [
+            len(rows)
+            async for rows in adapter.stream_partitions(select(Mark.id), size=30)
+        ]
+
+        assert sizes == [30, 30, 30, 10]
+
+    @pytest.mark.asyncio
+    async def test_stream_marks_rows_is_capped(self, db_session: AsyncSession):
+        """Тест ограничения числа меток в потоке NDJSON"""
+        await seed_marks(db_session, 100)
+        await db_session.execute(
+            text(
+                """
+                UPDATE marks SET
+                    geom = ST_SetSRID(ST_MakePoint(0, 0), 4326),
+                    geohash = ST_GeoHash(ST_MakePoint(0, 0), :precision)
+                """
+            ),
+            {"precision": GEOHASH_PRECISION},
+        )
+        repo = PgMarkRepository(adapter=PgAdapter(session=db_session, model=Mark))
+        filters = MarkFilter.from_request(
+            MarkBBoxParams(
+                min_latitude=-1,
+                min_longitude=-1,
+                max_latitude=1,
+                max_longitude=1,
+                date=datetime.now(),
+            )
+        )
+
+        sizes = [
+            len(rows)
+            async for rows in repo.stream_marks_rows(filters, size=30, max_rows=45)
+        ]
+
+        assert sizes == [30, 15]
+
+    @pytest.mark.asyncio
+    async def test_marks_rows_pages_nearest_first(self, db_session: AsyncSession):
+        """Тест постраничной выдачи меток по курсору (distance, id)"""
+        await seed_marks(db_session, 10)
+        # Метки на одном меридиане, через ~111 м друг от друга
+        await db_session.execute(
+            text(
+                """
+                UPDATE marks SET
+                    geom = ST_SetSRID(
+                        ST_MakePoint(37.6173, 55.7558 + (id % 10) * 0.001), 4326
+                    ),
+                    geohash = ST_GeoHash(ST_MakePoint(37.6173, 55.7558), :precision)
+                """
+            ),
+            {"precision": GEOHASH_PRECISION},
+        )
+        repo = PgMarkRepository(adapter=PgAdapter(session=db_session, model=Mark))
+
+        pages, cursor = [], None
+        while True:
+            filters = MarkFilter.from_request(
+                MarkRequestParams(
+                    latitude=55.7558,
+                    longitude=37.6173,
+                    radius=5000,
+                    date=datetime.now(),
+                    limit=3,
+                    cursor=cursor,
+                )
+            )
+            rows = await repo.get_marks_rows(filters)
+            pages.append([row.id for row in rows[:3]])
+            if len(rows) <= 3:
+                break
+            cursor = encode_cursor(rows[2].distance, rows[2].id)
+
+        ids = [mark_id for page in pages for mark_id in page]
+        assert [len(page) for page in pages] == [3, 3, 3, 1]
+        assert ids == sorted(ids, key=lambda mark_id: mark_id % 10)
+
+    @pytest.mark.asyncio
+    async def test_tile_contains_marks_of_its_envelope(self, db_session: AsyncSession):
+        """Тест запроса векторного тайла: метки попадают только в свой тайл"""
+        await seed_marks(db_session, 10)
+        await db_session.execute(
+            text(
+                "UPDATE marks SET "
+                "geom = ST_SetSRID(ST_MakePoint(37.6173, 55.7558), 4326)"
+            )
+        )
+        repo = PgMarkRepository(adapter=PgAdapter(session=db_session, model=Mark))
+        zoom = 10
+        size = 2**zoom
+        latitude = math.radians(55.7558)
+        x = int((37.6173 + 180) / 360 * size)
+        y = int((1 - math.asinh(math.tan(latitude)) / math.pi) / 2 * size)
+        now = datetime.now()
+        start, end = now - timedelta(hours=1), now + timedelta(hours=1)
+
+        tile = await repo.get_tile(zoom, x, y, start, end)
+        empty = await repo.get_tile(zoom, (x + size // 2) % size, y, start, end)
+
+        assert tile
+        assert empty == b""
+
+    @pytest.mark.asyncio
+    async def test_changes_since_version(self, test_session_factory):
+        """Тест delta-sync: только метки, измененные транзакциями после версии"""
+        async with test_session_factory() as session:
+            await seed_marks(session, 10)
+            await session.execute(
+                text(
+                    """
+                    UPDATE marks SET
+                        geom = ST_SetSRID(ST_MakePoint(37.6173, 55.7558), 4326),
+                        geohash = ST_GeoHash(ST_MakePoint(37.6173, 55.7558), :precision)
+                    """
+                ),
+                {"precision": GEOHASH_PRECISION},
+            )
+            await session.commit()
+            ids = list(await session.scalars(select(Mark.id).order_by(Mark.id)))
+            owner_id = await session.scalar(select(Mark.owner_id).limit(1))
+            repo = PgMarkRepository(adapter=PgAdapter(session=session, model=Mark))
+            filters = MarkFilter.from_request(
+                MarkRequestParams(
+                    latitude=55.7558,
+                    longitude=37.6173,
+                    radius=5000,
+                    date=datetime.now(),
+                )
+            )
+            try:
+                version = await repo.get_change_version()
+                await session.commit()
+
+                # Каждое изменение - отдельная завершенная транзакция
+                await repo.delete_mark(ids[0])
+                await session.commit()
+                # Перемещение метки за пределы области
+                await session.execute(
+                    text(
+                        "UPDATE marks SET geom = ST_SetSRID(ST_MakePoint(0, 0), 4326) "
+                        "WHERE id = :id"
+                    ),
+                    {"id": ids[1]},
+                )
+                await session.commit()
+                await session.execute(
+                    text("UPDATE marks SET mark_name = 'changed' WHERE id = :id"),
+                    {"id": ids[2]},
+                )
+                await session.commit()
+                # Перемещение метки внутри области
+                await session.execute(
+                    text(
+                        "UPDATE marks SET "
+                        "geom = ST_SetSRID(ST_MakePoint(37.6183, 55.7568), 4326) "
+                        "WHERE id = :id"
+                    ),
+                    {"id": ids[3]},
+                )
+                await session.commit()
+
+                changed = await repo.get_changed_marks_rows(filters, version, 100)
+                deleted = await repo.get_deleted_mark_ids(filters, version, 100)
+                service = MarkService(repo, None, None, repo.geo_service)
+                changes = await service.get_changes(
+                    MarkRequestParams(
+                        latitude=55.7558,
+                        longitude=37.6173,
+                        radius=5000,
+                        date=datetime.now(),
+                    ),
+                    version,
+                )
+
+                # Метки seed записаны до версии и не возвращаются
+                assert [row.id for row in changed] == [ids[2], ids[3]]
+                assert sorted(deleted) == ids[:2] + [ids[3]]
+                # Перемещенная внутри области метка только в измененных
+                assert [mark["id"] for mark in changes["changed"]] == ids[2:4]
+                assert sorted(changes["deleted"]) == ids[:2]
+                latest = await repo.get_change_version()
+                assert await repo.get_changed_marks_rows(filters, latest, 100) == []
+            finally:
+                await session.rollback()
+                await session.execute(delete(Mark).where(Mark.owner_id == owner_id))
+                await session.execute(
+                    delete(MarkTombstone).where(MarkTombstone.mark_id.in_(ids))
+                )
+                await session.execute(delete(User).where(User.id == owner_id))
+                await session.execute(
+                    text("DELETE FROM categories WHERE category_name = 'seed'")
+                )
+                await session.commit()
@@ -0,0 +1,126 @@
+import io
+import warnings
+from types import SimpleNamespace
+
+import pytest
+from libcloud.storage.drivers.local import LocalStorageDriver
+from PIL import Image
+from sqlalchemy_file.storage import StorageManager
+
+from tasks.media.image_variants import delete_image_variants, generate_image_variants
+from utils.image import (
+    IMAGE_VARIANTS,
+    get_original_name,
+    get_variant_name,
+    make_image_variants,
+)
+from utils.url_generator import generate_full_image_url, get_media_url
+
+
+def make_image(
+    size=(2000, 1000), mode="RGB", image_format="JPEG", color=(255, 0, 0)
+) -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, color=color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def variants_storage(tmp_path):
+    (tmp_path / "variants").mkdir()
+    default = StorageManager._default_storage_name
+    StorageManager.add_storage(
+        "variants", LocalStorageDriver(str(tmp_path)).get_container("variants")
+    )
+    yield tmp_path / "variants"
+    StorageManager._storages.pop("variants")
+    StorageManager._default_storage_name = default
+
+
+class TestImageVariants:
+    def test_variants_are_webp_and_fit_size(self):
+        result = make_image_variants(make_image())
+
+        assert set(result) == set(IMAGE_VARIANTS)
+        for name, data in result.items():
+            with Image.open(io.BytesIO(data)) as image:
+                assert image.format == "WEBP"
+                assert image.width == IMAGE_VARIANTS[name][0]
+                assert image.height == IMAGE_VARIANTS[name][1] // 2
+
+    def test_small_image_is_not_enlarged(self):
+        result = make_image_variants(make_image(size=(100, 50)), ["preview"])
+
+        with Image.open(io.BytesIO(result["preview"])) as image:
+            assert image.size == (100, 50)
+
+    def test_transparency_is_kept(self):
+        data = make_image(
+            size=(500, 500), mode="RGBA", image_format="PNG", color=(255, 0, 0, 128)
+        )
+
+        result = make_image_variants(data, ["thumb"])
+
+        with Image.open(io.BytesIO(result["thumb"])) as image:
+            assert image.mode == "RGBA"
+
+    def test_variants_are_deleted_by_original_path(self, variants_storage):
+        StorageManager.save_file(
+            "photo", content=iter([make_image()]), upload_storage="variants"
+        )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            assert generate_image_variants(["variants/photo"]) == len(IMAGE_VARIANTS)
+        assert delete_image_variants(["variants/photo"]) == len(IMAGE_VARIANTS)
+        # Повторное удаление не падает на отсутствующих файлах
+        assert delete_image_variants(["variants/photo"]) == 0
+
+        assert [path.name for path in variants_storage.iterdir()] == ["photo"]
+
+    @pytest.mark.parametrize(
+        "name, original",
+        [
+            pytest.param(get_variant_name("abc", "thumb"), "abc", id="variant"),
+            pytest.param("abc", None, id="original"),
+            pytest.param("abc.unknown.webp", None, id="unknown_variant"),
+        ],
+    )
+    def test_get_original_name(self, name, original):
+        assert get_original_name(name) == original
+
+    def test_variant_url(self):
+        photo = [SimpleNamespace(path="marks/1", upload_storage="marks")]
+        info = SimpleNamespace(context=None)
+
+        original = generate_full_image_url(photo, info)
+        thumbnail = generate_full_image_url(photo, info, "thumb")
+
+        assert thumbnail == [get_variant_name(original[0], "thumb")]
+        # Повторная валидация готового URL не добавляет суффикс еще раз
+        assert generate_full_image_url(thumbnail, info, "thumb") == thumbnail
+        assert generate_full_image_url(thumbnail[0], info, "thumb") == thumbnail[0]
+
+    def test_media_url_resolved_once_per_request(self):
+        calls = []
+
+        def url_for(name, **params):
+            calls.append(name)
+            return f"http://testserver/media/{params['storage']}/{params['file_id']}"
+
+        request = SimpleNamespace(state=SimpleNamespace(), url_for=url_for)
+        info = SimpleNamespace(context={"request": request})
+        photo = [
+            SimpleNamespace(path="marks/1", upload_storage="marks"),
+            SimpleNamespace(path="marks/2", upload_storage="marks"),
+        ]
+
+        result = generate_full_image_url(photo, info)
+        generate_full_image_url(photo, info, "thumb")
+
+        assert result == [
+            "http://testserver/media/marks/1",
+            "http://testserver/media/marks/2",
+        ]
+        assert get_media_url(request) == "http://testserver/media"
+        assert calls == ["get_file"]
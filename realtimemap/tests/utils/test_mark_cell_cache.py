@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from modules.mark.cache import MarkCellCache, SET_IF_GENERATION_SCRIPT
+from modules.mark.filters import MarkFilter, encode_cursor
+from modules.mark.schemas import MarkRequestParams
+
+CENTER = (55.7558, 37.6173)
+
+
+class LocalRedis:
+    """
+    In-process stand-in of Redis strings, eval runs SET_IF_GENERATION_SCRIPT
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def eval(self, script, numkeys, *args):
+        assert script == SET_IF_GENERATION_SCRIPT
+        keys, argv = args[:numkeys], args[numkeys:]
+        for i in range(0, numkeys, 2):
+            generation = self.data.get(keys[i + 1], b"").decode()
+            if generation == argv[i + 1]:
+                self.data[keys[i]] = argv[i + 2]
+
+    def pipeline(self, **kwargs) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    def __init__(self, redis: LocalRedis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, ttl):
+        self.commands.append(("expire", key))
+
+    def delete(self, key):
+        self.commands.append(("delete", key))
+
+    async def execute(self):
+        for command, key in self.commands:
+            if command == "incr":
+                value = int(self.redis.data.get(key, b"0")) + 1
+                self.redis.data[key] = str(value).encode()
+            elif command == "delete":
+                self.redis.data.pop(key, None)
+
+
+def make_entry(mark_id: int, latitude: float, longitude: float, **kwargs) -> dict:
+    start_at = kwargs.get("start_at", datetime.now())
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "start_at": start_at.timestamp(),
+        "end_at": (start_at + timedelta(hours=12)).timestamp(),
+        "mark": {"id": mark_id},
+    }
+
+
+def make_filter(radius: int = 1000, **kwargs) -> MarkFilter:
+    params = MarkRequestParams(
+        latitude=CENTER[0],
+        longitude=CENTER[1],
+        radius=radius,
+        date=datetime.now(),
+        **kwargs,
+    )
+    return MarkFilter.from_request(params)
+
+
+class TestMarkCellCache:
+    def test_refine_by_distance(self):
+        cache = MarkCellCache()
+        entries = [
+            make_entry(1, CENTER[0] + 0.001, CENTER[1]),  # ~111 м
+            make_entry(2, CENTER[0] + 0.05, CENTER[1]),  # ~5.5 км
+        ]
+
+        result = cache.refine(entries, make_filter(radius=1000))
+
+        assert [mark_id for _, mark_id, _ in result] == [1]
+
+    def test_refine_by_time(self):
+        cache = MarkCellCache()
+        entries = [
+            make_entry(1, CENTER[0], CENTER[1]),
+            make_entry(
+                2, CENTER[0], CENTER[1], start_at=datetime.now() - timedelta(60)
+            ),
+        ]
+
+        result = cache.refine(entries, make_filter())
+
+        assert [mark_id for _, mark_id, _ in result] == [1]
+
+    def test_refine_pages_nearest_first(self):
+        cache = MarkCellCache()
+        entries = [
+            make_entry(mark_id, CENTER[0] + 0.001 * (4 - mark_id), CENTER[1])
+            for mark_id in range(1, 4)
+        ]
+
+        first = cache.refine(entries, make_filter(limit=1))
+        after = encode_cursor(*first[0][:2])
+        second = cache.refine(entries, make_filter(limit=1, cursor=after))
+
+        assert [mark_id for _, mark_id, _ in first] == [3, 2]
+        assert [mark_id for _, mark_id, _ in second] == [2, 1]
+
+    def test_point_keys(self):
+        cache = MarkCellCache(prefix="test")
+
+        keys = cache.get_point_keys([CENTER, (CENTER[0] + 0.0001, CENTER[1])])
+
+        assert keys == ["test:mark-cell:ucfv0"]
+
+    def test_cells_cover_radius(self):
+        cache = MarkCellCache()
+
+        cells = cache.get_cells(make_filter(radius=5000))
+
+        assert "ucfv0" in cells
+        assert all(len(cell) == cache.precision for cell in cells)
+
+
+class TestMarkCellCacheGeneration:
+    @pytest.mark.asyncio
+    async def test_set_and_get(self):
+        cache = MarkCellCache(LocalRedis())
+        entry = make_entry(1, *CENTER)
+
+        _, generations = await cache.get_many(["ucfv0"])
+        await cache.set_many({"ucfv0": [entry]}, generations)
+        cached, _ = await cache.get_many(["ucfv0"])
+
+        assert cached == {"ucfv0": [entry]}
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_load_skips_set(self):
+        cache = MarkCellCache(LocalRedis())
+        entry = make_entry(1, *CENTER)
+
+        cached, generations = await cache.get_many(["ucfv0"])
+        # Изменение метки закоммичено, пока ячейка загружалась из БД
+        await cache.invalidate([CENTER])
+        await cache.set_many({"ucfv0": [entry]}, generations)
+
+        assert cached == {"ucfv0": None}
+        assert (await cache.get_many(["ucfv0"]))[0] == {"ucfv0": None}
+
+    @pytest.mark.asyncio
+    async def test_load_after_invalidate_is_cached(self):
+        cache = MarkCellCache(LocalRedis())
+        entry = make_entry(1, *CENTER)
+        await cache.invalidate([CENTER])
+
+        _, generations = await cache.get_many(["ucfv0"])
+        await cache.set_many({"ucfv0": [entry]}, generations)
+
+        assert (await cache.get_many(["ucfv0"]))[0] == {"ucfv0": [entry]}
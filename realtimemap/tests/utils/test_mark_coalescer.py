@@ -0,0 +1,76 @@
+import pytest
+
+from modules.notification.coalescer import MARK_BATCH_EVENT, MarkEventCoalescer
+
+CREATE, UPDATE, DELETE = "marks_created", "marks_updated", "marks_deleted"
+
+
+class RecordingServer:
+    def __init__(self):
+        self.emitted = []
+
+    async def emit(self, event, data=None, to=None, namespace=None):
+        self.emitted.append((event, data, sorted(to)))
+
+
+def make_coalescer():
+    sio = RecordingServer()
+    return sio, MarkEventCoalescer(sio, "/marks", window=10)
+
+
+class TestMarkEventCoalescer:
+    @pytest.mark.asyncio
+    async def test_repeated_updates_are_sent_once_with_last_data(self):
+        sio, coalescer = make_coalescer()
+
+        coalescer.add(UPDATE, {"id": 1, "mark_name": "first"}, ["sid-1"])
+        coalescer.add(UPDATE, {"id": 1, "mark_name": "second"}, ["sid-1"])
+        await coalescer.flush()
+
+        assert sio.emitted == [
+            (
+                MARK_BATCH_EVENT,
+                {
+                    CREATE: [],
+                    UPDATE: [{"id": 1, "mark_name": "second"}],
+                    DELETE: [],
+                },
+                ["sid-1"],
+            )
+        ]
+
+    @pytest.mark.asyncio
+    async def test_created_and_deleted_in_window_is_not_sent(self):
+        sio, coalescer = make_coalescer()
+
+        coalescer.add(CREATE, {"id": 1}, ["sid-1"])
+        coalescer.add(UPDATE, {"id": 1}, ["sid-1"])
+        coalescer.add(DELETE, {"id": 1}, ["sid-1"])
+        coalescer.add(CREATE, {"id": 2}, ["sid-1"])
+        coalescer.add(UPDATE, {"id": 2, "mark_name": "new"}, ["sid-1"])
+        await coalescer.flush()
+
+        [(_, payload, _)] = sio.emitted
+        assert payload[CREATE] == [{"id": 2, "mark_name": "new"}]
+        assert payload[UPDATE] == payload[DELETE] == []
+
+    @pytest.mark.asyncio
+    async def test_one_emit_per_set_of_marks(self):
+        sio, coalescer = make_coalescer()
+
+        coalescer.add(CREATE, {"id": 1}, ["sid-1", "sid-2", "sid-3"])
+        coalescer.add(DELETE, {"id": 2}, ["sid-1", "sid-2"])
+        await coalescer.flush()
+
+        assert sorted(sio.emitted, key=lambda item: item[2]) == [
+            (
+                MARK_BATCH_EVENT,
+                {CREATE: [{"id": 1}], UPDATE: [], DELETE: [{"id": 2}]},
+                ["sid-1", "sid-2"],
+            ),
+            (
+                MARK_BATCH_EVENT,
+                {CREATE: [{"id": 1}], UPDATE: [], DELETE: []},
+                ["sid-3"],
+            ),
+        ]
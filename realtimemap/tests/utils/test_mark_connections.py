@@ -0,0 +1,96 @@
+import random
+from datetime import datetime
+
+from modules.geo_service.service import GeoService
+from modules.mark.filters import MarkFilter
+from modules.mark.schemas import MarkBBoxParams, MarkRequestParams
+from modules.notification.connections import MarkConnectionIndex
+
+CENTER = (55.7558, 37.6173)
+
+
+def make_filter(latitude: float, longitude: float, radius: int) -> MarkFilter:
+    params = MarkRequestParams(
+        latitude=latitude, longitude=longitude, radius=radius, date=datetime.now()
+    )
+    return MarkFilter.from_request(params)
+
+
+def make_bbox_filter(south, west, north, east) -> MarkFilter:
+    params = MarkBBoxParams(
+        min_latitude=south,
+        min_longitude=west,
+        max_latitude=north,
+        max_longitude=east,
+        date=datetime.now(),
+    )
+    return MarkFilter.from_request(params)
+
+
+class TestMarkConnectionIndex:
+    def test_match_same_as_filter_contains(self):
+        random.seed(1)
+        index = MarkConnectionIndex(capacity=4)
+        filters = {}
+        for i in range(50):
+            sid = f"sid-{i}"
+            if i % 5 == 0:
+                latitude = CENTER[0] + random.uniform(-0.2, 0.1)
+                longitude = CENTER[1] + random.uniform(-0.2, 0.1)
+                filters[sid] = make_bbox_filter(
+                    latitude, longitude, latitude + 0.1, longitude + 0.1
+                )
+            else:
+                filters[sid] = make_filter(
+                    CENTER[0] + random.uniform(-0.2, 0.2),
+                    CENTER[1] + random.uniform(-0.2, 0.2),
+                    random.randint(500, 20000),
+                )
+            index.update(sid, filters[sid])
+
+        for _ in range(20):
+            latitude = CENTER[0] + random.uniform(-0.3, 0.3)
+            longitude = CENTER[1] + random.uniform(-0.3, 0.3)
+            expected = {
+                sid
+                for sid, item in filters.items()
+                if item.contains(
+                    latitude,
+                    longitude,
+                    GeoService.distance(
+                        item.latitude, item.longitude, latitude, longitude
+                    ),
+                )
+            }
+
+            assert set(index.match(latitude, longitude)) == expected
+
+    def test_bbox_across_antimeridian(self):
+        index = MarkConnectionIndex()
+        index.update("sid", make_bbox_filter(-10.0, 170.0, 10.0, -170.0))
+
+        assert index.match(0.0, 179.0) == ["sid"]
+        assert index.match(0.0, -179.0) == ["sid"]
+        assert index.match(0.0, 0.0) == []
+
+    def test_removed_slot_is_reused(self):
+        index = MarkConnectionIndex(capacity=1)
+        index.update("first", make_filter(*CENTER, 1000))
+        index.update("second", make_filter(*CENTER, 1000))
+
+        index.remove("first")
+        index.update("third", make_filter(*CENTER, 1000))
+
+        assert len(index) == 2
+        assert sorted(index.match(*CENTER)) == ["second", "third"]
+        index.update("second", None)
+        assert index.match(*CENTER) == ["third"]
+
+    def test_match_only_given_sids(self):
+        index = MarkConnectionIndex()
+        for sid in ("a", "b", "c"):
+            index.update(sid, make_filter(*CENTER, 1000))
+        index.remove("c")
+
+        assert index.match(*CENTER, sids={"b", "c", "unknown"}) == ["b"]
+        assert index.match(*CENTER, sids=set()) == []
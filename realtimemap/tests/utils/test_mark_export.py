@@ -0,0 +1,65 @@
+import gzip
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import orjson
+
+from modules.mark.export import CsvExportWriter, GeoJSONExportWriter, GzipChunks
+
+
+def make_row(mark_id: int) -> SimpleNamespace:
+    start_at = datetime(2025, 1, 1, 12, 0)
+    return SimpleNamespace(
+        id=mark_id,
+        mark_name=f"Mark {mark_id}",
+        owner_id=1,
+        category_id=2,
+        additional_info=None,
+        latitude=55.7558,
+        longitude=37.6173,
+        start_at=start_at,
+        end_at=start_at + timedelta(hours=12),
+        is_ended=False,
+    )
+
+
+def write(writer, partitions) -> bytes:
+    chunks = [writer.header()]
+    chunks += [writer.write(rows) for rows in partitions]
+    chunks.append(writer.footer())
+    return b"".join(chunks)
+
+
+class TestMarkExport:
+    def test_geojson_across_partitions(self):
+        partitions = [[make_row(1), make_row(2)], [], [make_row(3)]]
+
+        data = orjson.loads(write(GeoJSONExportWriter(), partitions))
+
+        assert data["type"] == "FeatureCollection"
+        assert [feature["properties"]["id"] for feature in data["features"]] == [
+            1,
+            2,
+            3,
+        ]
+        assert data["features"][0]["geometry"]["coordinates"] == [37.6173, 55.7558]
+
+    def test_geojson_empty(self):
+        data = orjson.loads(write(GeoJSONExportWriter(), []))
+
+        assert data["features"] == []
+
+    def test_csv(self):
+        lines = write(CsvExportWriter(), [[make_row(1)], [make_row(2)]]).splitlines()
+
+        assert lines[0].startswith(b"id,mark_name,")
+        assert len(lines) == 3
+
+    def test_gzip_chunks(self):
+        chunks = [b"first,", b"second"]
+        compressor = GzipChunks()
+
+        data = b"".join(compressor.compress(chunk) for chunk in chunks)
+        data += compressor.flush()
+
+        assert gzip.decompress(data) == b"first,second"
@@ -0,0 +1,146 @@
+import inspect
+from datetime import datetime
+
+import pytest
+import socketio
+
+from modules.mark.filters import MarkFilter
+from modules.mark.schemas import MarkBBoxParams, MarkRequestParams
+from modules.notification.connections import MarkConnectionIndex
+from modules.notification.marks_notification import match_mark_clients
+from socket_io.utils import (
+    get_cell_rooms,
+    get_mark_rooms,
+    get_room_changes,
+    get_room_members,
+)
+from utils.geom.geom_sector import get_geohash
+
+CENTER = (55.7558, 37.6173)
+NAMESPACE = "/marks"
+
+
+def mark_rooms(latitude: float, longitude: float) -> set:
+    return set(get_mark_rooms(get_geohash(latitude, longitude)))
+
+
+def make_filter(latitude: float, longitude: float, radius: int) -> MarkFilter:
+    return MarkFilter.from_request(
+        MarkRequestParams(
+            latitude=latitude, longitude=longitude, radius=radius, date=datetime.now()
+        )
+    )
+
+
+class RecordingIndex(MarkConnectionIndex):
+    def __init__(self):
+        super().__init__()
+        self.checked = []
+
+    def match(self, latitude, longitude, sids=None):
+        self.checked.append(set(sids) if sids is not None else None)
+        return super().match(latitude, longitude, sids)
+
+
+async def connect(server: socketio.AsyncServer, eio_sid: str, rooms) -> str:
+    sid = server.manager.connect(eio_sid, NAMESPACE)
+    if inspect.isawaitable(sid):
+        sid = await sid
+    for room in rooms:
+        await server.enter_room(sid, room, namespace=NAMESPACE)
+    return sid
+
+
+class TestMarkRooms:
+    def test_mark_in_radius_is_sent_to_client_room(self):
+        filters = MarkFilter.from_request(
+            MarkRequestParams(
+                latitude=CENTER[0],
+                longitude=CENTER[1],
+                radius=1000,
+                date=datetime.now(),
+            )
+        )
+        rooms = get_cell_rooms(filters.geohash_cells)
+
+        assert rooms & mark_rooms(CENTER[0] + 0.005, CENTER[1])  # ~550 м
+        assert not rooms & mark_rooms(CENTER[0] + 1.0, CENTER[1])  # ~111 км
+
+    def test_mark_in_bbox_is_sent_to_client_room(self):
+        filters = MarkFilter.from_request(
+            MarkBBoxParams(
+                min_latitude=55.7,
+                min_longitude=37.5,
+                max_latitude=55.8,
+                max_longitude=37.7,
+                date=datetime.now(),
+            )
+        )
+        rooms = get_cell_rooms(filters.geohash_cells)
+
+        assert rooms & mark_rooms(55.75, 37.6)
+        assert not rooms & mark_rooms(59.93, 30.33)
+
+    def test_mark_rooms_are_geohash_prefixes(self):
+        assert get_mark_rooms("ucfv0") == [
+            "geohash:u",
+            "geohash:uc",
+            "geohash:ucf",
+            "geohash:ucfv",
+            "geohash:ucfv0",
+        ]
+        assert get_mark_rooms(None) == []
+
+    def test_room_changes_keep_common_and_sid_rooms(self):
+        current = ["sid", "geohash:ucfv0", "geohash:ucfv1"]
+        rooms = {"geohash:ucfv1", "geohash:ucfv2"}
+
+        enter, leave = get_room_changes(current, rooms)
+
+        assert enter == {"geohash:ucfv2"}
+        assert leave == {"geohash:ucfv0"}
+
+
+class TestMarkRoomMatch:
+    @pytest.mark.asyncio
+    async def test_only_members_of_mark_rooms_are_matched(self):
+        server = socketio.AsyncServer(async_mode="asgi")
+        connections = RecordingIndex()
+        near = make_filter(CENTER[0], CENTER[1], 1000)
+        far = make_filter(59.93, 30.33, 1000)
+        inside = await connect(server, "eio-1", get_cell_rooms(near.geohash_cells))
+        # В ячейке метки, но метка вне радиуса
+        edge = await connect(server, "eio-2", get_cell_rooms(near.geohash_cells))
+        other = await connect(server, "eio-3", get_cell_rooms(far.geohash_cells))
+        connections.update(inside, near)
+        connections.update(edge, make_filter(CENTER[0] + 0.008, CENTER[1], 100))
+        connections.update(other, far)
+        rooms = get_mark_rooms(get_geohash(*CENTER))
+
+        targets = match_mark_clients(
+            server, NAMESPACE, CENTER[0], CENTER[1], rooms, connections
+        )
+
+        assert targets == [inside]
+        assert connections.checked == [{inside, edge}]
+        assert get_room_members(server.manager, NAMESPACE, rooms) == {inside, edge}
+
+    @pytest.mark.asyncio
+    async def test_no_room_members_skips_match(self):
+        server = socketio.AsyncServer(async_mode="asgi")
+        connections = RecordingIndex()
+        far = make_filter(59.93, 30.33, 1000)
+        other = await connect(server, "eio-1", get_cell_rooms(far.geohash_cells))
+        connections.update(other, far)
+
+        targets = match_mark_clients(
+            server,
+            NAMESPACE,
+            CENTER[0],
+            CENTER[1],
+            get_mark_rooms(get_geohash(*CENTER)),
+            connections,
+        )
+
+        assert targets == []
+        assert connections.checked == []
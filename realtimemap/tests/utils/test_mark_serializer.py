@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from modules import Category, Mark
+from modules.mark.schemas import ReadMark
+from modules.mark.serializer import MarkListSerializer, MarkRow
+
+
+def make_mark(photo=None) -> Mark:
+    start_at = datetime(2025, 10, 30, 12, 0)
+    category = Category(
+        id=1,
+        category_name="Category",
+        color="#ff0000",
+        icon=SimpleNamespace(path="category/icon", upload_storage="category"),
+        is_active=True,
+    )
+    return Mark(
+        id=1,
+        mark_name="Mark",
+        geom=from_shape(Point(37.6173, 55.7558), 4326),
+        geohash="ucfv0n6rf",
+        start_at=start_at,
+        duration=12,
+        end_at=start_at + timedelta(hours=12),
+        is_ended=False,
+        owner_id=1,
+        category_id=1,
+        category=category,
+        additional_info="info",
+        photo=photo,
+    )
+
+
+def make_row(mark: Mark) -> MarkRow:
+    return MarkRow(
+        id=mark.id,
+        mark_name=mark.mark_name,
+        owner_id=mark.owner_id,
+        additional_info=mark.additional_info,
+        photo=mark.photo,
+        latitude=55.7558,
+        longitude=37.6173,
+        start_at=mark.start_at,
+        end_at=mark.end_at,
+        is_ended=mark.is_ended,
+        geohash=mark.geohash,
+        category=mark.category,
+    )
+
+
+class TestMarkListSerializer:
+    def test_same_as_read_mark(self):
+        mark = make_mark()
+
+        expected = ReadMark.model_validate(mark).model_dump(mode="json")
+        result = MarkListSerializer().to_dict(make_row(mark))
+
+        assert result == expected
+
+    def test_photo_urls(self):
+        photo = [SimpleNamespace(path="marks/1", upload_storage="marks")]
+        mark = make_mark(photo=photo)
+
+        expected = ReadMark.model_validate(mark).model_dump(mode="json")
+        result = MarkListSerializer().to_dict(make_row(mark))
+
+        assert result["photo"] == expected["photo"]
+        assert result["photo_thumbnail"] == expected["photo_thumbnail"]
+        assert result["photo_thumbnail"][0].endswith("marks/1.thumb.webp")
+
+    def test_photo_urls_of_request(self):
+        photo = [SimpleNamespace(path="marks/1", upload_storage="marks")]
+        row = make_row(make_mark(photo=photo))
+
+        result = MarkListSerializer("http://host/media").to_dict(row)
+
+        assert result["photo"] == ["http://host/media/marks/1"]
+        assert result["category"]["icon"] == "http://host/media/category/icon"
+
+    def test_cached_mark_gets_media_url_of_request(self):
+        photo = [SimpleNamespace(path="marks/1", upload_storage="marks")]
+        row = make_row(make_mark(photo=photo))
+
+        cached = MarkListSerializer(media_url=None).to_dict(row)
+        result = MarkListSerializer.with_media_url(cached, "http://host/media")
+
+        assert cached["photo"] == ["marks/1"]
+        assert cached["category"]["icon"] == "category/icon"
+        assert result == MarkListSerializer("http://host/media").to_dict(row)
@@ -0,0 +1,26 @@
+import pytest
+
+from modules.geo_service import GeoService
+from modules.mark.cache import MAX_TILE_ZOOM, MarkTileCache
+
+
+class TestMarkTile:
+    @pytest.mark.parametrize(
+        "latitude, longitude, zoom, result",
+        [
+            pytest.param(0.0, 0.0, 0, (0, 0), id="world"),
+            pytest.param(55.7558, 37.6173, 10, (619, 320), id="moscow"),
+            pytest.param(-33.8688, 151.2093, 12, (3768, 2457), id="sydney"),
+            pytest.param(89.9, 180.0, 3, (7, 0), id="clamped"),
+        ],
+    )
+    def test_get_tile(self, latitude, longitude, zoom, result):
+        assert GeoService.get_tile(latitude, longitude, zoom) == result
+
+    def test_point_keys(self):
+        cache = MarkTileCache(prefix="test")
+        keys = cache.get_point_keys([(55.7558, 37.6173)], bucket=1)
+
+        assert len(keys) == MAX_TILE_ZOOM + 1
+        assert "test:mark-tile:1:0:0:0" in keys
+        assert "test:mark-tile:1:10:619:320" in keys
@@ -0,0 +1,60 @@
+import pytest
+
+from utils import media
+from utils.media import MediaFile, MediaFileCache, is_not_modified
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load(key: str) -> MediaFile:
+        calls.append(key)
+        return MediaFile(key, "image/webp", "photo.webp", local_path=f"/tmp/{key}")
+
+    monkeypatch.setattr(media, "load_media_file", load)
+    return calls
+
+
+class TestMediaFileCache:
+    @pytest.mark.asyncio
+    async def test_repeated_lookup_skips_storage(self, loads):
+        cache = MediaFileCache()
+
+        first = await cache.get("marks/1")
+        second = await cache.get("marks/1")
+
+        assert first is second
+        assert loads == ["marks/1"]
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_is_evicted(self, loads):
+        cache = MediaFileCache(maxsize=2)
+
+        await cache.get("marks/1")
+        await cache.get("marks/2")
+        await cache.get("marks/1")
+        await cache.get("marks/3")
+        await cache.get("marks/1")
+        await cache.get("marks/2")
+
+        assert len(cache) == 2
+        assert loads == ["marks/1", "marks/2", "marks/3", "marks/2"]
+
+
+class TestConditionalRequest:
+    @pytest.mark.parametrize(
+        "if_none_match, result",
+        [
+            pytest.param('"marks/1"', True, id="same"),
+            pytest.param('W/"marks/1"', True, id="weak"),
+            pytest.param('"marks/2", "marks/1"', True, id="list"),
+            pytest.param("*", True, id="any"),
+            pytest.param('"marks/2"', False, id="other"),
+            pytest.param("", False, id="empty"),
+        ],
+    )
+    def test_is_not_modified(self, if_none_match, result):
+        etag = MediaFile("marks/1", "image/webp", "photo.webp").etag
+
+        assert is_not_modified({"if-none-match": if_none_match}, etag) is result
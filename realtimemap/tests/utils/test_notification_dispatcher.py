@@ -0,0 +1,143 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from modules.notification.dispatcher import NotificationDispatcher
+
+NAMESPACE = "/marks"
+
+
+class SlowServer:
+    """
+    Server with connected sids, emit to slow sids waits until released
+    """
+
+    def __init__(self, sids, slow=()):
+        self.sids = set(sids)
+        self.slow = set(slow)
+        self.released = asyncio.Event()
+        self.emitted = []
+        self.disconnected = []
+        self.active = 0
+        self.max_active = 0
+        self.ignore_queue = {}
+        self.manager = SimpleNamespace(
+            is_connected=lambda sid, namespace: sid in self.sids
+        )
+
+    async def emit(self, event, data=None, to=None, namespace=None, **kwargs):
+        self.ignore_queue[str(to)] = kwargs.get("ignore_queue", False)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            if isinstance(to, str) and to in self.slow:
+                await self.released.wait()
+            else:
+                await asyncio.sleep(0)
+            self.emitted.append((event, data, to))
+        finally:
+            self.active -= 1
+
+    async def disconnect(self, sid, namespace=None):
+        self.disconnected.append(sid)
+
+
+class TestNotificationDispatcher:
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_delay_others(self):
+        sio = SlowServer(["slow", "a", "b"], slow=["slow"])
+        dispatcher = NotificationDispatcher(sio, max_concurrency=10)
+
+        await dispatcher.emit("marks_created", {"id": 1}, ["slow", "a", "b"], NAMESPACE)
+        await asyncio.sleep(0.01)
+
+        assert sorted(to for _, _, to in sio.emitted) == ["a", "b"]
+        assert dispatcher.get_metrics()["queued_clients"] == 1
+
+        sio.released.set()
+        await dispatcher.join()
+        assert len(sio.emitted) == 3
+        assert dispatcher.get_metrics()["sent"] == 3
+        assert dispatcher.queue_depth() == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        sids = [f"sid-{i}" for i in range(20)]
+        sio = SlowServer(sids, slow=sids)
+        dispatcher = NotificationDispatcher(sio, max_concurrency=3)
+
+        await dispatcher.emit("marks_created", {"id": 1}, sids, NAMESPACE)
+        await asyncio.sleep(0.01)
+        assert sio.max_active == 3
+
+        sio.released.set()
+        await dispatcher.join()
+        assert len(sio.emitted) == 20
+        assert sio.max_active == 3
+
+    @pytest.mark.asyncio
+    async def test_oldest_events_of_lagging_client_are_dropped(self):
+        sio = SlowServer(["slow"], slow=["slow"])
+        dispatcher = NotificationDispatcher(sio, max_queue_size=2)
+
+        for i in range(5):
+            dispatcher.send("slow", "marks_created", {"id": i}, NAMESPACE)
+        await asyncio.sleep(0.01)
+
+        metrics = dispatcher.get_metrics()
+        assert metrics["dropped"] == 3
+        assert metrics["max_queue_depth"] == 2
+
+        sio.released.set()
+        await dispatcher.join()
+        assert [data["id"] for _, data, _ in sio.emitted] == [3, 4]
+
+    @pytest.mark.asyncio
+    async def test_lagging_client_is_disconnected(self):
+        sio = SlowServer(["slow"], slow=["slow"])
+        dispatcher = NotificationDispatcher(sio, max_queue_size=2, policy="disconnect")
+
+        for i in range(4):
+            dispatcher.send("slow", "marks_created", {"id": i}, NAMESPACE)
+        await asyncio.sleep(0.01)
+
+        assert sio.disconnected == ["slow"]
+        assert dispatcher.get_metrics()["disconnected"] == 1
+        assert dispatcher.queue_depth() == 0
+        sio.released.set()
+        await dispatcher.join()
+
+    @pytest.mark.asyncio
+    async def test_rooms_are_sent_with_one_emit(self):
+        sio = SlowServer(["a"])
+        dispatcher = NotificationDispatcher(sio)
+
+        await dispatcher.emit("message", {"id": 1}, ["1", "geohash:u"], NAMESPACE)
+
+        assert sio.emitted == [("message", {"id": 1}, ["1", "geohash:u"])]
+
+    @pytest.mark.asyncio
+    async def test_local_clients_bypass_manager_queue(self):
+        sio = SlowServer(["a"])
+        dispatcher = NotificationDispatcher(sio)
+
+        await dispatcher.emit("message", {"id": 1}, ["a", "geohash:u"], NAMESPACE)
+        await dispatcher.join()
+
+        assert sio.ignore_queue == {"a": True, "['geohash:u']": False}
+
+    @pytest.mark.asyncio
+    async def test_metrics_are_logged(self, caplog):
+        sio = SlowServer(["a"])
+        dispatcher = NotificationDispatcher(sio)
+        dispatcher.send("a", "marks_created", {"id": 1}, NAMESPACE)
+        await dispatcher.join()
+
+        with caplog.at_level(logging.INFO, logger="modules.notification.dispatcher"):
+            dispatcher.start_metrics_log(0.01)
+            await asyncio.sleep(0.03)
+            dispatcher.stop_metrics_log()
+
+        assert "'sent': 1" in caplog.text
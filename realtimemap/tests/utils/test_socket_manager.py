@@ -0,0 +1,170 @@
+import asyncio
+import inspect
+import re
+from collections import defaultdict
+from typing import Dict, List
+
+import pytest
+import socketio
+
+from socket_io.manager import BatchingRedisManager
+
+NAMESPACE = "/marks"
+ID_PATTERN = re.compile(r'"id":\s*(\d+)')
+
+
+class LocalRedis:
+    """
+    In-process stand-in of Redis pub/sub, shared by managers of all workers
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[asyncio.Queue]] = defaultdict(list)
+        self.published = 0
+
+    async def publish(self, channel: str, data) -> int:
+        self.published += 1
+        for queue in self.subscribers[channel]:
+            queue.put_nowait(data)
+        return len(self.subscribers[channel])
+
+    def pubsub(self, **kwargs) -> "LocalPubSub":
+        return LocalPubSub(self)
+
+
+class LocalPubSub:
+    def __init__(self, redis: LocalRedis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channel = None
+
+    async def subscribe(self, channel: str) -> None:
+        self.channel = channel
+        self.redis.subscribers[channel].append(self.queue)
+
+    async def unsubscribe(self, channel: str = None) -> None:
+        self.redis.subscribers[self.channel].remove(self.queue)
+
+    async def listen(self):
+        while True:
+            data = await self.queue.get()
+            yield {"type": "message", "channel": self.channel.encode(), "data": data}
+
+
+class LocalRedisManager(BatchingRedisManager):
+    def __init__(self, redis: LocalRedis, **kwargs):
+        self.local_redis = redis
+        super().__init__("redis://localhost", channel="test", **kwargs)
+
+    def _redis_connect(self) -> None:
+        self.redis = self.local_redis
+        self.pubsub = self.local_redis.pubsub()
+        self.connected = True
+
+
+class Worker:
+    """
+    Socket.io server of one gunicorn worker, packets to clients are recorded
+    """
+
+    def __init__(self, redis: LocalRedis, **kwargs):
+        self.server = socketio.AsyncServer(
+            async_mode="asgi", client_manager=LocalRedisManager(redis, **kwargs)
+        )
+        self.sent: List[tuple] = []
+        self.server.eio.send = self._record
+        self.server.eio.send_packet = self._record
+        self.server.manager.initialize()
+
+    async def _record(self, eio_sid, data) -> None:
+        self.sent.append((eio_sid, str(getattr(data, "data", data))))
+
+    async def connect(self, eio_sid: str, room: str) -> str:
+        sid = self.server.manager.connect(eio_sid, NAMESPACE)
+        if inspect.isawaitable(sid):
+            sid = await sid
+        await self.server.enter_room(sid, room, namespace=NAMESPACE)
+        return sid
+
+    def stop(self) -> None:
+        thread = getattr(self.server.manager, "thread", None)
+        if thread is not None:
+            thread.cancel()
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timeout"
+        await asyncio.sleep(0.01)
+
+
+class TestBatchingRedisManager:
+    @pytest.mark.asyncio
+    async def test_event_reaches_clients_of_other_workers(self):
+        redis = LocalRedis()
+        workers = [Worker(redis) for _ in range(4)]
+        try:
+            await wait_for(lambda: len(redis.subscribers["test"]) == len(workers))
+            for i, worker in enumerate(workers[1:]):
+                await worker.connect(f"eio-{i}", "geohash:u")
+            await workers[2].connect("eio-other", "geohash:v")
+
+            await workers[0].server.emit(
+                "marks_created", {"id": 1}, to="geohash:u", namespace=NAMESPACE
+            )
+
+            await wait_for(lambda: all(worker.sent for worker in workers[1:]))
+            assert workers[0].sent == []
+            for i, worker in enumerate(workers[1:]):
+                assert [eio_sid for eio_sid, _ in worker.sent] == [f"eio-{i}"]
+                assert "marks_created" in worker.sent[0][1]
+        finally:
+            for worker in workers:
+                worker.stop()
+
+    @pytest.mark.asyncio
+    async def test_events_are_published_in_batch_and_in_order(self):
+        redis = LocalRedis()
+        sender = Worker(redis, publish_interval=0.1)
+        receiver = Worker(redis)
+        try:
+            await wait_for(lambda: len(redis.subscribers["test"]) == 2)
+            await receiver.connect("eio-1", "chat")
+
+            for i in range(10):
+                await sender.server.emit(
+                    "message", {"id": i}, to="chat", namespace=NAMESPACE
+                )
+
+            await wait_for(lambda: len(receiver.sent) == 10)
+            assert redis.published == 1
+            ids = [int(ID_PATTERN.search(data)[1]) for _, data in receiver.sent]
+            assert ids == list(range(10))
+        finally:
+            sender.stop()
+            receiver.stop()
+
+    @pytest.mark.asyncio
+    async def test_message_is_handled_once_by_every_worker(self):
+        redis = LocalRedis()
+        workers = [Worker(redis) for _ in range(3)]
+        handled: Dict[int, List[dict]] = defaultdict(list)
+        try:
+            for i, worker in enumerate(workers):
+
+                async def handler(data, i=i):
+                    handled[i].append(data)
+
+                worker.server.manager.on_message("mark_event", handler)
+            await wait_for(lambda: len(redis.subscribers["test"]) == len(workers))
+
+            await workers[0].server.manager.publish_message("mark_event", {"id": 1})
+
+            await wait_for(lambda: len(handled) == len(workers))
+            await asyncio.sleep(0.05)
+            assert all(items == [{"id": 1}] for items in handled.values())
+            assert all(worker.sent == [] for worker in workers)
+        finally:
+            for worker in workers:
+                worker.stop()
@@ -0,0 +1,177 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from auth.token_cache import TokenUserCache, token_user_cache
+from dependencies.auth.strategy import CachedDatabaseStrategy
+from dependencies.auth.web_socket import socket_current_user_id
+
+
+class AccessTokenDatabase:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.calls = []
+
+    async def get_by_token(self, token, max_age=None):
+        self.calls.append(token)
+        return self.tokens.get(token)
+
+    async def delete(self, access_token):
+        self.tokens.pop(access_token.token, None)
+
+
+class UserManager:
+    @staticmethod
+    def parse_id(value):
+        return int(value)
+
+    @staticmethod
+    async def get(user_id):
+        return SimpleNamespace(id=user_id)
+
+
+class LocalRedis:
+    """
+    In-process stand-in of Redis pub/sub, shared by caches of all workers
+    """
+
+    def __init__(self):
+        self.subscribers = []
+
+    async def publish(self, channel: str, data: str) -> int:
+        for queue in self.subscribers:
+            queue.put_nowait(data.encode())
+        return len(self.subscribers)
+
+    def pubsub(self) -> "LocalPubSub":
+        return LocalPubSub(self)
+
+
+class LocalPubSub:
+    def __init__(self, redis: LocalRedis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, channel: str) -> None:
+        self.redis.subscribers.append(self.queue)
+
+    async def reset(self) -> None:
+        self.redis.subscribers.remove(self.queue)
+
+    async def listen(self):
+        while True:
+            data = await self.queue.get()
+            yield {"type": "message", "data": data}
+
+
+class UserSession:
+    """
+    Session of socket_current_user_id, only the user check is executed
+    """
+
+    def __init__(self, user_id=None):
+        self.user_id = user_id
+
+    async def scalar(self, query):
+        return self.user_id
+
+
+def make_token(token: str, user_id: int, age: timedelta = timedelta()):
+    created_at = datetime.now(timezone.utc) - age
+    return SimpleNamespace(token=token, user_id=user_id, created_at=created_at)
+
+
+class TestCachedDatabaseStrategy:
+    @pytest.mark.asyncio
+    async def test_token_is_read_from_database_once(self):
+        database = AccessTokenDatabase({"token": make_token("token", 1)})
+        strategy = CachedDatabaseStrategy(database, 3600, cache=TokenUserCache())
+
+        user = await strategy.read_token("token", UserManager())
+        user_id = await strategy.read_token_user_id("token")
+
+        assert user.id == user_id == 1
+        assert database.calls == ["token"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_token_is_not_cached(self):
+        database = AccessTokenDatabase({})
+        strategy = CachedDatabaseStrategy(database, 3600, cache=TokenUserCache())
+
+        assert await strategy.read_token_user_id("token") is None
+        assert await strategy.read_token_user_id("token") is None
+        assert database.calls == ["token", "token"]
+
+    @pytest.mark.asyncio
+    async def test_destroyed_token_is_forgotten(self):
+        access_token = make_token("token", 1)
+        database = AccessTokenDatabase({"token": access_token})
+        cache = TokenUserCache()
+        strategy = CachedDatabaseStrategy(database, 3600, cache=cache)
+
+        await strategy.read_token_user_id("token")
+        await strategy.destroy_token("token", SimpleNamespace(id=1))
+
+        assert cache.get("token") is None
+        assert await strategy.read_token_user_id("token") is None
+
+    @pytest.mark.asyncio
+    async def test_entry_does_not_outlive_token(self):
+        database = AccessTokenDatabase(
+            {"token": make_token("token", 1, age=timedelta(seconds=3600))}
+        )
+        cache = TokenUserCache(ttl=60)
+        strategy = CachedDatabaseStrategy(database, 3600, cache=cache)
+
+        assert await strategy.read_token_user_id("token") == 1
+        assert cache.get("token") is None
+
+    @pytest.mark.asyncio
+    async def test_logout_evicts_token_on_every_worker(self):
+        redis = LocalRedis()
+        database = AccessTokenDatabase({"token": make_token("token", 1)})
+        caches = [TokenUserCache(), TokenUserCache()]
+        for cache in caches:
+            await cache.start(redis)
+        try:
+            first, second = (
+                CachedDatabaseStrategy(database, 3600, cache=cache) for cache in caches
+            )
+            assert await first.read_token_user_id("token") == 1
+            assert await second.read_token_user_id("token") == 1
+
+            await first.destroy_token("token", SimpleNamespace(id=1))
+            await asyncio.sleep(0.01)
+
+            assert all(cache.get("token") is None for cache in caches)
+            assert await second.read_token_user_id("token") is None
+        finally:
+            for cache in caches:
+                await cache.stop()
+
+
+class TestSocketCurrentUserId:
+    @pytest.mark.asyncio
+    async def test_cached_token_of_deleted_user_is_rejected(self):
+        token_user_cache.set("token", 1)
+        try:
+            assert await socket_current_user_id("token", UserSession(1)) == 1
+            assert await socket_current_user_id("token", UserSession()) is None
+        finally:
+            token_user_cache.clear()
+
+
+class TestTokenUserCache:
+    def test_least_recently_used_token_is_evicted(self):
+        cache = TokenUserCache(ttl=60, maxsize=2)
+
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.get("first")
+        cache.set("third", 3)
+
+        assert cache.get("second") is None
+        assert cache.get("first") == 1
+        assert len(cache) == 2
@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+from socket_io.user_count import LocalUserCountStore, UserCounter
+
+
+class Broadcasts:
+    def __init__(self):
+        self.counts = []
+
+    async def __call__(self, count: int) -> None:
+        self.counts.append(count)
+
+
+class TestUserCounter:
+    @pytest.mark.asyncio
+    async def test_total_is_sum_of_workers(self):
+        store = LocalUserCountStore()
+        first = UserCounter(store, interval=10, worker_id="first")
+        second = UserCounter(store, interval=10, worker_id="second")
+        broadcast = Broadcasts()
+
+        for _ in range(3):
+            first.connect()
+        second.connect()
+        await first.tick(broadcast)
+        await second.tick(broadcast)
+
+        assert first.total == 3
+        assert second.total == 4
+
+    @pytest.mark.asyncio
+    async def test_one_broadcast_per_interval_for_all_workers(self):
+        store = LocalUserCountStore()
+        workers = [UserCounter(store, interval=10, worker_id=str(i)) for i in range(4)]
+        broadcast = Broadcasts()
+
+        for worker in workers:
+            # Шторм переподключений: число меняется, рассылка одна
+            for _ in range(100):
+                worker.connect()
+                worker.disconnect()
+            worker.connect()
+            await worker.tick(broadcast)
+
+        assert broadcast.counts == [1]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_total_is_not_broadcast(self):
+        store = LocalUserCountStore()
+        counter = UserCounter(store, interval=0, worker_id="worker")
+        broadcast = Broadcasts()
+
+        counter.connect()
+        await counter.tick(broadcast)
+        await counter.tick(broadcast)
+        counter.connect()
+        await counter.tick(broadcast)
+
+        assert broadcast.counts == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_stale_worker_is_not_counted(self):
+        store = LocalUserCountStore()
+        await store.update("crashed", 5, stale_after=30)
+        assert await store.update("alive", 1, stale_after=30) == 6
+
+        store._counts["crashed"] = (5, time.time() - 60)
+        assert await store.update("alive", 1, stale_after=30) == 1
@@ -1,6 +1,9 @@
 from pygeohash import encode
 
+# Точность геохэша, с которой он хранится у меток (~5 м)
+GEOHASH_PRECISION: int = 9
 
-def get_geohash(lat: float, lon: float, precision: int = 5) -> str:
+
+def get_geohash(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
     geohash = encode(lat, lon, precision)
     return geohash
@@ -0,0 +1,110 @@
+import asyncio
+import io
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Варианты изображений: имя -> максимальный размер (ширина, высота)
+IMAGE_VARIANTS: Dict[str, Tuple[int, int]] = {
+    "thumb": (320, 320),
+    "preview": (1280, 1280),
+}
+IMAGE_VARIANT_FORMAT: str = "webp"
+IMAGE_VARIANT_CONTENT_TYPE: str = "image/webp"
+IMAGE_VARIANT_QUALITY: int = 80
+
+MARK_PHOTO_VARIANTS: List[str] = ["thumb", "preview"]
+AVATAR_VARIANTS: List[str] = ["thumb"]
+
+
+def get_variant_suffix(variant: str) -> str:
+    return f".{variant}.{IMAGE_VARIANT_FORMAT}"
+
+
+def get_variant_name(file_id: str, variant: str) -> str:
+    """
+    Name of the variant object near the original: <file_id>.<variant>.webp
+    """
+    return file_id + get_variant_suffix(variant)
+
+
+def get_original_name(name: str) -> Optional[str]:
+    """
+    Original file id of the variant object name, None for other names
+    """
+    parts = name.split(".")
+    if (
+        len(parts) == 3
+        and parts[1] in IMAGE_VARIANTS
+        and parts[2] == IMAGE_VARIANT_FORMAT
+    ):
+        return parts[0]
+    return None
+
+
+def make_image_variants(
+    data: bytes, variants: Optional[Iterable[str]] = None
+) -> Dict[str, bytes]:
+    """
+    Resize image to every variant and encode it as WebP.
+    CPU bound, must not be called in the event loop.
+    :param data: Original image
+    :param variants: Names from IMAGE_VARIANTS, all by default
+    :return: Variant name -> WebP bytes
+    """
+    names = list(variants) if variants is not None else list(IMAGE_VARIANTS)
+    # От большего варианта к меньшему: каждый следующий уменьшается из предыдущего
+    names.sort(key=lambda name: IMAGE_VARIANTS[name], reverse=True)
+    result = {}
+    with Image.open(io.BytesIO(data)) as original:
+        # JPEG декодируется сразу в уменьшенном масштабе
+        original.draft("RGB", IMAGE_VARIANTS[names[0]])
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        for name in names:
+            image.thumbnail(IMAGE_VARIANTS[name], Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, "WEBP", quality=IMAGE_VARIANT_QUALITY, method=4)
+            result[name] = buffer.getvalue()
+    return result
+
+
+async def schedule_image_variants(files: List[Any], variants: List[str]) -> None:
+    """
+    Send uploaded images to celery for generation of variants.
+    :param files: Stored files (sqlalchemy_file File)
+    :param variants: Names from IMAGE_VARIANTS
+    :return: None
+    """
+    from tasks import generate_image_variants
+
+    paths = [file.path for file in files if file]
+    if not paths:
+        return
+    try:
+        # Публикация в брокер блокирующая, выполняем вне event loop
+        await asyncio.to_thread(generate_image_variants.delay, paths, variants)
+    except Exception as e:
+        logger.error(f"Error on schedule image variants {paths}: {e}")
+
+
+async def schedule_image_variants_removal(files: List[Any]) -> None:
+    """
+    Send deleted or replaced images to celery for removal of their variants.
+    :param files: Stored files (sqlalchemy_file File)
+    :return: None
+    """
+    from tasks import delete_image_variants
+
+    paths = [file.path for file in files if file]
+    if not paths:
+        return
+    try:
+        await asyncio.to_thread(delete_image_variants.delay, paths)
+    except Exception as e:
+        logger.error(f"Error on schedule removal of image variants {paths}: {e}")
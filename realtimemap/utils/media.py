@@ -0,0 +1,95 @@
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from libcloud.storage.drivers.local import LocalStorageDriver
+from sqlalchemy_file.storage import StorageManager
+from starlette.concurrency import run_in_threadpool
+
+# Сколько описаний файлов хранится в памяти процесса
+MEDIA_CACHE_SIZE: int = 10000
+
+# file_id уникален для каждой загрузки, содержимое под ним не меняется
+IMMUTABLE_CACHE_CONTROL: str = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL: str = "no-cache"
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    """
+    Metadata of stored file, enough to build response without libcloud
+    """
+
+    key: str
+    content_type: str
+    filename: str
+    # Путь на диске для LocalStorageDriver
+    local_path: Optional[str] = None
+    cdn_url: Optional[str] = None
+
+    @property
+    def etag(self) -> str:
+        # Строгий ETag: файл по ключу никогда не меняется
+        return f'"{self.key}"'
+
+    def stat(self) -> Optional[os.stat_result]:
+        return os.stat(self.local_path) if self.local_path is not None else None
+
+
+def load_media_file(key: str) -> MediaFile:
+    """
+    Blocking lookup of file through sqlalchemy-file and libcloud
+    :param key: <storage>/<file_id>
+    :return: MediaFile
+    :raises ObjectDoesNotExistError: If there is no such file
+    """
+    file = StorageManager.get_file(key)
+    if isinstance(file.object.driver, LocalStorageDriver):
+        # get_cdn_url для LocalStorageDriver вернет локальный путь
+        return MediaFile(
+            key, file.content_type, file.filename, local_path=file.object.get_cdn_url()
+        )
+    return MediaFile(key, file.content_type, file.filename, cdn_url=file.get_cdn_url())
+
+
+class MediaFileCache:
+    """
+    In-process LRU of file metadata. Only found files are cached,
+    so variant that is not generated yet is looked up again.
+    """
+
+    def __init__(self, maxsize: int = MEDIA_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, MediaFile]" = OrderedDict()
+
+    async def get(self, key: str) -> MediaFile:
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            return item
+        item = await run_in_threadpool(load_media_file, key)
+        self._items[key] = item
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return item
+
+    def discard(self, key: str) -> None:
+        self._items.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str) -> bool:
+    """
+    Check If-None-Match of request against ETag of file
+    """
+    if_none_match = headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+media_cache = MediaFileCache()
@@ -0,0 +1,23 @@
+import os
+
+from libcloud.storage.drivers.local import LocalStorageDriver
+from sqlalchemy_file.storage import StorageManager
+
+
+# Настройка структуры для хранения медиа файлов пользователей (Можно интегрировать удаленное хранилище. См доку по sqlalchemy-file)
+def setup_file_storage():
+    os.makedirs("static", exist_ok=True)
+    os.makedirs("uploads/default", exist_ok=True)
+    os.makedirs("uploads/marks", exist_ok=True)
+    os.makedirs("uploads/users", exist_ok=True)
+    os.makedirs("uploads/category", exist_ok=True)
+
+    default_container = LocalStorageDriver("uploads").get_container("default")
+    category_container = LocalStorageDriver("uploads").get_container("category")
+    mark_container = LocalStorageDriver("uploads").get_container("marks")
+    users_container = LocalStorageDriver("uploads").get_container("users")
+
+    StorageManager.add_storage("default", default_container)
+    StorageManager.add_storage("category", category_container)
+    StorageManager.add_storage("marks", mark_container)
+    StorageManager.add_storage("users", users_container)
@@ -1,42 +1,65 @@
-from typing import Any, Optional, Union, List
+from typing import Any, Callable, Optional, Union, List
 
 from pydantic import ValidationInfo
 from starlette.requests import Request
 
 from core.config import conf
+from utils.image import get_variant_suffix
+
+DEFAULT_MEDIA_URL: str = f"{conf.server.base_url}/media"
+
+
+def get_media_url(request: Optional[Request] = None) -> str:
+    """
+    Prefix of media URLs: <media_url>/<storage>/<file_id>.
+    url_for walks the router, so it is resolved once per request
+    and remembered in request.state.
+    """
+    if request is None:
+        return DEFAULT_MEDIA_URL
+    media_url = getattr(request.state, "media_url", None)
+    if media_url is None:
+        url = str(request.url_for("get_file", storage="_", file_id="_"))
+        media_url = url[: -len("/_/_")]
+        request.state.media_url = media_url
+    return media_url
 
 
 def generate_full_image_url(
     value: Any,
     info: ValidationInfo,
+    variant: Optional[str] = None,
 ) -> Optional[Union[str, List[str]]]:
     if not value:
         return None
 
     request: Optional[Request] = info.context.get("request") if info.context else None
+    media_url = get_media_url(request)
+    # Вариант хранится рядом с оригиналом, см. utils.image
+    suffix = get_variant_suffix(variant) if variant is not None else ""
 
-    def _generate_url(photo_obj: Any) -> Optional[str]:
-        if not photo_obj:
-            return ""
+    # Готовый URL (например, при повторной валидации ответа) уже содержит
+    # суффикс варианта, суффикс добавляется только к пути файла
+    if isinstance(value, list):
+        # Быстрый путь для списка: только склейка строк на каждое фото
+        return [
+            photo if isinstance(photo, str) else f"{media_url}/{photo.path}{suffix}"
+            for photo in value
+            if photo
+        ]
 
-        if request:
-            return str(
-                request.url_for(
-                    "get_file",
-                    storage=photo_obj.upload_storage,
-                    file_id=photo_obj.file_id,
-                )
-            )
+    if isinstance(value, str):
+        return value
 
-        base_url = conf.server.base_url
+    return f"{media_url}/{value.path}{suffix}"
 
-        file_url = photo_obj.path
-        return f"{base_url}/media/{file_url}"
 
-    if isinstance(value, list):
-        return [_generate_url(photo) for photo in value if photo]
+def image_variant_url_validator(variant: str) -> Callable[[Any, ValidationInfo], Any]:
+    """
+    Field validator with URLs of the image variant instead of the original
+    """
 
-    if isinstance(value, str):
-        return value
+    def validator(value: Any, info: ValidationInfo):
+        return generate_full_image_url(value, info, variant)
 
-    return _generate_url(value)
+    return validator